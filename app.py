@@ -1,21 +1,102 @@
 # backend/app.py
-from flask import Flask, request, session, Response, redirect
+from flask import Flask, request, session, Response, redirect, stream_with_context
 from flask_cors import CORS
 from flask_restx import Api, Resource, fields
+from config import (
+    apply_transaction_statement_timeout,
+    get_database_url,
+    get_engine_options,
+    get_event_cache_url,
+    get_idempotency_cache_url,
+)
 from extensions import db, bcrypt, limiter
-from models import Host, Event, Attendee
+from models import ATTENDEE_STATUSES, Host, Event, Attendee, AttendeeTombstone, EventStats
 from email_validator import validate_email, EmailNotValidError
-from services.email_service import (
-    send_rsvp_notification,
-    send_modification_notification,
-    send_cancellation_notification,
+from services.notification_outbox import (
+    enqueue_notification,
+    deliver_after_commit,
+    run_worker,
+)
+from services.attendee_import import (
+    import_attendees,
+    iter_csv_rows,
+    iter_json_rows,
+    stamp_commit_time,
+)
+from services.cache import create_cache
+from services.cep import (
+    CepUnavailable,
+    InvalidCep,
+    format_address,
+    format_cep,
+    iter_dataset_rows,
+    load_dataset,
+    lookup as lookup_cep,
+    normalize_cep,
+)
+from services.db_pool import instrument_engine
+from services.idempotency import (
+    MAX_KEY_LENGTH as MAX_IDEMPOTENCY_KEY_LENGTH,
+    IdempotencyKeyReused,
+    IdempotencyStore,
+)
+from services.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    instrument_app,
+    instrument_queries,
+    render_metrics,
+)
+from services.password_hashing import (
+    HashingBusy,
+    check_password,
+    hash_password,
+    needs_rehash,
+)
+from services.export import (
+    EXPORT_BATCH_SIZE,
+    columnar_chunks,
+    csv_chunks,
+    encode_chunks,
+    gzip_chunks,
+    jsonl_chunks,
 )
-from datetime import datetime
+from services import live_feed
+from services.slugs import allocate_slug, has_title_prefix
+from services.weather import WeatherUnavailable, forecast_window, get_forecast
+from services.event_stats import (
+    attendee_snapshot,
+    apply_attendee_change,
+    create_event_stats,
+    insert_missing_event_stats,
+    promote_waitlist,
+    rebuild_event_stats,
+)
+from migrations import upgrade as upgrade_schema
+from utils.queries import (
+    audit_query_plans,
+    find_event_attendee,
+    insert_attendee,
+    lock_attendee,
+)
+from utils.pagination import (
+    InvalidCursor,
+    decode_cursor,
+    encode_cursor,
+    keyset_order,
+    keyset_page,
+)
+from utils.query_budget import init_query_budget, query_budget
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from werkzeug.http import http_date, parse_date
+from sqlalchemy import func
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import load_only
+import click
+import hashlib
+import json
 import os
-import csv
-import io
+import re
 
 load_dotenv()
 
@@ -24,13 +105,19 @@ app = Flask(__name__)
 # Configurações básicas
 app.config["SECRET_KEY"] = os.getenv("SECRET_KEY")
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+# Custo do bcrypt; hashes com custo diferente são refeitos no próximo login
+app.config["BCRYPT_LOG_ROUNDS"] = int(os.getenv("BCRYPT_LOG_ROUNDS", "12"))
+# Detector de N+1: off, log ou raise (padrão: raise em testes, log em debug)
+app.config["QUERY_BUDGET_MODE"] = os.getenv("QUERY_BUDGET_MODE")
+# Permite desligar o rate limiting (ex.: benchmarks locais)
+app.config["RATELIMIT_ENABLED"] = os.getenv("RATELIMIT_ENABLED", "1") == "1"
 
 # Configuração do banco de dados (suporta SQLite e PostgreSQL)
-database_url = os.getenv("DATABASE_URL", "sqlite:///invitations.db")
-# Railway usa postgres:// mas SQLAlchemy precisa de postgresql://
-if database_url.startswith("postgres://"):
-    database_url = database_url.replace("postgres://", "postgresql://", 1)
-app.config["SQLALCHEMY_DATABASE_URI"] = database_url
+app.config["SQLALCHEMY_DATABASE_URI"] = get_database_url()
+# Pool de conexões (tamanho, overflow, pre-ping, recycle, statement_timeout)
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = get_engine_options(
+    app.config["SQLALCHEMY_DATABASE_URI"]
+)
 
 # Configurações de segurança para cookies de sessão (produção)
 is_production = os.getenv("FLASK_ENV") == "production"
@@ -44,6 +131,14 @@ db.init_app(app)
 bcrypt.init_app(app)
 limiter.init_app(app)
 
+instrument_app(app)
+
+with app.app_context():
+    instrument_engine(db.engine)
+    instrument_queries(db.engine)
+    init_query_budget(app, db.engine)
+    apply_transaction_statement_timeout(db.engine)
+
 # CORS - suporta múltiplas origens (desenvolvimento e produção)
 allowed_origins = os.getenv("FRONTEND_URL", "http://localhost:3000").split(",")
 CORS(app, supports_credentials=True, origins=allowed_origins)
@@ -68,6 +163,9 @@ events_ns = api.namespace(
 attendees_ns = api.namespace(
     "attendees", description="Operações de convidados/RSVP", path="/api/attendees"
 )
+system_ns = api.namespace(
+    "system", description="Saúde e métricas do servidor", path="/api/system"
+)
 
 # ============= MODELS =============
 signup_model = api.model(
@@ -120,8 +218,7 @@ event_create_model = api.model(
             description="CEP brasileiro (opcional)", example="22040-020"
         ),
         "address_full": fields.String(
-            required=True,
-            description="Endereço completo",
+            description="Endereço completo (se omitido, montado a partir do CEP)",
             example="Av. Atlântica, 1702, Copacabana, Rio de Janeiro - RJ, Brasil",
         ),
         "allow_modifications": fields.Boolean(
@@ -130,6 +227,15 @@ event_create_model = api.model(
         "allow_cancellations": fields.Boolean(
             description="Permitir convidados cancelarem RSVP", default=True, example=True
         ),
+        "max_guests": fields.Integer(
+            description="Limite de adultos + crianças confirmados (opcional; além dele, lista de espera)",
+            example=50,
+        ),
+        "readable_slug": fields.Boolean(
+            description="Começar o link do convite com o título (ex.: festa-de-aniversario-k3m9x2p)",
+            default=False,
+            example=False,
+        ),
     },
 )
 
@@ -153,6 +259,9 @@ event_update_model = api.model(
         "allow_cancellations": fields.Boolean(
             description="Permitir convidados cancelarem RSVP"
         ),
+        "max_guests": fields.Integer(
+            description="Limite de adultos + crianças confirmados (null remove o limite)"
+        ),
     },
 )
 
@@ -248,6 +357,208 @@ attendee_modify_model = api.model(
 )
 
 
+# Cache da página pública do evento (chave: slug). Em produção fica em um
+# arquivo SQLite compartilhado pelos workers; use EVENT_CACHE_URL com redis://
+# para compartilhar entre réplicas
+event_page_cache = create_cache(
+    get_event_cache_url(),
+    namespace="event-page:",
+    ttl=int(os.getenv("EVENT_CACHE_TTL_SECONDS", "300")),
+    max_entries=int(os.getenv("EVENT_CACHE_MAX_ENTRIES", "2048")),
+)
+
+# Respostas de RSVP já concluídas, por Idempotency-Key (compartilhadas entre
+# os workers em produção; IDEMPOTENCY_CACHE_URL com redis:// entre réplicas)
+idempotency_store = IdempotencyStore(
+    create_cache(
+        get_idempotency_cache_url(),
+        namespace="idempotency:",
+        ttl=int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "3600")),
+        max_entries=int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000")),
+    )
+)
+
+# ============= HELPERS =============
+MY_EVENTS_DEFAULT_PER_PAGE = 20
+MY_EVENTS_MAX_PER_PAGE = 100
+
+# Um RSVP gravado há menos tempo que isso, com os mesmos dados, por um envio
+# com a mesma Idempotency-Key que ainda não guardou a resposta, é a mesma
+# tentativa
+IDEMPOTENCY_RACE_WINDOW_SECONDS = 10
+
+# Listagem de convidados do anfitrião (paginação por cursor)
+ATTENDEES_DEFAULT_LIMIT = 50
+ATTENDEES_MAX_LIMIT = 200
+ATTENDEE_FIELDS = (
+    "id",
+    "name",
+    "whatsapp_number",
+    "num_adults",
+    "num_children",
+    "comments",
+    "status",
+    "rsvp_date",
+)
+# Sincronização incremental (GET /api/events/<id>/attendees/changes)
+SYNC_DEFAULT_LIMIT = 500
+SYNC_MAX_LIMIT = 1000
+SYNC_FIELDS = ATTENDEE_FIELDS + ("last_modified",)
+# Janela para commits em andamento. Limite conhecido: uma transação aberta
+# por mais tempo entre gravar last_modified e o commit (esperas de lock) fica
+# fora da sincronização de quem já passou desse watermark
+SYNC_SETTLE_SECONDS = float(os.getenv("SYNC_SETTLE_SECONDS", "2"))
+TOMBSTONE_RETENTION_DAYS = int(os.getenv("TOMBSTONE_RETENTION_DAYS", "30"))
+# Cada ordenação usa um índice (event_id, coluna, id)
+ATTENDEE_SORTS = {
+    "rsvp_date": (Attendee.rsvp_date, False),
+    "-rsvp_date": (Attendee.rsvp_date, True),
+    "name": (Attendee.name, False),
+    "-name": (Attendee.name, True),
+}
+
+
+def wants_gzip():
+    """Indica se a resposta deve ser comprimida (?gzip=true e cliente aceita gzip)"""
+    return (
+        request.args.get("gzip", "").lower() in ("1", "true")
+        and "gzip" in request.accept_encodings
+    )
+
+
+def require_metrics_token():
+    """Exige Authorization: Bearer <METRICS_TOKEN> quando a variável está definida"""
+    token = os.getenv("METRICS_TOKEN")
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        api.abort(401, "Token de métricas inválido")
+
+
+def stored_rsvp_reply(idempotency_key, data):
+    """Resposta guardada (body, status) da Idempotency-Key, ou None; 422 se os dados mudaram"""
+    try:
+        return idempotency_store.get("rsvp", idempotency_key, data)
+    except IdempotencyKeyReused:
+        api.abort(422, "Esta Idempotency-Key já foi usada com outros dados")
+
+
+def rsvp_matches(attendee, values):
+    """Indica se um convidado acabou de ser gravado com os dados de um envio.
+
+    Cobre só a corrida entre duas tentativas simultâneas com a mesma chave
+    (a primeira ainda não guardou a resposta): um RSVP mais antigo que
+    IDEMPOTENCY_RACE_WINDOW_SECONDS é um envio repetido de verdade.
+    """
+    return (
+        attendee is not None
+        and attendee.status != "cancelled"
+        and attendee.rsvp_date is not None
+        and values["rsvp_date"] - attendee.rsvp_date
+        <= timedelta(seconds=IDEMPOTENCY_RACE_WINDOW_SECONDS)
+        and all(
+            getattr(attendee, field) == values[field]
+            for field in ("name", "num_adults", "num_children", "comments")
+        )
+    )
+
+
+def parse_max_guests(data):
+    """Valida max_guests (inteiro positivo ou None); aborta com 400 se inválido"""
+    value = data.get("max_guests")
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        api.abort(400, "max_guests deve ser um número inteiro maior que zero")
+    return value
+
+
+def resolve_cep(value, address_full):
+    """Valida e resolve o CEP informado; retorna (address_cep, address_full, endereço).
+
+    Sem endereço completo, ele é montado a partir do CEP. Com o serviço de CEP
+    fora do ar (ou um CEP que ele não conhece) o endereço informado é usado
+    como está.
+    """
+    if not value:
+        return "", address_full, None
+    try:
+        address = lookup_cep(value)
+    except InvalidCep:
+        api.abort(400, "CEP inválido. Use 8 dígitos, ex.: 22040-020")
+    except CepUnavailable:
+        if not address_full:
+            api.abort(503, "Não foi possível consultar o CEP agora. Informe o endereço completo")
+        return format_cep(normalize_cep(value)), address_full, None
+    if address is None:
+        if not address_full:
+            api.abort(400, "CEP não encontrado. Confira o número ou informe o endereço completo")
+        return format_cep(normalize_cep(value)), address_full, None
+    return address["cep"], address_full or format_address(address), address
+
+
+def event_location(event):
+    """Local da previsão do tempo: a cidade do CEP, o endereço completo ou None"""
+    if event.address_cep:
+        try:
+            address = lookup_cep(event.address_cep)
+        except (InvalidCep, CepUnavailable):
+            address = None
+        if address and address["city"]:
+            return f"{address['city']}, {address['state']}, Brazil"
+    return (event.address_full or "").strip() or None
+
+
+def promote_and_notify(event, live_updates):
+    """Promove a lista de espera e enfileira as notificações; o chamador faz commit"""
+    promoted = promote_waitlist(event)
+    live_updates += [live_update("promotion", event, attendee) for attendee in promoted]
+    return [enqueue_notification("promotion", event, attendee) for attendee in promoted]
+
+
+def live_update(kind, event, attendee):
+    """Mensagem do feed ao vivo, montada antes do commit (depois dele os atributos expiram)"""
+    # flush: last_modified com o valor que será gravado
+    db.session.flush()
+    return event.host_id, {
+        "type": kind,
+        "event_id": event.id,
+        "attendee": serialize_attendee(attendee, SYNC_FIELDS),
+    }
+
+
+def publish_live(live_updates):
+    """Envia as mensagens do feed ao vivo (depois do commit)"""
+    for host_id, message in live_updates:
+        live_feed.publish(host_id, message)
+
+
+def parse_list_arg(name, allowed):
+    """Lê um parâmetro separado por vírgulas; aborta com 400 se houver valor desconhecido"""
+    values = [value.strip() for value in request.args.get(name, "").split(",") if value.strip()]
+    unknown = [value for value in values if value not in allowed]
+    if unknown:
+        api.abort(
+            400, f"Valor inválido para {name}: {', '.join(unknown)}. Use: {', '.join(allowed)}"
+        )
+    return values
+
+
+def serialize_attendee(attendee, fields=ATTENDEE_FIELDS):
+    """Convidado como dict, apenas com os campos pedidos"""
+    data = {}
+    for field in fields:
+        value = getattr(attendee, field)
+        data[field] = value.isoformat() if isinstance(value, datetime) else value
+    return data
+
+
+def parse_date_arg(name):
+    """Converte um parâmetro de query AAAA-MM-DD em date (ou None se ausente)"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
 # ============= AUTH ROUTES =============
 @auth_ns.route("/signup")
 class Signup(Resource):
@@ -255,6 +566,8 @@ class Signup(Resource):
     @auth_ns.response(201, "Anfitrião criado com sucesso")
     @auth_ns.response(400, "Entrada inválida")
     @auth_ns.response(409, "Email já cadastrado")
+    @auth_ns.response(503, "Servidor ocupado")
+    @query_budget(3)
     def post(self):
         """Criar nova conta de anfitrião"""
         data = request.get_json()
@@ -271,7 +584,10 @@ class Signup(Resource):
         if Host.query.filter_by(email=email).first():
             api.abort(409, "Este email já está cadastrado. Faça login ou use outro email")
 
-        password_hash = bcrypt.generate_password_hash(data["password"]).decode("utf-8")
+        try:
+            password_hash = hash_password(data["password"])
+        except HashingBusy:
+            api.abort(503, "Servidor ocupado. Tente novamente em alguns segundos")
         host = Host(
             email=email,
             password_hash=password_hash,
@@ -299,6 +615,8 @@ class Login(Resource):
     @auth_ns.response(200, "Login realizado com sucesso")
     @auth_ns.response(400, "Credenciais ausentes")
     @auth_ns.response(401, "Credenciais inválidas")
+    @auth_ns.response(503, "Servidor ocupado")
+    @query_budget(3)
     def post(self):
         """Fazer login como anfitrião"""
         data = request.get_json()
@@ -306,10 +624,16 @@ class Login(Resource):
             api.abort(400, "Email e senha são obrigatórios")
 
         host = Host.query.filter_by(email=data["email"]).first()
-        if not host or not bcrypt.check_password_hash(
-            host.password_hash, data["password"]
-        ):
-            api.abort(401, "Email ou senha incorretos")
+        try:
+            if not host or not check_password(host.password_hash, data["password"]):
+                api.abort(401, "Email ou senha incorretos")
+
+            # Custo do bcrypt mudou: refaz o hash agora que temos a senha
+            if needs_rehash(host.password_hash):
+                host.password_hash = hash_password(data["password"])
+                db.session.commit()
+        except HashingBusy:
+            api.abort(503, "Servidor ocupado. Tente novamente em alguns segundos")
 
         session["host_id"] = host.id
         return {
@@ -336,6 +660,7 @@ class Logout(Resource):
 class CurrentHost(Resource):
     @auth_ns.response(200, "Sucesso")
     @auth_ns.response(401, "Não autenticado")
+    @query_budget(1)
     def get(self):
         """Obter anfitrião autenticado atual"""
         if "host_id" not in session:
@@ -362,6 +687,8 @@ class CreateEvent(Resource):
     @events_ns.response(201, "Evento criado com sucesso")
     @events_ns.response(400, "Entrada inválida")
     @events_ns.response(401, "Não autenticado")
+    @events_ns.response(503, "Serviço de CEP indisponível e endereço não informado")
+    @query_budget(6)
     def post(self):
         """Criar novo evento (requer autenticação)"""
         if "host_id" not in session:
@@ -372,8 +699,10 @@ class CreateEvent(Resource):
         data = request.get_json()
 
         # Campos obrigatórios
-        required = ["title", "event_date", "start_time", "address_full"]
-        if not all(field in data for field in required):
+        required = ["title", "event_date", "start_time"]
+        if not all(field in data for field in required) or not (
+            data.get("address_full") or data.get("address_cep")
+        ):
             api.abort(
                 400,
                 "Preencha todos os campos obrigatórios: título, data, horário e endereço",
@@ -390,20 +719,31 @@ class CreateEvent(Resource):
             )
         except ValueError:
             api.abort(400, "Formato de data/hora inválido. Use AAAA-MM-DD para data e HH:MM para horário")
+        max_guests = parse_max_guests(data)
+        # Antes de qualquer escrita: a consulta ao ViaCEP não segura locks do banco
+        address_cep, address_full, address = resolve_cep(
+            data.get("address_cep"), data.get("address_full")
+        )
 
         event = Event(
             host_id=session["host_id"],
+            slug=allocate_slug(
+                db.session.connection(),
+                data["title"] if data.get("readable_slug") else None,
+            ),
             title=data["title"],
             description=data.get("description", ""),
             event_date=event_date,
             start_time=start_time,
             end_time=end_time,
-            address_cep=data.get("address_cep", ""),
-            address_full=data["address_full"],
+            address_cep=address_cep,
+            address_full=address_full,
             allow_modifications=data.get("allow_modifications", True),
             allow_cancellations=data.get("allow_cancellations", True),
+            max_guests=max_guests,
         )
 
+        create_event_stats(event)
         db.session.add(event)
         db.session.commit()
 
@@ -414,28 +754,175 @@ class CreateEvent(Resource):
                 "slug": event.slug,
                 "title": event.title,
                 "invite_url": f"/invite/{event.slug}",
+                "address_cep": event.address_cep,
+                "address_full": event.address_full,
             },
+            "address": address,
         }, 201
 
 
 @events_ns.route("/my-events")
 class MyEvents(Resource):
+    @events_ns.doc(
+        params={
+            "page": "Página (começa em 1). Se omitido, retorna todos os eventos",
+            "per_page": f"Eventos por página (máximo {MY_EVENTS_MAX_PER_PAGE})",
+            "since": "Somente eventos a partir desta data (AAAA-MM-DD)",
+            "until": "Somente eventos até esta data (AAAA-MM-DD)",
+        }
+    )
     @events_ns.response(200, "Sucesso")
+    @events_ns.response(400, "Parâmetros inválidos")
     @events_ns.response(401, "Não autenticado")
+    @query_budget(6)
     def get(self):
         """Obter todos os eventos do anfitrião logado"""
         if "host_id" not in session:
             api.abort(401, "Faça login para ver seus eventos")
 
-        events = (
-            Event.query.filter_by(host_id=session["host_id"])
-            .order_by(Event.event_date.desc())
-            .all()
+        try:
+            since = parse_date_arg("since")
+            until = parse_date_arg("until")
+        except ValueError:
+            api.abort(400, "Formato de data inválido. Use AAAA-MM-DD")
+
+        paginate = "page" in request.args or "per_page" in request.args
+        page = request.args.get("page", 1, type=int)
+        per_page = request.args.get("per_page", MY_EVENTS_DEFAULT_PER_PAGE, type=int)
+        if page < 1 or not 1 <= per_page <= MY_EVENTS_MAX_PER_PAGE:
+            api.abort(
+                400,
+                f"Paginação inválida. Use page >= 1 e per_page entre 1 e {MY_EVENTS_MAX_PER_PAGE}",
+            )
+
+        filters = [Event.host_id == session["host_id"]]
+        if since:
+            filters.append(Event.event_date >= since)
+        if until:
+            filters.append(Event.event_date <= until)
+
+        # Contagens lidas da tabela event_stats (mantida a cada escrita),
+        # sem percorrer event.attendees de cada evento
+        query = (
+            db.session.query(Event, EventStats)
+            .outerjoin(EventStats, EventStats.event_id == Event.id)
+            .filter(*filters)
+            .order_by(Event.event_date.desc(), Event.id.desc())
         )
 
-        return {
-            "events": [
-                {
+        response = {}
+        if paginate:
+            total = db.session.query(func.count(Event.id)).filter(*filters).scalar()
+            query = query.limit(per_page).offset((page - 1) * per_page)
+            response["pagination"] = {
+                "page": page,
+                "per_page": per_page,
+                "total": total,
+                "pages": (total + per_page - 1) // per_page,
+            }
+
+        rows = query.all()
+        missing = [event.id for event, stats in rows if stats is None]
+        if missing:
+            # Evento sem linha de contadores (a migração 0002 preenche as
+            # antigas): cria sem apagar nada, seguro com GETs simultâneos
+            insert_missing_event_stats(missing)
+            db.session.commit()
+            rows = query.all()
+
+        response["events"] = [
+            {
+                "id": event.id,
+                "slug": event.slug,
+                "title": event.title,
+                "description": event.description,
+                "event_date": event.event_date.isoformat(),
+                "start_time": event.start_time.strftime("%H:%M"),
+                "end_time": (
+                    event.end_time.strftime("%H:%M") if event.end_time else None
+                ),
+                "address_cep": event.address_cep,
+                "address_full": event.address_full,
+                "allow_modifications": bool(event.allow_modifications),
+                "allow_cancellations": bool(event.allow_cancellations),
+                "max_guests": event.max_guests,
+                "attendee_count": stats.confirmed_count if stats else 0,
+                "total_adults": stats.total_adults if stats else 0,
+                "total_children": stats.total_children if stats else 0,
+            }
+            for event, stats in rows
+        ]
+        return response, 200
+
+
+@events_ns.route("/live")
+class LiveFeed(Resource):
+    @events_ns.response(
+        200, "Stream text/event-stream: eventos rsvp, modification, cancellation, promotion e resync"
+    )
+    @events_ns.response(401, "Não autenticado")
+    @events_ns.response(503, "Limite de conexões ao vivo deste servidor atingido")
+    @query_budget(0)
+    def get(self):
+        """Feed ao vivo (SSE) dos RSVPs de todos os eventos do anfitrião"""
+        if "host_id" not in session:
+            api.abort(401, "Faça login para acompanhar os RSVPs")
+
+        try:
+            subscription = live_feed.subscribe(session["host_id"])
+        except live_feed.SubscriberLimitReached:
+            # O painel continua funcionando consultando /attendees/changes
+            api.abort(503, "Muitas conexões ao vivo neste servidor. Atualize a lista periodicamente")
+
+        response = Response(
+            live_feed.event_stream(subscription),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+        # Também libera a vaga se o stream for fechado antes do primeiro byte
+        response.call_on_close(subscription.close)
+        return response
+
+
+@events_ns.route("/cep/<string:cep>")
+class CepLookup(Resource):
+    @events_ns.response(200, "Endereço do CEP")
+    @events_ns.response(400, "CEP inválido")
+    @events_ns.response(404, "CEP não encontrado")
+    @events_ns.response(503, "Serviço de CEP indisponível")
+    @limiter.limit("60 per minute")
+    @query_budget(2)
+    def get(self, cep):
+        """Consultar o endereço de um CEP (preenchimento do formulário de evento)"""
+        try:
+            address = lookup_cep(cep)
+        except InvalidCep:
+            api.abort(400, "CEP inválido. Use 8 dígitos, ex.: 22040-020")
+        except CepUnavailable:
+            api.abort(503, "Não foi possível consultar o CEP agora. Informe o endereço completo")
+        # Grava a resposta do ViaCEP no cache persistente (sem efeito se veio do cache)
+        db.session.commit()
+        if address is None:
+            api.abort(404, "CEP não encontrado")
+        return {"address": address}, 200, {"Cache-Control": "public, max-age=86400"}
+
+
+@events_ns.route("/<string:slug>")
+class EventBySlug(Resource):
+    @events_ns.response(200, "Sucesso")
+    @events_ns.response(304, "Não modificado")
+    @events_ns.response(404, "Evento não encontrado")
+    @query_budget(2)
+    def get(self, slug):
+        """Obter detalhes do evento por slug (para convidados visualizando o convite)"""
+        cached = event_page_cache.get(slug)
+        if cached is None:
+            event = Event.query.filter_by(slug=slug).first()
+            if not event:
+                api.abort(404, "Convite não encontrado. Verifique o link")
+
+            payload = {
+                "event": {
                     "id": event.id,
                     "slug": event.slug,
                     "title": event.title,
@@ -445,65 +932,185 @@ class MyEvents(Resource):
                     "end_time": (
                         event.end_time.strftime("%H:%M") if event.end_time else None
                     ),
-                    "address_cep": event.address_cep,
                     "address_full": event.address_full,
                     "allow_modifications": bool(event.allow_modifications),
                     "allow_cancellations": bool(event.allow_cancellations),
-                    "attendee_count": len(
-                        [a for a in event.attendees if a.status == "confirmed"]
-                    ),
-                    "total_adults": sum(
-                        a.num_adults for a in event.attendees if a.status == "confirmed"
-                    ),
-                    "total_children": sum(
-                        a.num_children
-                        for a in event.attendees
-                        if a.status == "confirmed"
-                    ),
+                    "max_guests": event.max_guests,
+                    "host_name": event.host.name,
+                    "host_whatsapp": event.host.whatsapp_number,
                 }
-                for event in events
-            ]
-        }, 200
+            }
+            body = json.dumps(payload, sort_keys=True).encode("utf-8")
+            cached = {
+                "payload": payload,
+                "etag": hashlib.sha1(body).hexdigest(),
+                "last_modified": http_date(event.updated_at or event.created_at),
+            }
+            event_page_cache.set(slug, cached)
+
+        headers = {
+            "ETag": f'"{cached["etag"]}"',
+            "Last-Modified": cached["last_modified"],
+            "Cache-Control": "public, no-cache",
+        }
+        # GET condicional: responde 304 sem consultar o banco
+        if request.if_none_match:
+            if request.if_none_match.contains(cached["etag"]):
+                return Response(status=304, headers=headers)
+        elif (
+            request.if_modified_since
+            and request.if_modified_since >= parse_date(cached["last_modified"])
+        ):
+            return Response(status=304, headers=headers)
 
+        return cached["payload"], 200, headers
 
-@events_ns.route("/<string:slug>")
-class EventBySlug(Resource):
-    @events_ns.response(200, "Sucesso")
+
+@events_ns.route("/<string:slug>/weather")
+class EventWeather(Resource):
+    @events_ns.response(200, "Previsão do tempo (forecast null fora dos próximos 14 dias)")
     @events_ns.response(404, "Evento não encontrado")
+    @events_ns.response(422, "Evento sem endereço")
+    @events_ns.response(503, "Previsão do tempo indisponível")
+    @query_budget(3)
     def get(self, slug):
-        """Obter detalhes do evento por slug (para convidados visualizando o convite)"""
-        event = Event.query.filter_by(slug=slug).first()
+        """Previsão do tempo para o local e a data do evento (página do convite)"""
+        event = (
+            Event.query.options(
+                load_only(Event.event_date, Event.address_cep, Event.address_full)
+            )
+            .filter_by(slug=slug)
+            .first()
+        )
         if not event:
             api.abort(404, "Convite não encontrado. Verifique o link")
 
-        return {
-            "event": {
-                "id": event.id,
-                "slug": event.slug,
-                "title": event.title,
-                "description": event.description,
-                "event_date": event.event_date.isoformat(),
-                "start_time": event.start_time.strftime("%H:%M"),
-                "end_time": (
-                    event.end_time.strftime("%H:%M") if event.end_time else None
-                ),
-                "address_full": event.address_full,
-                "allow_modifications": bool(event.allow_modifications),
-                "allow_cancellations": bool(event.allow_cancellations),
-                "host_name": event.host.name,
-                "host_whatsapp": event.host.whatsapp_number,
-            }
-        }, 200
+        first_day, last_day = forecast_window()
+        if not first_day <= event.event_date <= last_day:
+            # Sem consulta à WeatherAPI: ainda não há (ou não há mais) previsão
+            response = {"event_date": event.event_date.isoformat(), "forecast": None}
+            if event.event_date > last_day:
+                response["available_from"] = (
+                    event.event_date - (last_day - first_day)
+                ).isoformat()
+            return response, 200, {"Cache-Control": "public, max-age=3600"}
+
+        location = event_location(event)
+        # A consulta do CEP pode ter gravado a resposta do ViaCEP
+        db.session.commit()
+        if location is None:
+            api.abort(422, "Evento sem endereço: não há local para a previsão do tempo")
+        try:
+            result = get_forecast(location, event.event_date)
+        except WeatherUnavailable:
+            api.abort(503, "Previsão do tempo indisponível no momento. Tente mais tarde")
+
+        max_age = result.pop("max_age")
+        return (
+            dict(result, event_date=event.event_date.isoformat(), location=location),
+            200,
+            {"Cache-Control": f"public, max-age={max_age}"},
+        )
 
 
 @events_ns.route("/<int:event_id>/attendees")
 class EventAttendees(Resource):
+    @events_ns.doc(
+        params={
+            "limit": f"Convidados por página (máximo {ATTENDEES_MAX_LIMIT}). "
+            "Se omitido junto com cursor, retorna todos",
+            "cursor": "next_cursor da página anterior",
+            "status": f"Filtrar por status, separados por vírgula ({', '.join(ATTENDEE_STATUSES)})",
+            "q": "Início do nome ou do número de WhatsApp",
+            "sort": f"Ordenação: {', '.join(ATTENDEE_SORTS)} (padrão: rsvp_date)",
+            "fields": f"Campos retornados, separados por vírgula ({', '.join(ATTENDEE_FIELDS)})",
+        }
+    )
+    @events_ns.response(200, "Sucesso")
+    @events_ns.response(400, "Parâmetros inválidos")
+    @events_ns.response(401, "Não autenticado")
+    @events_ns.response(403, "Não autorizado")
+    @events_ns.response(404, "Evento não encontrado")
+    @query_budget(2)
+    def get(self, event_id):
+        """Obter os convidados de um evento (apenas anfitrião)"""
+        if "host_id" not in session:
+            api.abort(401, "Faça login para ver os convidados")
+
+        event = Event.query.get(event_id)
+        if not event:
+            api.abort(404, "Evento não encontrado")
+
+        if event.host_id != session["host_id"]:
+            api.abort(403, "Você não tem permissão para acessar este evento")
+
+        sort = request.args.get("sort", "rsvp_date")
+        if sort not in ATTENDEE_SORTS:
+            api.abort(400, f"Ordenação inválida. Use: {', '.join(ATTENDEE_SORTS)}")
+        statuses = parse_list_arg("status", ATTENDEE_STATUSES)
+        fields = parse_list_arg("fields", ATTENDEE_FIELDS) or list(ATTENDEE_FIELDS)
+        if "id" not in fields:
+            fields.insert(0, "id")
+
+        paginate = "limit" in request.args or "cursor" in request.args
+        limit = request.args.get("limit", ATTENDEES_DEFAULT_LIMIT, type=int)
+        if not 1 <= limit <= ATTENDEES_MAX_LIMIT:
+            api.abort(400, f"limit deve estar entre 1 e {ATTENDEES_MAX_LIMIT}")
+        after = None
+        if request.args.get("cursor"):
+            try:
+                after = decode_cursor(request.args["cursor"], sort)
+            except InvalidCursor:
+                api.abort(400, "Cursor inválido para esta ordenação")
+
+        column, descending = ATTENDEE_SORTS[sort]
+        query = Attendee.query.filter(Attendee.event_id == event_id)
+        if statuses:
+            query = query.filter(Attendee.status.in_(statuses))
+        search = request.args.get("q", "").strip()
+        if search:
+            digits = re.sub(r"[\s()+-]", "", search)
+            if digits.isdigit():
+                query = query.filter(Attendee.whatsapp_number.startswith(digits, autoescape=True))
+            else:
+                query = query.filter(Attendee.name.istartswith(search, autoescape=True))
+        # Lê do banco só as colunas pedidas (mais as da ordenação)
+        loaded = {field for field in fields if field != "id"} | {column.key}
+        query = query.options(load_only(*(getattr(Attendee, name) for name in loaded)))
+
+        response = {}
+        keyset = (column, Attendee.id)
+        if paginate:
+            attendees, last_key = keyset_page(query, keyset, descending, limit, after)
+            response["pagination"] = {
+                "limit": limit,
+                "sort": sort,
+                "next_cursor": encode_cursor(sort, last_key) if last_key else None,
+            }
+        else:
+            attendees = query.order_by(*keyset_order(keyset, descending)).all()
+
+        response["attendees"] = [serialize_attendee(attendee, fields) for attendee in attendees]
+        return response, 200
+
+
+@events_ns.route("/<int:event_id>/attendees/changes")
+class AttendeeChanges(Resource):
+    @events_ns.doc(
+        params={
+            "since": "watermark da resposta anterior (se omitido, retorna todos os convidados)",
+            "limit": f"Alterações por resposta (máximo {SYNC_MAX_LIMIT})",
+        }
+    )
     @events_ns.response(200, "Sucesso")
+    @events_ns.response(400, "Parâmetros inválidos")
     @events_ns.response(401, "Não autenticado")
     @events_ns.response(403, "Não autorizado")
     @events_ns.response(404, "Evento não encontrado")
+    @events_ns.response(410, "Watermark expirado: baixe a lista completa")
+    @query_budget(3)
     def get(self, event_id):
-        """Obter todos os convidados de um evento (apenas anfitrião)"""
+        """Convidados criados, alterados ou removidos desde o último watermark (apenas anfitrião)"""
         if "host_id" not in session:
             api.abort(401, "Faça login para ver os convidados")
 
@@ -514,22 +1121,61 @@ class EventAttendees(Resource):
         if event.host_id != session["host_id"]:
             api.abort(403, "Você não tem permissão para acessar este evento")
 
-        attendees = Attendee.query.filter_by(event_id=event_id).all()
+        limit = request.args.get("limit", SYNC_DEFAULT_LIMIT, type=int)
+        if not 1 <= limit <= SYNC_MAX_LIMIT:
+            api.abort(400, f"limit deve estar entre 1 e {SYNC_MAX_LIMIT}")
+
+        now = datetime.utcnow()
+        since_time = since_id = None
+        if request.args.get("since"):
+            try:
+                since_time, since_id = decode_cursor(request.args["since"], "sync")
+            except (InvalidCursor, ValueError):
+                api.abort(400, "Watermark inválido")
+            if not isinstance(since_time, datetime):
+                api.abort(400, "Watermark inválido")
+            if since_time < now - timedelta(days=TOMBSTONE_RETENTION_DAYS):
+                # Remoções mais antigas que isso já foram apagadas
+                api.abort(410, "Watermark expirado. Baixe a lista completa de convidados")
+
+        # Alterações dos últimos segundos ficam para a próxima consulta: uma
+        # transação que já gravou last_modified pode ainda não ter feito commit.
+        # Limite conhecido: o que ficar aberto mais que SYNC_SETTLE_SECONDS
+        # entre gravar e fazer commit é pulado (a importação regrava no commit)
+        upper = now - timedelta(seconds=SYNC_SETTLE_SECONDS)
+        query = Attendee.query.filter(
+            Attendee.event_id == event_id, Attendee.last_modified <= upper
+        )
+        if since_time is not None and since_id is None:
+            query = query.filter(Attendee.last_modified > since_time)
+        changed, last_key = keyset_page(
+            query,
+            (Attendee.last_modified, Attendee.id),
+            False,
+            limit,
+            [since_time, since_id] if since_id is not None else None,
+        )
+        # Página cheia: continua do último convidado; senão, até o limite
+        if last_key:
+            watermark, deleted_until = last_key, last_key[0]
+        else:
+            watermark, deleted_until = [upper, None], upper
+
+        tombstones = AttendeeTombstone.query.filter(
+            AttendeeTombstone.event_id == event_id,
+            AttendeeTombstone.deleted_at <= deleted_until,
+        )
+        if since_time is not None:
+            tombstones = tombstones.filter(AttendeeTombstone.deleted_at > since_time)
 
         return {
-            "attendees": [
-                {
-                    "id": attendee.id,
-                    "name": attendee.name,
-                    "whatsapp_number": attendee.whatsapp_number,
-                    "num_adults": attendee.num_adults,
-                    "num_children": attendee.num_children,
-                    "comments": attendee.comments,
-                    "status": attendee.status,
-                    "rsvp_date": attendee.rsvp_date.isoformat(),
-                }
-                for attendee in attendees
-            ]
+            "attendees": [serialize_attendee(attendee, SYNC_FIELDS) for attendee in changed],
+            "deleted": [
+                {"id": tombstone.attendee_id, "deleted_at": tombstone.deleted_at.isoformat()}
+                for tombstone in tombstones.order_by(AttendeeTombstone.deleted_at)
+            ],
+            "watermark": encode_cursor("sync", watermark),
+            "has_more": last_key is not None,
         }, 200
 
 
@@ -540,6 +1186,7 @@ class ManageAttendee(Resource):
     @events_ns.response(401, "Não autenticado")
     @events_ns.response(403, "Não autorizado")
     @events_ns.response(404, "Não encontrado")
+    @query_budget(12)
     def put(self, event_id, attendee_id):
         """Atualizar convidado (apenas anfitrião)"""
         if "host_id" not in session:
@@ -554,6 +1201,8 @@ class ManageAttendee(Resource):
             api.abort(404, "Convidado não encontrado")
 
         data = request.get_json()
+        # Relê com lock: a lista de espera pode ter promovido o convidado
+        before = attendee_snapshot(lock_attendee(attendee))
         if "name" in data:
             attendee.name = data["name"]
         if "num_adults" in data:
@@ -563,13 +1212,27 @@ class ManageAttendee(Resource):
         if "comments" in data:
             attendee.comments = data["comments"]
 
+        # O anfitrião pode passar do limite; se diminuir, libera vagas
+        after = attendee_snapshot(attendee)
+        apply_attendee_change(event_id, before, after)
+        notifications, live_updates = [], []
+        if (
+            event.max_guests is not None
+            and before[0] == "confirmed"
+            and sum(after[1:]) < sum(before[1:])
+        ):
+            notifications = promote_and_notify(event, live_updates)
         db.session.commit()
+        for notification in notifications:
+            deliver_after_commit(notification)
+        publish_live(live_updates)
         return {"message": "Attendee updated successfully"}, 200
 
     @events_ns.response(200, "Convidado deletado")
     @events_ns.response(401, "Não autenticado")
     @events_ns.response(403, "Não autorizado")
     @events_ns.response(404, "Não encontrado")
+    @query_budget(13)
     def delete(self, event_id, attendee_id):
         """Deletar convidado (apenas anfitrião)"""
         if "host_id" not in session:
@@ -583,14 +1246,101 @@ class ManageAttendee(Resource):
         if not attendee or attendee.event_id != event_id:
             api.abort(404, "Convidado não encontrado")
 
+        before = attendee_snapshot(lock_attendee(attendee))
+        apply_attendee_change(event_id, before, None)
+        db.session.add(AttendeeTombstone(event_id=event_id, attendee_id=attendee.id))
         db.session.delete(attendee)
+        notifications, live_updates = [], []
+        if event.max_guests is not None and before[0] == "confirmed":
+            notifications = promote_and_notify(event, live_updates)
         db.session.commit()
+        for notification in notifications:
+            deliver_after_commit(notification)
+        publish_live(live_updates)
         return {"message": "Attendee deleted successfully"}, 200
 
 
+@events_ns.route("/<int:event_id>/import")
+class ImportAttendees(Resource):
+    @events_ns.doc(
+        params={
+            "on_conflict": "Convidado já existente (mesmo WhatsApp): update (padrão) ou skip",
+        }
+    )
+    @events_ns.response(200, "Relatório da importação")
+    @events_ns.response(400, "Arquivo inválido")
+    @events_ns.response(401, "Não autenticado")
+    @events_ns.response(403, "Não autorizado")
+    def post(self, event_id):
+        """Importar convidados em massa via CSV ou JSON (apenas anfitrião)"""
+        if "host_id" not in session:
+            api.abort(401, "Faça login para importar convidados")
+
+        event = Event.query.get(event_id)
+        if not event or event.host_id != session["host_id"]:
+            api.abort(403, "Você não tem permissão para importar convidados neste evento")
+
+        on_conflict = request.args.get("on_conflict", "update")
+        if on_conflict not in ("update", "skip"):
+            api.abort(400, "on_conflict inválido. Use update ou skip")
+
+        if request.is_json:
+            rows = iter_json_rows(request.get_json())
+        elif "file" in request.files:
+            rows = iter_csv_rows(request.files["file"].stream)
+        elif request.mimetype == "text/csv":
+            rows = iter_csv_rows(request.stream)
+        else:
+            api.abort(
+                400,
+                "Envie um JSON, um arquivo CSV no campo 'file' ou um corpo text/csv",
+            )
+
+        notifications, live_updates = [], []
+        try:
+            started = datetime.utcnow()
+            results = import_attendees(event, rows, on_conflict, now=started)
+            if event.max_guests is not None:
+                # Cancelamentos e reduções do arquivo podem liberar vagas
+                notifications = promote_and_notify(event, live_updates)
+            # A importação pode levar mais que SYNC_SETTLE_SECONDS: grava o
+            # horário do commit para a sincronização não pular estas linhas
+            stamp_commit_time(event.id, started)
+            db.session.commit()
+        except (ValueError, UnicodeDecodeError) as e:
+            db.session.rollback()
+            api.abort(400, f"Arquivo inválido: {e}")
+        except SQLAlchemyError:
+            db.session.rollback()
+            api.abort(500, "Erro ao importar convidados. Tente novamente")
+
+        for notification in notifications:
+            deliver_after_commit(notification)
+        publish_live(live_updates)
+
+        summary = {"created": 0, "updated": 0, "skipped": 0, "error": 0, "waitlisted": 0}
+        for result in results:
+            summary[result["status"]] += 1
+            if result.get("waitlisted"):
+                summary["waitlisted"] += 1
+
+        return {
+            "message": "Import finished",
+            "summary": summary,
+            "results": results,
+        }, 200
+
+
 @events_ns.route("/<int:event_id>/export-csv")
 class ExportAttendees(Resource):
+    @events_ns.doc(
+        params={
+            "status": f"Filtrar por status ({', '.join(ATTENDEE_STATUSES)})",
+            "gzip": "Comprimir a resposta com gzip (true/false)",
+        }
+    )
     @events_ns.response(200, "Arquivo CSV")
+    @events_ns.response(400, "Parâmetros inválidos")
     @events_ns.response(401, "Não autenticado")
     @events_ns.response(403, "Não autorizado")
     def get(self, event_id):
@@ -602,41 +1352,176 @@ class ExportAttendees(Resource):
         if not event or event.host_id != session["host_id"]:
             api.abort(403, "Você não tem permissão para exportar convidados deste evento")
 
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(
+        status = request.args.get("status")
+        if status and status not in ATTENDEE_STATUSES:
+            api.abort(400, f"Status inválido. Use {', '.join(ATTENDEE_STATUSES)}")
+
+        query = Attendee.query.filter_by(event_id=event_id)
+        if status:
+            query = query.filter_by(status=status)
+        # yield_per lê os convidados em lotes (cursor do lado do servidor)
+        query = query.order_by(Attendee.id).yield_per(EXPORT_BATCH_SIZE)
+
+        rows = (
             [
-                "Name",
-                "WhatsApp",
-                "Adults",
-                "Children",
-                "Comments",
-                "Status",
-                "RSVP Date",
+                attendee.name,
+                attendee.whatsapp_number,
+                attendee.num_adults,
+                attendee.num_children,
+                attendee.comments,
+                attendee.status,
+                attendee.rsvp_date.strftime("%Y-%m-%d %H:%M"),
             ]
+            for attendee in query
         )
+        header = [
+            "Name",
+            "WhatsApp",
+            "Adults",
+            "Children",
+            "Comments",
+            "Status",
+            "RSVP Date",
+        ]
+        body = encode_chunks(csv_chunks(header, rows))
+        headers = {
+            "Content-Disposition": f"attachment; filename=event_{event_id}_attendees.csv"
+        }
+        if wants_gzip():
+            body = gzip_chunks(body)
+            headers["Content-Encoding"] = "gzip"
+            headers["Vary"] = "Accept-Encoding"
 
-        for attendee in event.attendees:
-            writer.writerow(
-                [
-                    attendee.name,
-                    attendee.whatsapp_number,
-                    attendee.num_adults,
-                    attendee.num_children,
-                    attendee.comments,
-                    attendee.status,
-                    attendee.rsvp_date.strftime("%Y-%m-%d %H:%M"),
-                ]
-            )
-
-        output.seek(0)
         return Response(
-            output.getvalue(),
+            stream_with_context(body),
             mimetype="text/csv",
-            headers={
-                "Content-Disposition": f"attachment; filename=event_{event_id}_attendees.csv"
-            },
+            headers=headers,
+        )
+
+
+HOST_EXPORT_COLUMNS = [
+    "event_id",
+    "event_slug",
+    "event_title",
+    "event_date",
+    "attendee_id",
+    "name",
+    "whatsapp_number",
+    "num_adults",
+    "num_children",
+    "comments",
+    "status",
+    "rsvp_date",
+]
+HOST_EXPORT_CSV_HEADER = [
+    "Event ID",
+    "Event Slug",
+    "Event Title",
+    "Event Date",
+    "Attendee ID",
+    "Name",
+    "WhatsApp",
+    "Adults",
+    "Children",
+    "Comments",
+    "Status",
+    "RSVP Date",
+]
+HOST_EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+    "columnar": ("application/octet-stream", "vnhcol"),
+}
+
+
+@events_ns.route("/export")
+class ExportHostAttendees(Resource):
+    @events_ns.doc(
+        params={
+            "format": "Formato: csv (padrão), jsonl ou columnar",
+            "status": f"Filtrar por status ({', '.join(ATTENDEE_STATUSES)})",
+            "since": "Somente eventos a partir desta data (AAAA-MM-DD)",
+            "until": "Somente eventos até esta data (AAAA-MM-DD)",
+            "gzip": "Comprimir a resposta com gzip (true/false)",
+        }
+    )
+    @events_ns.response(200, "Arquivo de exportação")
+    @events_ns.response(400, "Parâmetros inválidos")
+    @events_ns.response(401, "Não autenticado")
+    def get(self):
+        """Exportar os convidados de todos os eventos do anfitrião"""
+        if "host_id" not in session:
+            api.abort(401, "Faça login para exportar a lista de convidados")
+
+        export_format = request.args.get("format", "csv")
+        if export_format not in HOST_EXPORT_FORMATS:
+            api.abort(400, "Formato inválido. Use csv, jsonl ou columnar")
+
+        status = request.args.get("status")
+        if status and status not in ATTENDEE_STATUSES:
+            api.abort(400, f"Status inválido. Use {', '.join(ATTENDEE_STATUSES)}")
+
+        try:
+            since = parse_date_arg("since")
+            until = parse_date_arg("until")
+        except ValueError:
+            api.abort(400, "Formato de data inválido. Use AAAA-MM-DD")
+
+        # Uma única consulta ordenada (join com events), lida em lotes
+        query = (
+            db.session.query(
+                Event.id,
+                Event.slug,
+                Event.title,
+                Event.event_date,
+                Attendee.id,
+                Attendee.name,
+                Attendee.whatsapp_number,
+                Attendee.num_adults,
+                Attendee.num_children,
+                Attendee.comments,
+                Attendee.status,
+                Attendee.rsvp_date,
+            )
+            .join(Attendee, Attendee.event_id == Event.id)
+            .filter(Event.host_id == session["host_id"])
+        )
+        if status:
+            query = query.filter(Attendee.status == status)
+        if since:
+            query = query.filter(Event.event_date >= since)
+        if until:
+            query = query.filter(Event.event_date <= until)
+        query = query.order_by(Event.event_date, Event.id, Attendee.id).yield_per(
+            EXPORT_BATCH_SIZE
+        )
+
+        rows = (
+            row[:3]
+            + (row[3].isoformat(),)
+            + row[4:11]
+            + (row[11].strftime("%Y-%m-%d %H:%M") if row[11] else None,)
+            for row in query
         )
+        if export_format == "csv":
+            body = encode_chunks(csv_chunks(HOST_EXPORT_CSV_HEADER, rows))
+        elif export_format == "jsonl":
+            body = encode_chunks(jsonl_chunks(HOST_EXPORT_COLUMNS, rows))
+        else:
+            body = columnar_chunks(HOST_EXPORT_COLUMNS, rows)
+
+        mimetype, extension = HOST_EXPORT_FORMATS[export_format]
+        headers = {
+            "Content-Disposition": (
+                f"attachment; filename=host_{session['host_id']}_attendees.{extension}"
+            )
+        }
+        if wants_gzip():
+            body = gzip_chunks(body)
+            headers["Content-Encoding"] = "gzip"
+            headers["Vary"] = "Accept-Encoding"
+
+        return Response(stream_with_context(body), mimetype=mimetype, headers=headers)
 
 
 @events_ns.route("/<int:event_id>")
@@ -646,6 +1531,8 @@ class EventManagement(Resource):
     @events_ns.response(401, "Não autenticado")
     @events_ns.response(403, "Não autorizado")
     @events_ns.response(404, "Evento não encontrado")
+    @events_ns.response(503, "Serviço de CEP indisponível e endereço não informado")
+    @query_budget(10)
     def put(self, event_id):
         """Atualizar evento (apenas anfitrião)"""
         if "host_id" not in session:
@@ -660,6 +1547,14 @@ class EventManagement(Resource):
             api.abort(403, "Você não tem permissão para editar este evento")
 
         data = request.get_json()
+        max_guests = parse_max_guests(data)
+        notifications, live_updates = [], []
+        address = None
+        if "address_cep" in data:
+            # O endereço atual do evento serve de reserva se o CEP não resolver
+            address_cep, _, address = resolve_cep(
+                data["address_cep"], data.get("address_full") or event.address_full
+            )
 
         try:
             # Atualizar campos básicos
@@ -684,7 +1579,14 @@ class EventManagement(Resource):
                     event.end_time = None
 
             if "address_cep" in data:
-                event.address_cep = data["address_cep"]
+                if (
+                    address is not None
+                    and not data.get("address_full")
+                    and address_cep != event.address_cep
+                ):
+                    # CEP novo sem endereço informado: usa o endereço do CEP
+                    event.address_full = format_address(address)
+                event.address_cep = address_cep
 
             if "address_full" in data:
                 event.address_full = data["address_full"]
@@ -695,12 +1597,24 @@ class EventManagement(Resource):
             if "allow_cancellations" in data:
                 event.allow_cancellations = data["allow_cancellations"]
 
+            if "max_guests" in data:
+                event.max_guests = max_guests
+                # Limite maior (ou removido): confirma quem couber da lista de espera
+                notifications = promote_and_notify(event, live_updates)
+
             db.session.commit()
+            event_page_cache.delete(event.slug)
+            for notification in notifications:
+                deliver_after_commit(notification)
+            publish_live(live_updates)
 
-            return {
+            response = {
                 "message": "Event updated successfully",
                 "event": {"id": event.id, "slug": event.slug, "title": event.title},
-            }, 200
+            }
+            if "address_cep" in data:
+                response["address"] = address
+            return response, 200
 
         except (ValueError, SQLAlchemyError):
             db.session.rollback()
@@ -710,6 +1624,7 @@ class EventManagement(Resource):
     @events_ns.response(401, "Não autenticado")
     @events_ns.response(403, "Não autorizado")
     @events_ns.response(404, "Evento não encontrado")
+    @query_budget(7)
     def delete(self, event_id):
         """Deletar evento (apenas anfitrião)"""
         if "host_id" not in session:
@@ -726,10 +1641,12 @@ class EventManagement(Resource):
         try:
             # Deletar todos os convidados primeiro (cascade deve lidar com isso, mas sendo explícito)
             Attendee.query.filter_by(event_id=event_id).delete()
+            AttendeeTombstone.query.filter_by(event_id=event_id).delete()
 
             # Deletar evento
             db.session.delete(event)
             db.session.commit()
+            event_page_cache.delete(event.slug)
 
             return {"message": "Event deleted successfully"}, 200
 
@@ -744,6 +1661,7 @@ class DuplicateEvent(Resource):
     @events_ns.response(401, "Não autenticado")
     @events_ns.response(403, "Não autorizado")
     @events_ns.response(404, "Evento não encontrado")
+    @query_budget(5)
     def post(self, event_id):
         """Duplicar um evento existente"""
         if "host_id" not in session:
@@ -759,9 +1677,15 @@ class DuplicateEvent(Resource):
 
         try:
             # Criar novo evento com os mesmos dados
+            title = f"{original_event.title} (Cópia)"
+            # A cópia segue o formato do link original
             new_event = Event(
                 host_id=session["host_id"],
-                title=f"{original_event.title} (Cópia)",
+                slug=allocate_slug(
+                    db.session.connection(),
+                    title if has_title_prefix(original_event.slug) else None,
+                ),
+                title=title,
                 description=original_event.description,
                 event_date=original_event.event_date,
                 start_time=original_event.start_time,
@@ -770,8 +1694,10 @@ class DuplicateEvent(Resource):
                 address_full=original_event.address_full,
                 allow_modifications=original_event.allow_modifications,
                 allow_cancellations=original_event.allow_cancellations,
+                max_guests=original_event.max_guests,
             )
 
+            create_event_stats(new_event)
             db.session.add(new_event)
             db.session.commit()
 
@@ -796,7 +1722,17 @@ class RSVPResource(Resource):
     @attendees_ns.response(201, "Confirmação realizada com sucesso")
     @attendees_ns.response(400, "Entrada inválida ou já confirmado")
     @attendees_ns.response(404, "Evento não encontrado")
+    @attendees_ns.response(422, "Idempotency-Key já usada com outros dados")
+    @attendees_ns.doc(
+        params={
+            "Idempotency-Key": {
+                "in": "header",
+                "description": "Chave única por envio; repetições recebem a mesma resposta",
+            }
+        }
+    )
     @limiter.limit("30 per minute")
+    @query_budget(7)
     def post(self):
         """Criar confirmação de presença para um evento"""
         data = request.get_json()
@@ -804,30 +1740,101 @@ class RSVPResource(Resource):
         if not all(field in data for field in required):
             api.abort(400, "Preencha todos os campos obrigatórios: nome, WhatsApp e número de adultos")
 
-        event = Event.query.filter_by(slug=data["event_slug"]).first()
+        # Repetição de um envio já concluído: responde sem tocar no banco
+        idempotency_key = request.headers.get("Idempotency-Key")
+        if idempotency_key is not None:
+            if not 0 < len(idempotency_key) <= MAX_IDEMPOTENCY_KEY_LENGTH:
+                api.abort(400, "Idempotency-Key inválida")
+            replay = stored_rsvp_reply(idempotency_key, data)
+            if replay is not None:
+                body, status = replay
+                return body, status, {"Idempotent-Replayed": "true"}
+
+        event, existing = find_event_attendee(
+            data["event_slug"], data["whatsapp_number"]
+        )
         if not event:
             api.abort(404, "Evento não encontrado. Verifique o link do convite")
 
-        existing = Attendee.query.filter_by(
-            event_id=event.id, whatsapp_number=data["whatsapp_number"]
-        ).first()
-        if existing:
+        now = datetime.utcnow()
+        values = {
+            "event_id": event.id,
+            "whatsapp_number": data["whatsapp_number"],
+            "name": data["name"],
+            "num_adults": data["num_adults"],
+            "num_children": data.get("num_children", 0),
+            "comments": data.get("comments", ""),
+            "status": "confirmed",
+            "rsvp_date": now,
+            "last_modified": now,
+        }
+        attendee_id = None
+        if not existing:
+            # Reserva as vagas antes do INSERT; sem vagas (ou com alguém já
+            # esperando), entra na lista de espera
+            seats = (values["status"], values["num_adults"], values["num_children"])
+            if not apply_attendee_change(
+                event.id, None, seats, event.max_guests, behind_waitlist=True
+            ):
+                values["status"] = "waitlisted"
+                values["waitlisted_at"] = now
+            # INSERT ... ON CONFLICT: dois envios simultâneos não geram IntegrityError
+            attendee_id = insert_attendee(values)
+        if attendee_id is None:
+            db.session.rollback()  # desfaz a reserva de vagas
+            if existing is None:
+                _, existing = find_event_attendee(
+                    data["event_slug"], data["whatsapp_number"]
+                )
+            if idempotency_key is not None:
+                # O envio com esta chave que gravou primeiro pode já ter respondido
+                replay = stored_rsvp_reply(idempotency_key, data)
+                if replay is not None:
+                    body, status = replay
+                    return body, status, {"Idempotent-Replayed": "true"}
+            # Outro envio com esta mesma chave (ex.: em outro worker) acabou de
+            # gravar este convidado; uma chave nova com os mesmos dados é um
+            # RSVP repetido
+            if (
+                idempotency_key is not None
+                and existing is not None
+                and idempotency_store.pending_id("rsvp", idempotency_key, data) == existing.id
+                and rsvp_matches(existing, values)
+            ):
+                body = {
+                    "message": (
+                        "Added to waitlist"
+                        if existing.status == "waitlisted"
+                        else "RSVP successful"
+                    ),
+                    "attendee_id": existing.id,
+                    "status": existing.status,
+                }
+                idempotency_store.save("rsvp", idempotency_key, data, body, 201)
+                return body, 201, {"Idempotent-Replayed": "true"}
             api.abort(400, "Você já confirmou presença neste evento")
 
-        attendee = Attendee(
-            event_id=event.id,
-            whatsapp_number=data["whatsapp_number"],
-            name=data["name"],
-            num_adults=data["num_adults"],
-            num_children=data.get("num_children", 0),
-            comments=data.get("comments", ""),
+        attendee = Attendee(id=attendee_id, **values)
+        if idempotency_key is not None:
+            # Antes do commit: um envio simultâneo com a mesma chave reconhece o registro
+            idempotency_store.mark_pending("rsvp", idempotency_key, data, attendee_id)
+        waitlisted = attendee.status == "waitlisted"
+        notification = enqueue_notification(
+            "waitlist" if waitlisted else "rsvp", event, attendee
         )
-        db.session.add(attendee)
+        live_updates = [live_update("rsvp", event, attendee)]
         db.session.commit()
+        deliver_after_commit(notification)
+        publish_live(live_updates)
 
-        send_rsvp_notification(event, attendee)
-
-        return {"message": "RSVP successful", "attendee_id": attendee.id}, 201
+        body = {
+            "message": "Added to waitlist" if waitlisted else "RSVP successful",
+            "attendee_id": attendee_id,
+            "status": attendee.status,
+        }
+        if idempotency_key is not None:
+            idempotency_store.save("rsvp", idempotency_key, data, body, 201)
+        return body, 201
 
 
 @attendees_ns.route("/find")
@@ -835,6 +1842,7 @@ class FindAttendee(Resource):
     @attendees_ns.expect(attendee_find_model)
     @attendees_ns.response(200, "Convidado encontrado")
     @attendees_ns.response(404, "Convidado não encontrado")
+    @query_budget(1)
     def post(self):
         """Buscar convidado por WhatsApp e slug do evento"""
         data = request.get_json()
@@ -845,16 +1853,11 @@ class FindAttendee(Resource):
         if not event_slug or not whatsapp_number:
             api.abort(400, "Link do evento e número de WhatsApp são obrigatórios")
 
-        # Buscar evento
-        event = Event.query.filter_by(slug=event_slug).first()
+        # Buscar evento e convidado em uma única consulta
+        event, attendee = find_event_attendee(event_slug, whatsapp_number)
         if not event:
             api.abort(404, "Evento não encontrado. Verifique o link")
 
-        # Buscar convidado
-        attendee = Attendee.query.filter_by(
-            event_id=event.id, whatsapp_number=whatsapp_number
-        ).first()
-
         if not attendee:
             api.abort(404, "Nenhuma confirmação encontrada para este WhatsApp. Verifique o número digitado")
 
@@ -883,6 +1886,8 @@ class ModifyRSVP(Resource):
     @attendees_ns.response(200, "Confirmação modificada")
     @attendees_ns.response(403, "Modificações não permitidas")
     @attendees_ns.response(404, "Confirmação não encontrada")
+    @attendees_ns.response(409, "Sem vagas para aumentar o número de convidados")
+    @query_budget(14)
     def put(self):
         """Modificar confirmação de presença existente"""
         data = request.get_json()
@@ -893,8 +1898,8 @@ class ModifyRSVP(Resource):
         if not event_slug or not whatsapp_number:
             api.abort(400, "Link do evento e número de WhatsApp são obrigatórios")
 
-        # Buscar evento
-        event = Event.query.filter_by(slug=event_slug).first()
+        # Buscar evento e convidado em uma única consulta
+        event, attendee = find_event_attendee(event_slug, whatsapp_number)
         if not event:
             api.abort(404, "Evento não encontrado")
 
@@ -902,14 +1907,12 @@ class ModifyRSVP(Resource):
         if not event.allow_modifications:
             api.abort(403, "O anfitrião não permitiu modificações para este evento")
 
-        # Buscar convidado
-        attendee = Attendee.query.filter_by(
-            event_id=event.id, whatsapp_number=whatsapp_number
-        ).first()
-
         if not attendee:
             api.abort(404, "Confirmação não encontrada. Verifique o número de WhatsApp")
 
+        # Relê com lock: a lista de espera pode ter promovido o convidado
+        before = attendee_snapshot(lock_attendee(attendee))
+
         # Atualizar campos
         if "name" in data:
             attendee.name = data["name"]
@@ -924,8 +1927,36 @@ class ModifyRSVP(Resource):
         if attendee.status == "cancelled":
             attendee.status = "confirmed"
 
+        if not apply_attendee_change(
+            event.id,
+            before,
+            attendee_snapshot(attendee),
+            event.max_guests,
+            # Reativação é um RSVP novo: não passa na frente da lista de espera
+            behind_waitlist=before[0] == "cancelled",
+        ):
+            if before[0] == "confirmed":
+                db.session.rollback()
+                api.abort(409, "Não há vagas suficientes para aumentar o número de convidados")
+            # Reativação com o evento lotado: volta pelo fim da lista de espera
+            attendee.status = "waitlisted"
+            attendee.waitlisted_at = datetime.utcnow()
+            apply_attendee_change(event.id, before, attendee_snapshot(attendee))
+
+        notifications = [enqueue_notification("modification", event, attendee)]
+        live_updates = [live_update("modification", event, attendee)]
+        after = attendee_snapshot(attendee)
+        shrank = sum(after[1:]) < sum(before[1:])
+        if shrank and before[0] == after[0] == "confirmed" and event.max_guests is not None:
+            # Menos convidados nesta confirmação libera vagas
+            notifications += promote_and_notify(event, live_updates)
+        elif shrank and before[0] == after[0] == "waitlisted":
+            # O grupo menor pode caber agora (promovido se estiver no início da fila)
+            notifications += promote_and_notify(event, live_updates)
         db.session.commit()
-        send_modification_notification(event, attendee)
+        for notification in notifications:
+            deliver_after_commit(notification)
+        publish_live(live_updates)
 
         return {
             "message": "RSVP updated successfully",
@@ -946,6 +1977,7 @@ class CancelRSVP(Resource):
     @attendees_ns.response(200, "Confirmação cancelada")
     @attendees_ns.response(403, "Cancelamentos não permitidos")
     @attendees_ns.response(404, "Confirmação não encontrada")
+    @query_budget(13)
     def post(self):
         """Cancelar confirmação de presença existente"""
         data = request.get_json()
@@ -956,8 +1988,8 @@ class CancelRSVP(Resource):
         if not event_slug or not whatsapp_number:
             api.abort(400, "Link do evento e número de WhatsApp são obrigatórios")
 
-        # Buscar evento
-        event = Event.query.filter_by(slug=event_slug).first()
+        # Buscar evento e convidado em uma única consulta
+        event, attendee = find_event_attendee(event_slug, whatsapp_number)
         if not event:
             api.abort(404, "Evento não encontrado")
 
@@ -965,22 +1997,105 @@ class CancelRSVP(Resource):
         if not event.allow_cancellations:
             api.abort(403, "O anfitrião não permitiu cancelamentos para este evento")
 
-        # Buscar convidado
-        attendee = Attendee.query.filter_by(
-            event_id=event.id, whatsapp_number=whatsapp_number
-        ).first()
-
         if not attendee:
             api.abort(404, "Confirmação não encontrada. Verifique o número de WhatsApp")
 
         # Cancelar RSVP
+        before = attendee_snapshot(lock_attendee(attendee))
         attendee.status = "cancelled"
+        apply_attendee_change(event.id, before, attendee_snapshot(attendee))
+        notifications = [
+            enqueue_notification("cancellation", event, attendee, data.get("reason", ""))
+        ]
+        live_updates = [live_update("cancellation", event, attendee)]
+        if event.max_guests is not None and before[0] == "confirmed":
+            # Vagas liberadas: confirma quem estiver na lista de espera
+            notifications += promote_and_notify(event, live_updates)
         db.session.commit()
-        send_cancellation_notification(event, attendee, data.get("reason", ""))
+        for notification in notifications:
+            deliver_after_commit(notification)
+        publish_live(live_updates)
 
         return {"message": "RSVP cancelled successfully"}, 200
 
 
+# ============= SYSTEM ROUTES =============
+@system_ns.route("/db-pool")
+class DatabasePool(Resource):
+    @system_ns.response(200, "Sucesso")
+    @system_ns.response(401, "Token de métricas inválido")
+    def get(self):
+        """Métricas do pool de conexões deste worker"""
+        require_metrics_token()
+        engine = db.engine
+        return {
+            "pid": os.getpid(),
+            "pool_class": type(engine.pool).__name__,
+            "metrics": engine.pool_metrics.snapshot(engine.pool),
+        }, 200
+
+
+@app.route("/metrics")
+@limiter.exempt
+def metrics():
+    """Métricas de todos os workers no formato do Prometheus"""
+    require_metrics_token()
+    return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+
+# ============= CLI =============
+@app.cli.command("rebuild-event-stats")
+def rebuild_event_stats_command():
+    """Recalcula a tabela event_stats a partir dos convidados"""
+    count = rebuild_event_stats()
+    db.session.commit()
+    print(f"event_stats recalculado para {count} evento(s)")
+
+
+@app.cli.command("prune-attendee-tombstones")
+def prune_attendee_tombstones_command():
+    """Apaga os registros de convidados removidos mais antigos que TOMBSTONE_RETENTION_DAYS"""
+    cutoff = datetime.utcnow() - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+    count = AttendeeTombstone.query.filter(AttendeeTombstone.deleted_at < cutoff).delete()
+    db.session.commit()
+    print(f"{count} registro(s) de convidados removidos apagado(s)")
+
+
+@app.cli.command("load-cep-dataset")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--encoding", default="utf-8-sig", show_default=True)
+def load_cep_dataset_command(path, encoding):
+    """Importa uma base offline de CEPs (CSV: cep, logradouro, bairro, localidade, uf)"""
+    with open(path, encoding=encoding, newline="") as stream:
+        try:
+            count = load_dataset(iter_dataset_rows(stream))
+        except ValueError as exc:
+            raise SystemExit(str(exc))
+    print(f"{count} CEP(s) importado(s)")
+
+
+@app.cli.command("notifications-worker")
+@click.option("--batch-size", default=50, show_default=True, help="Notificações por lote")
+@click.option("--interval", default=2.0, show_default=True, help="Segundos entre consultas")
+@click.option("--once", is_flag=True, help="Esvaziar a fila e sair")
+def notifications_worker_command(batch_size, interval, once):
+    """Entrega as notificações pendentes da outbox"""
+    run_worker(batch_size=batch_size, poll_interval=interval, once=once)
+
+
+@app.cli.command("audit-query-plans")
+def audit_query_plans_command():
+    """Verifica via EXPLAIN que as consultas mais usadas não fazem seq scan"""
+    failures = 0
+    for name, (plan, full_scans) in audit_query_plans().items():
+        print(f"{'FALHA' if full_scans else 'OK'}  {name}")
+        for line in plan:
+            print(f"      {line}")
+        failures += bool(full_scans)
+    if failures:
+        raise SystemExit(f"{failures} consulta(s) com varredura sequencial")
+
+
 # Manter blueprints originais para compatibilidade retroativa
 # Blueprints removidos - todos os endpoints agora usam Flask-RESTX
 
@@ -996,5 +2111,5 @@ app.view_functions["root"] = redirect_root
 
 if __name__ == "__main__":
     with app.app_context():
-        db.create_all()
+        upgrade_schema(db.engine)
     app.run(debug=True, host='0.0.0.0', port=5000)
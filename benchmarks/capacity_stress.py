@@ -0,0 +1,213 @@
+# backend/benchmarks/capacity_stress.py
+"""
+Teste de carga da lotação de eventos (max_guests).
+
+Cria um evento com poucos lugares e dispara, de várias threads ao mesmo
+tempo, RSVPs novos, cancelamentos e modificações de convidados. No fim
+confere as invariantes:
+
+- adultos + crianças confirmados nunca passam de max_guests
+- a linha de event_stats bate com a contagem feita direto em attendees
+- nenhum convidado ficou na lista de espera com lugar sobrando para ele
+
+Sai com código 1 se alguma delas falhar.
+
+    python benchmarks/capacity_stress.py --max-guests 50 --concurrency 16
+    python benchmarks/capacity_stress.py --database-url postgresql://localhost/venha_stress
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import date, time as dtime, timedelta
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SLUG = "stress01"
+
+
+def seed(max_guests):
+    """Create the schema, one host and the capped event; returns the event id"""
+    from app import app, db
+    from migrations import upgrade
+    from models import Event, Host
+    from services.event_stats import rebuild_event_stats
+
+    with app.app_context():
+        upgrade(db.engine)
+        if db.session.query(Host.id).first() is not None:
+            raise SystemExit("O banco do teste precisa estar vazio")
+        host = Host(
+            email="stress@bench.venha.app",
+            whatsapp_number="5521000000000",
+            name="Anfitrião",
+            password_hash="-",
+        )
+        db.session.add(host)
+        db.session.flush()
+        event = Event(
+            host_id=host.id,
+            slug=SLUG,
+            title="Evento lotado",
+            event_date=date.today() + timedelta(days=30),
+            start_time=dtime(18),
+            address_full="Rua do Benchmark, 1",
+            max_guests=max_guests,
+        )
+        db.session.add(event)
+        db.session.flush()
+        rebuild_event_stats([event.id])
+        db.session.commit()
+        return event.id
+
+
+def guest_worker(app, worker, operations, rng, statuses, lock):
+    client = app.test_client()
+    mine = []
+    for _ in range(operations):
+        roll = rng.random()
+        if mine and roll < 0.2:
+            number = rng.choice(mine)
+            response = client.post(
+                "/api/attendees/cancel",
+                json={"event_slug": SLUG, "whatsapp_number": number},
+            )
+        elif mine and roll < 0.4:
+            number = rng.choice(mine)
+            response = client.put(
+                "/api/attendees/modify",
+                json={
+                    "event_slug": SLUG,
+                    "whatsapp_number": number,
+                    "num_adults": rng.randint(1, 3),
+                    "num_children": rng.randint(0, 1),
+                },
+            )
+        else:
+            number = f"57{worker:04d}{len(mine):06d}"
+            mine.append(number)
+            response = client.post(
+                "/api/attendees/rsvp",
+                json={
+                    "event_slug": SLUG,
+                    "whatsapp_number": number,
+                    "name": f"Convidado {number}",
+                    "num_adults": rng.randint(1, 3),
+                    "num_children": rng.randint(0, 1),
+                },
+            )
+        response.close()
+        with lock:
+            statuses[response.status_code] += 1
+
+
+def check(event_id):
+    """Return the list of broken invariants (empty when everything holds)"""
+    from app import app, db
+    from models import Attendee, Event, EventStats
+
+    problems = []
+    with app.app_context():
+        event = db.session.get(Event, event_id)
+        attendees = Attendee.query.filter_by(event_id=event_id).order_by(
+            Attendee.rsvp_date, Attendee.id
+        ).all()
+        confirmed = [a for a in attendees if a.status == "confirmed"]
+        seats = sum((a.num_adults or 0) + (a.num_children or 0) for a in confirmed)
+        if seats > event.max_guests:
+            problems.append(f"lotação estourada: {seats} lugares para {event.max_guests}")
+
+        stats = db.session.get(EventStats, event_id)
+        expected = (
+            len(confirmed),
+            sum(1 for a in attendees if a.status == "cancelled"),
+            sum(a.num_adults or 0 for a in confirmed),
+            sum(a.num_children or 0 for a in confirmed),
+        )
+        actual = (
+            stats.confirmed_count,
+            stats.cancelled_count,
+            stats.total_adults,
+            stats.total_children,
+        )
+        if actual != expected:
+            problems.append(f"event_stats divergente: {actual} != {expected} (recontagem)")
+
+        waiting = [a for a in attendees if a.status == "waitlisted"]
+        if waiting:
+            first = waiting[0]
+            party = (first.num_adults or 0) + (first.num_children or 0)
+            if seats + party <= event.max_guests:
+                problems.append(
+                    f"lista de espera parada: {party} lugar(es) cabem "
+                    f"({seats}/{event.max_guests} ocupados)"
+                )
+        summary = {
+            "lugares": f"{seats}/{event.max_guests}",
+            "confirmados": len(confirmed),
+            "em espera": len(waiting),
+            "cancelados": expected[1],
+        }
+    return problems, summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--database-url", help="Banco vazio (padrão: SQLite temporário)")
+    parser.add_argument("--max-guests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=12)
+    parser.add_argument("--operations", type=int, default=40, help="Operações por thread")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    database_url = args.database_url or "sqlite:///" + os.path.join(
+        tempfile.mkdtemp(prefix="venha-stress-"), "stress.db"
+    )
+    # Precisa estar no ambiente antes de importar o app
+    os.environ.update(
+        DATABASE_URL=database_url,
+        SECRET_KEY=os.getenv("SECRET_KEY", "stress"),
+        RATELIMIT_ENABLED="0",
+        NOTIFICATION_DELIVERY="worker",
+        QUERY_BUDGET_MODE="off",
+    )
+    sys.path.insert(0, BASE_DIR)
+
+    event_id = seed(args.max_guests)
+
+    from app import app
+
+    statuses = Counter()
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(
+            target=guest_worker,
+            args=(app, worker, args.operations, random.Random(args.seed + worker), statuses, lock),
+        )
+        for worker in range(args.concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    problems, summary = check(event_id)
+    print(f"{sum(statuses.values())} operação(ões) em {elapsed:.1f}s")
+    print("status HTTP:", dict(sorted(statuses.items())))
+    print(", ".join(f"{name}: {value}" for name, value in summary.items()))
+    if statuses.get(500):
+        problems.append(f"{statuses[500]} resposta(s) 500")
+    for problem in problems:
+        print("FALHA:", problem)
+    if problems:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+# backend/benchmarks/cep_resolver.py
+"""
+Verificação do resolvedor de CEPs contra um ViaCEP falso (fake_upstreams.py).
+
+Cenários:
+
+- consultas simultâneas do mesmo CEP frio viram uma única chamada ao upstream
+- consultas repetidas saem do LRU em menos de 1 ms (mediana)
+- com o LRU vazio, a tabela cep_addresses responde sem chamar o upstream
+- CEP inexistente fica em cache (cache negativo)
+- com o upstream fora do ar: respostas antigas continuam valendo e a criação
+  de eventos com endereço informado não falha
+- a base offline importada responde sem nenhuma chamada ao upstream
+
+Sai com código 1 se algum cenário falhar.
+
+    python benchmarks/cep_resolver.py --concurrency 32
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BASE_DIR))
+sys.path.insert(0, BASE_DIR)
+
+from fake_upstreams import FakeUpstream  # noqa: E402
+
+CEP = "22040020"
+OTHER_CEP = "01310100"
+UNKNOWN_CEP = "99999999"
+
+
+class Checks:
+    def __init__(self):
+        self.failures = []
+
+    def expect(self, condition, description):
+        print(f"{'OK   ' if condition else 'FALHA'}  {description}")
+        if not condition:
+            self.failures.append(description)
+
+
+def concurrent_lookups(app, cep, concurrency):
+    """Resolve the same CEP from many threads at once; returns the results"""
+    from services.cep import lookup
+
+    barrier = threading.Barrier(concurrency)
+    results = [None] * concurrency
+
+    def worker(index):
+        with app.app_context():
+            barrier.wait()
+            results[index] = lookup(cep)
+            from extensions import db
+
+            db.session.commit()
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--lookups", type=int, default=20000, help="Consultas no teste do LRU")
+    parser.add_argument("--upstream-delay", type=float, default=0.3)
+    args = parser.parse_args()
+
+    upstream = FakeUpstream().start()
+    directory = tempfile.mkdtemp(prefix="venha-cep-")
+    # Precisa estar no ambiente antes de importar o app
+    os.environ.update(
+        DATABASE_URL="sqlite:///" + os.path.join(directory, "cep.db"),
+        SECRET_KEY=os.getenv("SECRET_KEY", "cep"),
+        RATELIMIT_ENABLED="0",
+        QUERY_BUDGET_MODE="raise",
+        CEP_UPSTREAM_URL=upstream.url + "/ws/{cep}/json/",
+        CEP_UPSTREAM_TIMEOUT_SECONDS="1",
+    )
+
+    from app import app
+    from extensions import db
+    from migrations import upgrade
+    from models import CepAddress
+    from services import cep as resolver
+
+    with app.app_context():
+        upgrade(db.engine, log=lambda *a: None)
+
+    checks = Checks()
+
+    # 1. Coalescência
+    upstream.delay = args.upstream_delay
+    results = concurrent_lookups(app, CEP, args.concurrency)
+    upstream.delay = 0
+    checks.expect(
+        all(result and result["city"] == "Rio de Janeiro" for result in results),
+        f"{args.concurrency} consultas simultâneas resolvidas",
+    )
+    checks.expect(
+        upstream.total_hits("/ws/") == 1,
+        f"uma chamada ao upstream para {args.concurrency} consultas simultâneas "
+        f"({upstream.total_hits('/ws/')})",
+    )
+
+    # 2. LRU
+    with app.app_context():
+        timings = []
+        for _ in range(args.lookups):
+            started = time.perf_counter()
+            resolver.lookup(CEP)
+            timings.append(time.perf_counter() - started)
+    median_ms = statistics.median(timings) * 1000
+    checks.expect(median_ms < 1, f"mediana de {median_ms:.4f} ms por consulta no LRU")
+
+    # 3. Tabela persistente
+    resolver.memory.clear()
+    hits = upstream.total_hits("/ws/")
+    with app.app_context():
+        address = resolver.lookup(CEP)
+    checks.expect(
+        address is not None and upstream.total_hits("/ws/") == hits,
+        "LRU vazio: resposta da tabela cep_addresses sem chamar o upstream",
+    )
+
+    client = app.test_client()
+    client.post(
+        "/api/auth/signup",
+        json={"email": "cep@bench.venha.app", "password": "cep", "name": "C", "whatsapp_number": "1"},
+    )
+
+    # 4. Cache negativo
+    first = client.get(f"/api/events/cep/{UNKNOWN_CEP}")
+    hits = upstream.total_hits("/ws/")
+    second = client.get(f"/api/events/cep/{UNKNOWN_CEP}")
+    checks.expect(
+        first.status_code == second.status_code == 404 and upstream.total_hits("/ws/") == hits,
+        "CEP inexistente: 404 e nenhuma chamada repetida ao upstream",
+    )
+
+    # 5. Upstream fora do ar
+    upstream.fail = True
+    response = client.post(
+        "/api/events/create",
+        json={"title": "Festa", "event_date": "2030-01-01", "start_time": "18:00", "address_cep": CEP},
+    )
+    checks.expect(
+        response.status_code == 201
+        and response.json["event"]["address_full"].startswith("Avenida Atlântica"),
+        "upstream fora do ar: evento criado com endereço do cache",
+    )
+    response = client.post(
+        "/api/events/create",
+        json={
+            "title": "Festa",
+            "event_date": "2030-01-01",
+            "start_time": "18:00",
+            "address_cep": OTHER_CEP,
+            "address_full": "Av. Paulista, 1000",
+        },
+    )
+    checks.expect(
+        response.status_code == 201 and response.json["address"] is None,
+        "upstream fora do ar: CEP desconhecido com endereço informado não bloqueia o evento",
+    )
+    response = client.post(
+        "/api/events/create",
+        json={"title": "Festa", "event_date": "2030-01-01", "start_time": "18:00", "address_cep": OTHER_CEP},
+    )
+    checks.expect(response.status_code == 503, "upstream fora do ar e sem endereço: 503")
+
+    with app.app_context():
+        row = db.session.get(CepAddress, CEP)
+        row.fetched_at = datetime.utcnow() - timedelta(days=resolver.REFRESH_DAYS + 1)
+        db.session.commit()
+    resolver.memory.clear()
+    resolver.upstream.reset()
+    response = client.get(f"/api/events/cep/{CEP}")
+    checks.expect(
+        response.status_code == 200 and response.json["address"]["state"] == "RJ",
+        "upstream fora do ar: linha vencida servida em vez de erro",
+    )
+    started = time.perf_counter()
+    resolver.memory.clear()
+    client.get(f"/api/events/cep/{OTHER_CEP}")
+    checks.expect(
+        time.perf_counter() - started < 0.5,
+        "depois de uma falha, consultas não esperam pelo upstream (backoff)",
+    )
+    upstream.fail = False
+    resolver.upstream.reset()
+
+    # 6. Base offline
+    dataset = io.StringIO()
+    dataset.write("cep,logradouro,bairro,localidade,uf\n")
+    for number in range(2000):
+        dataset.write(f"{40000000 + number:08d},Rua {number},Centro,Salvador,BA\n")
+    dataset.seek(0)
+    hits = upstream.total_hits("/ws/")
+    with app.app_context():
+        count = resolver.load_dataset(resolver.iter_dataset_rows(dataset))
+        found = [resolver.lookup(f"{40000000 + number:08d}") for number in range(0, 2000, 97)]
+    checks.expect(
+        count == 2000
+        and all(address and address["city"] == "Salvador" for address in found)
+        and upstream.total_hits("/ws/") == hits,
+        "base offline: 2000 CEPs importados e consultados sem chamar o upstream",
+    )
+
+    upstream.stop()
+    if checks.failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# backend/benchmarks/fake_upstreams.py
+"""
+Imitação local das APIs externas, para testar o backend sem rede.
+
+    GET /ws/<cep>/json/        formato do ViaCEP ({"erro": true} para CEP desconhecido)
+    GET /v1/forecast.json      formato da WeatherAPI (?q=<local>&dt=AAAA-MM-DD;
+                               400 para locais em UNKNOWN_LOCATIONS)
+
+Cada caminho tem um contador de chamadas, e dá para simular lentidão
+(delay) ou queda (fail: responde 500) a qualquer momento:
+
+    upstream = FakeUpstream().start()
+    os.environ["CEP_UPSTREAM_URL"] = upstream.url + "/ws/{cep}/json/"
+    os.environ["WEATHER_API_URL"] = upstream.url + "/v1/forecast.json"
+    upstream.delay = 0.5
+    upstream.fail = True
+
+Também roda sozinho (python benchmarks/fake_upstreams.py --port 8765).
+"""
+import argparse
+import json
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+CEPS = {
+    "22040020": {
+        "logradouro": "Avenida Atlântica",
+        "bairro": "Copacabana",
+        "localidade": "Rio de Janeiro",
+        "uf": "RJ",
+    },
+    "01310100": {
+        "logradouro": "Avenida Paulista",
+        "bairro": "Bela Vista",
+        "localidade": "São Paulo",
+        "uf": "SP",
+    },
+    "70040010": {
+        "logradouro": "Esplanada dos Ministérios",
+        "bairro": "Zona Cívico-Administrativa",
+        "localidade": "Brasília",
+        "uf": "DF",
+    },
+}
+
+UNKNOWN_LOCATIONS = {"lugar nenhum"}
+
+_CEP_PATH = re.compile(r"^/ws/(\d{8})/json/?$")
+
+
+class FakeUpstream:
+    """Threaded HTTP server with per-path hit counters"""
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.delay = 0.0
+        self.fail = False
+        self.hits = Counter()
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def total_hits(self, prefix=""):
+        with self._lock:
+            return sum(count for path, count in self.hits.items() if path.startswith(prefix))
+
+    def route(self, path, params):
+        """(status, body) for a GET path and its query parameters"""
+        match = _CEP_PATH.match(path)
+        if match:
+            cep = match.group(1)
+            if cep not in CEPS:
+                return 200, {"erro": True}
+            return 200, dict(CEPS[cep], cep=f"{cep[:5]}-{cep[5:]}")
+        if path == "/v1/forecast.json":
+            return self.forecast(params.get("q", [""])[0], params.get("dt", [""])[0])
+        return 404, {"error": "not found"}
+
+    def forecast(self, location, day):
+        if location.strip().lower() in UNKNOWN_LOCATIONS:
+            return 400, {"error": {"code": 1006, "message": "No matching location found."}}
+        # Valores estáveis por (local, data), para comparar respostas
+        seed = zlib.crc32(f"{location}|{day}".encode("utf-8"))
+        return 200, {
+            "location": {"name": location.split(",")[0], "country": "Brazil"},
+            "forecast": {
+                "forecastday": [
+                    {
+                        "date": day,
+                        "day": {
+                            "maxtemp_c": 25 + seed % 10,
+                            "mintemp_c": 15 + seed % 8,
+                            "daily_chance_of_rain": seed % 100,
+                            "condition": {
+                                "text": "Parcialmente nublado",
+                                "icon": "//cdn.weatherapi.com/weather/64x64/day/116.png",
+                            },
+                        },
+                    }
+                ]
+            },
+        }
+
+    def _handler(self):
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path, _, query = self.path.partition("?")
+                with upstream._lock:
+                    upstream.hits[path] += 1
+                if upstream.delay:
+                    time.sleep(upstream.delay)
+                if upstream.fail:
+                    status, body = 500, {"error": "fora do ar"}
+                else:
+                    status, body = upstream.route(path, parse_qs(query))
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="Segundos por resposta")
+    args = parser.parse_args()
+    upstream = FakeUpstream(port=args.port)
+    upstream.delay = args.delay
+    print(f"Ouvindo em {upstream.url} (Ctrl+C para sair)")
+    try:
+        upstream.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,511 @@
+# backend/benchmarks/rsvp_flows.py
+"""
+Benchmark dos fluxos de convite e RSVP.
+
+Popula um banco (SQLite temporário ou um PostgreSQL local vazio) com
+anfitriões, eventos e convidados e dispara uma mistura de operações
+realistas: visualização do convite, novos RSVPs, busca/modificação/
+cancelamento, painel do anfitrião e exportação CSV. Roda contra o app no
+próprio processo (test client do Flask) ou via HTTP contra o gunicorn, e grava
+vazão e percentis de latência em JSON para comparar execuções entre commits.
+
+    python benchmarks/rsvp_flows.py --target inprocess --duration 10
+    python benchmarks/rsvp_flows.py --target http --concurrency 16 \\
+        --compare benchmarks/results/<execução anterior>.json
+    python benchmarks/rsvp_flows.py --database-url postgresql://localhost/venha_bench
+
+Pesos da mistura (--mix), em porcentagem relativa:
+    invite_page=50,rsvp=12,find=10,modify=8,cancel=3,dashboard=12,export_csv=5
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, time as dtime, timedelta
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BASE_DIR, "benchmarks", "results")
+PASSWORD = "bench-password"
+
+DEFAULT_MIX = {
+    "invite_page": 50,
+    "rsvp": 12,
+    "find": 10,
+    "modify": 8,
+    "cancel": 3,
+    "dashboard": 12,
+    "export_csv": 5,
+}
+
+
+# ============= DADOS =============
+def host_email(host_index):
+    return f"host{host_index}@bench.venha.app"
+
+
+def guest_number(event_index, guest_index):
+    return f"55{event_index:06d}{guest_index:05d}"
+
+
+def seed(hosts, events_per_host, attendees_per_event, batch_size=5000):
+    """Create the schema and the dataset; returns the events as dicts"""
+    from sqlalchemy import insert
+
+    from app import app, db
+    from extensions import bcrypt
+    from migrations import upgrade
+    from models import Attendee, Event, Host
+    from services.event_stats import rebuild_event_stats
+
+    with app.app_context():
+        upgrade(db.engine)
+        if db.session.query(Host.id).first() is not None:
+            raise SystemExit("O banco do benchmark precisa estar vazio")
+
+        password_hash = bcrypt.generate_password_hash(PASSWORD, 4).decode("utf-8")
+        db.session.execute(
+            insert(Host),
+            [
+                {
+                    "email": host_email(h),
+                    "whatsapp_number": f"5521{h:09d}",
+                    "name": f"Anfitrião {h}",
+                    "password_hash": password_hash,
+                }
+                for h in range(hosts)
+            ],
+        )
+        host_ids = [
+            host_id for (host_id,) in db.session.query(Host.id).order_by(Host.id)
+        ]
+
+        event_date = date.today() + timedelta(days=30)
+        events = []
+        for index in range(hosts * events_per_host):
+            events.append(
+                {
+                    "host_id": host_ids[index // events_per_host],
+                    "slug": f"b{index:07d}",
+                    "title": f"Evento {index}",
+                    "event_date": event_date,
+                    "start_time": dtime(18),
+                    "address_full": "Rua do Benchmark, 1",
+                }
+            )
+        db.session.execute(insert(Event), events)
+        event_ids = dict(db.session.query(Event.slug, Event.id))
+
+        rows = []
+        now = datetime.utcnow()
+        for index, event in enumerate(events):
+            for guest in range(attendees_per_event):
+                rows.append(
+                    {
+                        "event_id": event_ids[event["slug"]],
+                        "whatsapp_number": guest_number(index, guest),
+                        "name": f"Convidado {guest}",
+                        "num_adults": 1 + guest % 3,
+                        "num_children": guest % 2,
+                        "status": "confirmed",
+                        "rsvp_date": now,
+                        "last_modified": now,
+                    }
+                )
+                if len(rows) >= batch_size:
+                    db.session.execute(insert(Attendee), rows)
+                    rows = []
+        if rows:
+            db.session.execute(insert(Attendee), rows)
+
+        rebuild_event_stats()
+        db.session.commit()
+
+    return [
+        {
+            "index": index,
+            "id": event_ids[event["slug"]],
+            "slug": event["slug"],
+            "host_index": index // events_per_host,
+        }
+        for index, event in enumerate(events)
+    ]
+
+
+# ============= CLIENTES =============
+class InProcessClient:
+    """Calls the Flask app directly through its test client"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, json=None):
+        response = self.client.open(path, method=method, json=json)
+        response.get_data()
+        response.close()
+        return response.status_code
+
+
+class HTTPClient:
+    """Calls a running server over HTTP (keep-alive session per thread)"""
+
+    def __init__(self, base_url):
+        from worker_modes import local_session
+
+        self.base_url = base_url
+        self.session = local_session()
+
+    def request(self, method, path, json=None):
+        response = self.session.request(method, self.base_url + path, json=json)
+        response.content  # lê o corpo inteiro, como um cliente real
+        return response.status_code
+
+
+# ============= OPERAÇÕES =============
+class Workload:
+    """Dataset shared by the virtual users"""
+
+    def __init__(self, events, attendees_per_event):
+        self.events = events
+        self.attendees_per_event = attendees_per_event
+        self.events_by_host = {}
+        for event in events:
+            self.events_by_host.setdefault(event["host_index"], []).append(event)
+        self.new_guests = itertools.count()
+
+    def existing_guest(self, rng):
+        event = rng.choice(self.events)
+        guest = rng.randrange(self.attendees_per_event)
+        return event["slug"], guest_number(event["index"], guest)
+
+
+def op_invite_page(client, workload, rng, host_index):
+    return client.request("GET", f"/api/events/{rng.choice(workload.events)['slug']}")
+
+
+def op_rsvp(client, workload, rng, host_index):
+    number = next(workload.new_guests)
+    return client.request(
+        "POST",
+        "/api/attendees/rsvp",
+        json={
+            "event_slug": rng.choice(workload.events)["slug"],
+            "whatsapp_number": f"56{number:011d}",
+            "name": f"Novo convidado {number}",
+            "num_adults": rng.randint(1, 4),
+            "num_children": rng.randint(0, 2),
+        },
+    )
+
+
+def op_find(client, workload, rng, host_index):
+    slug, number = workload.existing_guest(rng)
+    return client.request(
+        "POST", "/api/attendees/find", json={"event_slug": slug, "whatsapp_number": number}
+    )
+
+
+def op_modify(client, workload, rng, host_index):
+    slug, number = workload.existing_guest(rng)
+    return client.request(
+        "PUT",
+        "/api/attendees/modify",
+        json={"event_slug": slug, "whatsapp_number": number, "num_adults": rng.randint(1, 4)},
+    )
+
+
+def op_cancel(client, workload, rng, host_index):
+    slug, number = workload.existing_guest(rng)
+    return client.request(
+        "POST",
+        "/api/attendees/cancel",
+        json={"event_slug": slug, "whatsapp_number": number, "reason": "benchmark"},
+    )
+
+
+def op_dashboard(client, workload, rng, host_index):
+    return client.request("GET", "/api/events/my-events?page=1&per_page=20")
+
+
+def op_export_csv(client, workload, rng, host_index):
+    event = rng.choice(workload.events_by_host[host_index])
+    return client.request("GET", f"/api/events/{event['id']}/export-csv")
+
+
+OPERATIONS = {
+    "invite_page": op_invite_page,
+    "rsvp": op_rsvp,
+    "find": op_find,
+    "modify": op_modify,
+    "cancel": op_cancel,
+    "dashboard": op_dashboard,
+    "export_csv": op_export_csv,
+}
+
+
+# ============= EXECUÇÃO =============
+def run_load(make_client, workload, hosts, mix, concurrency, duration, warmup, seed_value):
+    """Run the mix from ``concurrency`` virtual users; returns {op: (latencies, errors)}"""
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    results = {name: ([], [0]) for name in names}
+    lock = threading.Lock()
+    clock = {}
+
+    def start_clock():
+        # Roda antes de liberar qualquer thread da barreira
+        now = time.perf_counter()
+        clock["measure_from"] = now + warmup
+        clock["end"] = now + warmup + duration
+
+    ready = threading.Barrier(concurrency + 1, action=start_clock)
+
+    def virtual_user(index):
+        rng = random.Random(seed_value + index)
+        host_index = index % hosts
+        try:
+            client = make_client()
+            status = client.request(
+                "POST",
+                "/api/auth/login",
+                json={"email": host_email(host_index), "password": PASSWORD},
+            )
+            if status != 200:
+                raise RuntimeError(f"Login do anfitrião {host_index} falhou ({status})")
+        except Exception:
+            ready.abort()
+            raise
+        latencies = {name: [] for name in names}
+        errors = dict.fromkeys(names, 0)
+        ready.wait()
+        while True:
+            name = rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            if started >= clock["end"]:
+                break
+            status = OPERATIONS[name](client, workload, rng, host_index)
+            if started < clock["measure_from"]:
+                continue
+            latencies[name].append((time.perf_counter() - started) * 1000)
+            if status >= 400:
+                errors[name] += 1
+        with lock:
+            for name in names:
+                results[name][0].extend(latencies[name])
+                results[name][1][0] += errors[name]
+
+    threads = [
+        threading.Thread(target=virtual_user, args=(index,), daemon=True)
+        for index in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    for thread in threads:
+        thread.join()
+    return {name: (latencies, errors[0]) for name, (latencies, errors) in results.items()}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return round(sorted_values[index], 3)
+
+
+def summarize(results, duration):
+    operations = {}
+    all_latencies = []
+    total_errors = 0
+    for name, (latencies, errors) in results.items():
+        values = sorted(latencies)
+        all_latencies.extend(values)
+        total_errors += errors
+        operations[name] = {
+            "requests": len(values),
+            "errors": errors,
+            "rps": round(len(values) / duration, 1),
+            "latency_ms": _latency_summary(values),
+        }
+    return {
+        "requests": len(all_latencies),
+        "errors": total_errors,
+        "rps": round(len(all_latencies) / duration, 1),
+        "latency_ms": _latency_summary(sorted(all_latencies)),
+    }, operations
+
+
+def _latency_summary(values):
+    return {
+        "mean": round(sum(values) / len(values), 3) if values else None,
+        "p50": percentile(values, 0.50),
+        "p90": percentile(values, 0.90),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "max": round(values[-1], 3) if values else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(report, baseline_path):
+    """Print throughput and p95 changes against a previous JSON report"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nComparação com {baseline['meta']['commit']} ({baseline_path}):")
+    print(f"{'operação':<14}{'rps':>10}{'Δ rps':>9}{'p95 ms':>10}{'Δ p95':>9}")
+    rows = [("total", report["totals"], baseline["totals"])] + [
+        (name, stats, baseline["operations"].get(name))
+        for name, stats in report["operations"].items()
+    ]
+    for name, current, previous in rows:
+        if not previous or not previous["rps"] or not previous["latency_ms"]["p95"]:
+            continue
+        p95 = current["latency_ms"]["p95"] or 0
+        print(
+            f"{name:<14}{current['rps']:>10}"
+            f"{(current['rps'] / previous['rps'] - 1) * 100:>+8.1f}%"
+            f"{p95:>10}{(p95 / previous['latency_ms']['p95'] - 1) * 100:>+8.1f}%"
+        )
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"operação desconhecida: {name}")
+        mix[name] = float(weight)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def start_server(env, port):
+    from worker_modes import wait_ready
+
+    server = subprocess.Popen(
+        ["gunicorn", "app:app"], cwd=BASE_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    wait_ready(f"http://127.0.0.1:{port}/api/auth/me")
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--target", choices=["inprocess", "http"], default="inprocess")
+    parser.add_argument("--url", help="Servidor já em execução (com --target http; não sobe o gunicorn)")
+    parser.add_argument("--database-url", help="Banco vazio (padrão: SQLite temporário)")
+    parser.add_argument("--hosts", type=int, default=20)
+    parser.add_argument("--events-per-host", type=int, default=5)
+    parser.add_argument("--attendees-per-event", type=int, default=200)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--warmup", type=float, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, help="WEB_CONCURRENCY do gunicorn (--target http)")
+    parser.add_argument("--port", type=int, default=5056)
+    parser.add_argument("--output", help="Arquivo JSON (padrão: benchmarks/results/)")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON de uma execução anterior")
+    args = parser.parse_args()
+
+    database_url = args.database_url or "sqlite:///" + os.path.join(
+        tempfile.mkdtemp(prefix="venha-bench-"), "bench.db"
+    )
+    # Precisa estar no ambiente antes de importar o app
+    os.environ.update(
+        DATABASE_URL=database_url,
+        SECRET_KEY=os.getenv("SECRET_KEY", "bench"),
+        RATELIMIT_ENABLED="0",
+        NOTIFICATION_DELIVERY="worker",
+        BCRYPT_LOG_ROUNDS="4",
+        QUERY_BUDGET_MODE="off",
+        GUNICORN_ACCESS_LOG="",
+        PORT=str(args.port),
+    )
+    if args.workers:
+        os.environ["WEB_CONCURRENCY"] = str(args.workers)
+    sys.path.insert(0, BASE_DIR)
+
+    started = time.perf_counter()
+    events = seed(args.hosts, args.events_per_host, args.attendees_per_event)
+    seed_seconds = time.perf_counter() - started
+    print(f"{len(events)} evento(s) populado(s) em {seed_seconds:.1f}s")
+    workload = Workload(events, args.attendees_per_event)
+
+    server = None
+    if args.target == "inprocess":
+        from app import app
+
+        def make_client():
+            return InProcessClient(app)
+    else:
+        base_url = args.url or f"http://127.0.0.1:{args.port}"
+        if not args.url:
+            server = start_server(dict(os.environ), args.port)
+
+        def make_client():
+            return HTTPClient(base_url)
+
+    try:
+        results = run_load(
+            make_client, workload, args.hosts, args.mix, args.concurrency,
+            args.duration, args.warmup, args.seed,
+        )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    totals, operations = summarize(results, args.duration)
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "target": args.target,
+            "database": database_url.split(":", 1)[0],
+            "dataset": {
+                "hosts": args.hosts,
+                "events_per_host": args.events_per_host,
+                "attendees_per_event": args.attendees_per_event,
+                "seed_seconds": round(seed_seconds, 2),
+            },
+            "mix": args.mix,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "seed": args.seed,
+        },
+        "totals": totals,
+        "operations": operations,
+    }
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{report['meta']['commit']}-{args.target}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(json.dumps({"totals": totals, "operations": operations}, indent=2))
+    print(f"Resultado salvo em {output}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
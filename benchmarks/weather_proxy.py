@@ -0,0 +1,222 @@
+# backend/benchmarks/weather_proxy.py
+"""
+Verificação do proxy de previsão do tempo contra uma WeatherAPI falsa
+(fake_upstreams.py).
+
+Vários convidados abrem ao mesmo tempo os convites de eventos que dividem
+local e data. Confere que:
+
+- as chamadas à WeatherAPI acompanham os pares (local, data) distintos, e
+  não o número de visualizações
+- eventos fora dos próximos 14 dias não chamam a WeatherAPI
+- local desconhecido também fica em cache
+- com a WeatherAPI fora do ar, a previsão vencida é servida (stale) e quem
+  não tem nada em cache recebe 503
+- quando a WeatherAPI volta, a previsão é atualizada
+
+Sai com código 1 se algum cenário falhar.
+
+    python benchmarks/weather_proxy.py --concurrency 32 --views 50
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BASE_DIR))
+sys.path.insert(0, BASE_DIR)
+
+from fake_upstreams import FakeUpstream  # noqa: E402
+
+FORECAST_PATH = "/v1/forecast.json"
+
+# (CEP, endereço, dias a partir de hoje): 10 eventos, 4 pares (local, data)
+EVENTS = [
+    ("22040-020", "", 3),
+    ("22040-020", "Av. Atlântica, 1702", 3),
+    ("22040-020", "", 3),
+    ("22040-020", "Av. Atlântica, 500", 3),
+    ("22040-020", "", 3),
+    ("01310-100", "", 5),
+    ("01310-100", "Av. Paulista, 1000", 5),
+    ("01310-100", "", 5),
+    ("", "Salvador", 2),
+    ("", "Salvador", 4),
+]
+DISTINCT_KEYS = 4
+
+
+class Checks:
+    def __init__(self):
+        self.failures = []
+
+    def expect(self, condition, description):
+        print(f"{'OK   ' if condition else 'FALHA'}  {description}")
+        if not condition:
+            self.failures.append(description)
+
+
+def create_event(client, cep, address, days):
+    data = {
+        "title": "Festa",
+        "event_date": (date.today() + timedelta(days=days)).isoformat(),
+        "start_time": "18:00",
+    }
+    if cep:
+        data["address_cep"] = cep
+    if address:
+        data["address_full"] = address
+    response = client.post("/api/events/create", json=data)
+    assert response.status_code == 201, response.json
+    return response.json["event"]["slug"]
+
+
+def guest_views(app, slugs, concurrency, views, seed):
+    """Open weather for random invites from many threads; returns (statuses, bodies)"""
+    statuses = Counter()
+    bodies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(concurrency)
+
+    def worker(index):
+        client = app.test_client()
+        rng = random.Random(seed + index)
+        barrier.wait()
+        for _ in range(views):
+            response = client.get(f"/api/events/{rng.choice(slugs)}/weather")
+            with lock:
+                statuses[response.status_code] += 1
+                bodies.append(response.get_json())
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return statuses, bodies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--views", type=int, default=25, help="Visualizações por thread")
+    parser.add_argument("--ttl", type=int, default=2, help="WEATHER_CACHE_TTL_SECONDS do teste")
+    parser.add_argument("--upstream-delay", type=float, default=0.2)
+    args = parser.parse_args()
+
+    upstream = FakeUpstream().start()
+    directory = tempfile.mkdtemp(prefix="venha-weather-")
+    # Precisa estar no ambiente antes de importar o app
+    os.environ.update(
+        DATABASE_URL="sqlite:///" + os.path.join(directory, "weather.db"),
+        SECRET_KEY=os.getenv("SECRET_KEY", "weather"),
+        RATELIMIT_ENABLED="0",
+        QUERY_BUDGET_MODE="raise",
+        CEP_UPSTREAM_URL=upstream.url + "/ws/{cep}/json/",
+        WEATHER_API_URL=upstream.url + FORECAST_PATH,
+        WEATHER_API_KEY="fake",
+        WEATHER_CACHE_URL=os.getenv("WEATHER_CACHE_URL", "memory://"),
+        WEATHER_CACHE_TTL_SECONDS=str(args.ttl),
+    )
+
+    from app import app
+    from extensions import db
+    from migrations import upgrade
+    from services import weather
+
+    with app.app_context():
+        upgrade(db.engine, log=lambda *a: None)
+
+    checks = Checks()
+    client = app.test_client()
+    client.post(
+        "/api/auth/signup",
+        json={"email": "tempo@bench.venha.app", "password": "tempo", "name": "T", "whatsapp_number": "1"},
+    )
+    slugs = [create_event(client, *event) for event in EVENTS]
+
+    # 1. Muitas visualizações, poucas chamadas
+    upstream.delay = args.upstream_delay
+    started = time.perf_counter()
+    statuses, bodies = guest_views(app, slugs, args.concurrency, args.views, seed=1)
+    elapsed = time.perf_counter() - started
+    upstream.delay = 0
+    calls = upstream.total_hits(FORECAST_PATH)
+    total = sum(statuses.values())
+    print(f"{total} visualização(ões) em {elapsed:.1f}s, {calls} chamada(s) à WeatherAPI")
+    checks.expect(
+        statuses == Counter({200: total}) and all(body["forecast"] for body in bodies),
+        "todas as visualizações com previsão",
+    )
+    checks.expect(
+        calls == DISTINCT_KEYS,
+        f"uma chamada por par (local, data): {calls} para {DISTINCT_KEYS}",
+    )
+
+    # 2. Fora da janela de previsão
+    far = create_event(client, "22040-020", "", 40)
+    response = client.get(f"/api/events/{far}/weather")
+    checks.expect(
+        response.status_code == 200
+        and response.json["forecast"] is None
+        and "available_from" in response.json
+        and upstream.total_hits(FORECAST_PATH) == calls,
+        "evento daqui a 40 dias: sem previsão e sem chamada",
+    )
+
+    # 3. Local desconhecido
+    nowhere = create_event(client, "", "Lugar nenhum", 1)
+    first = client.get(f"/api/events/{nowhere}/weather")
+    calls = upstream.total_hits(FORECAST_PATH)
+    second = client.get(f"/api/events/{nowhere}/weather")
+    checks.expect(
+        first.status_code == second.status_code == 200
+        and second.json["forecast"] is None
+        and upstream.total_hits(FORECAST_PATH) == calls,
+        "local desconhecido: forecast null, sem repetir a chamada",
+    )
+
+    # 4. WeatherAPI fora do ar com previsões vencidas
+    time.sleep(args.ttl + 0.2)
+    upstream.fail = True
+    calls = upstream.total_hits(FORECAST_PATH)
+    statuses, bodies = guest_views(app, slugs, args.concurrency, args.views, seed=2)
+    failed_calls = upstream.total_hits(FORECAST_PATH) - calls
+    checks.expect(
+        statuses == Counter({200: sum(statuses.values())})
+        and all(body["stale"] for body in bodies),
+        "WeatherAPI fora do ar: previsões vencidas servidas com stale: true",
+    )
+    checks.expect(
+        failed_calls <= DISTINCT_KEYS,
+        f"WeatherAPI fora do ar: {failed_calls} tentativa(s), sem insistir a cada visualização",
+    )
+    new_place = create_event(client, "", "Brasília", 6)
+    response = client.get(f"/api/events/{new_place}/weather")
+    checks.expect(response.status_code == 503, "WeatherAPI fora do ar e nada em cache: 503")
+
+    # 5. Recuperação
+    upstream.fail = False
+    weather.upstream.reset()
+    calls = upstream.total_hits(FORECAST_PATH)
+    statuses, bodies = guest_views(app, slugs, args.concurrency, args.views, seed=3)
+    checks.expect(
+        all(not body["stale"] for body in bodies)
+        and upstream.total_hits(FORECAST_PATH) - calls == DISTINCT_KEYS,
+        "WeatherAPI de volta: previsões atualizadas com uma chamada por par",
+    )
+
+    upstream.stop()
+    if checks.failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
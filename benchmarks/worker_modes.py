@@ -0,0 +1,168 @@
+# backend/benchmarks/worker_modes.py
+"""
+Compara a vazão de cada modelo de worker do gunicorn (gunicorn.conf.py).
+
+Sobe o gunicorn com um banco SQLite temporário para cada modo, cria um evento
+e dispara requisições concorrentes contra a página do convite
+(GET /api/events/<slug>) e o RSVP (POST /api/attendees/rsvp).
+
+    python benchmarks/worker_modes.py --modes sync gthread --concurrency 16 --duration 10
+"""
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed(env):
+    """Create a host and an event; returns the event slug"""
+    code = (
+        "from app import app, db\n"
+        "from models import Host, Event\n"
+        "from services.event_stats import create_event_stats\n"
+        "from datetime import date, time\n"
+        "app.app_context().push()\n"
+        "host = Host(email='bench@venha.app', whatsapp_number='1', name='Bench', password_hash='x')\n"
+        "event = Event(host=host, title='Benchmark', event_date=date.today(), start_time=time(18))\n"
+        "create_event_stats(event)\n"
+        "db.session.add(event); db.session.commit(); print(event.slug)\n"
+    )
+    subprocess.run(
+        [sys.executable, "-m", "migrations", "upgrade"], cwd=BASE_DIR, env=env, check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BASE_DIR, env=env, check=True,
+        capture_output=True, text=True,
+    )
+    return result.stdout.strip().splitlines()[-1]
+
+
+def local_session():
+    """HTTP session that ignores proxy settings from the environment"""
+    session = requests.Session()
+    session.trust_env = False
+    return session
+
+
+def wait_ready(url, timeout=30):
+    session = local_session()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            session.get(url, timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    raise RuntimeError("gunicorn não respondeu a tempo")
+
+
+def load(base_url, slug, scenario, concurrency, duration):
+    """Run ``scenario`` from ``concurrency`` threads; returns (requests, errors)"""
+    counter = itertools.count()
+    results = {"ok": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def run():
+        session = local_session()
+        ok = errors = 0
+        while time.monotonic() < deadline:
+            if scenario == "event_page":
+                response = session.get(f"{base_url}/api/events/{slug}")
+            else:
+                number = next(counter)
+                response = session.post(
+                    f"{base_url}/api/attendees/rsvp",
+                    json={
+                        "event_slug": slug,
+                        "whatsapp_number": f"55{number:011d}",
+                        "name": f"Convidado {number}",
+                        "num_adults": 1,
+                    },
+                )
+            if response.status_code < 400:
+                ok += 1
+            else:
+                errors += 1
+        with lock:
+            results["ok"] += ok
+            results["errors"] += errors
+
+    threads = [threading.Thread(target=run) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results["ok"], results["errors"]
+
+
+def bench_mode(mode, args):
+    tmpdir = tempfile.mkdtemp(prefix="venha-bench-")
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{tmpdir}/bench.db",
+        SECRET_KEY="bench",
+        RATELIMIT_ENABLED="0",
+        NOTIFICATION_DELIVERY="worker",
+        GUNICORN_WORKER_CLASS=mode,
+        GUNICORN_ACCESS_LOG="",
+        PORT=str(args.port),
+    )
+    if args.workers:
+        env["WEB_CONCURRENCY"] = str(args.workers)
+    slug = seed(env)
+    server = subprocess.Popen(
+        ["gunicorn", "app:app"], cwd=BASE_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_ready(f"{base_url}/api/events/{slug}")
+        report = {}
+        for scenario in ("event_page", "rsvp"):
+            ok, errors = load(base_url, slug, scenario, args.concurrency, args.duration)
+            report[scenario] = {
+                "requests": ok,
+                "errors": errors,
+                "rps": round(ok / args.duration, 1),
+            }
+        return report
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--modes", nargs="+", default=["sync", "gthread", "gevent"])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--workers", type=int, help="WEB_CONCURRENCY (padrão: derivado das CPUs)")
+    parser.add_argument("--port", type=int, default=5055)
+    args = parser.parse_args()
+
+    results = {}
+    for mode in args.modes:
+        if mode == "gevent":
+            try:
+                import gevent  # noqa: F401
+            except ImportError:
+                print("gevent não instalado; pulando modo gevent")
+                continue
+        results[mode] = bench_mode(mode, args)
+        print(mode, json.dumps(results[mode]))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+# backend/config.py
+"""
+Configuração compartilhada entre a aplicação, o worker e as migrações.
+"""
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INSTANCE_DIR = os.path.join(BASE_DIR, "instance")
+
+
+def get_database_url(env_var="DATABASE_URL"):
+    """URL do banco a partir de DATABASE_URL (suporta SQLite e PostgreSQL)"""
+    database_url = os.getenv(env_var) or os.getenv(
+        "DATABASE_URL", "sqlite:///invitations.db"
+    )
+    # Railway usa postgres:// mas SQLAlchemy precisa de postgresql://
+    if database_url.startswith("postgres://"):
+        database_url = database_url.replace("postgres://", "postgresql://", 1)
+
+    # Caminhos SQLite relativos ficam na pasta instance/, como o Flask-SQLAlchemy
+    # faz, para que app, worker e migrações usem o mesmo arquivo
+    url = make_url(database_url)
+    if (
+        url.drivername.startswith("sqlite")
+        and url.database
+        and url.database != ":memory:"
+        and not url.database.startswith("file:")
+        and not os.path.isabs(url.database)
+    ):
+        os.makedirs(INSTANCE_DIR, exist_ok=True)
+        url = url.set(database=os.path.join(INSTANCE_DIR, url.database))
+        database_url = url.render_as_string(hide_password=False)
+    return database_url
+
+
+def get_ratelimit_storage_uri():
+    """Backend do Flask-Limiter (RATELIMIT_STORAGE_URI).
+
+    Em produção o padrão é um arquivo SQLite compartilhado pelos workers do
+    gunicorn; em desenvolvimento, memória do processo.
+    """
+    default = "memory://"
+    if os.getenv("FLASK_ENV") == "production":
+        default = "sqlite:///" + os.path.join(INSTANCE_DIR, "ratelimit.db")
+    return os.getenv("RATELIMIT_STORAGE_URI", default)
+
+
+def get_metrics_storage_uri():
+    """Onde os processos somam suas métricas (METRICS_STORAGE_URI).
+
+    Mesmo critério do rate limiting: arquivo SQLite compartilhado pelos
+    workers em produção, memória do processo em desenvolvimento.
+    """
+    default = "memory://"
+    if os.getenv("FLASK_ENV") == "production":
+        default = "sqlite:///" + os.path.join(INSTANCE_DIR, "metrics.db")
+    return os.getenv("METRICS_STORAGE_URI", default)
+
+
+def get_event_cache_url():
+    """Cache da página pública do evento (EVENT_CACHE_URL).
+
+    A edição de um evento apaga a entrada do cache: em produção o padrão é um
+    arquivo SQLite compartilhado pelos workers, para que nenhum deles continue
+    servindo a versão antiga; em desenvolvimento, memória do processo.
+    """
+    default = "memory://"
+    if os.getenv("FLASK_ENV") == "production":
+        default = "sqlite:///" + os.path.join(INSTANCE_DIR, "cache.db")
+    return os.getenv("EVENT_CACHE_URL", default)
+
+
+def get_idempotency_cache_url():
+    """Respostas guardadas por Idempotency-Key (IDEMPOTENCY_CACHE_URL).
+
+    A repetição de um envio pode chegar a outro worker: em produção o padrão
+    é o mesmo arquivo SQLite compartilhado do cache de páginas (com outro
+    namespace); em desenvolvimento, memória do processo.
+    """
+    default = "memory://"
+    if os.getenv("FLASK_ENV") == "production":
+        default = "sqlite:///" + os.path.join(INSTANCE_DIR, "cache.db")
+    return os.getenv("IDEMPOTENCY_CACHE_URL", default)
+
+
+def get_live_broker_url():
+    """Broker do feed ao vivo entre workers (LIVE_BROKER_URL).
+
+    Em produção, LISTEN/NOTIFY quando o banco é PostgreSQL (funciona entre
+    réplicas) ou um arquivo SQLite compartilhado pelos workers do host; em
+    desenvolvimento, memória do processo.
+    """
+    default = "memory://"
+    if os.getenv("FLASK_ENV") == "production":
+        # LISTEN não funciona através do PgBouncer em modo transaction: usa
+        # a conexão direta, como as migrações
+        database_url = get_database_url(
+            "MIGRATIONS_DATABASE_URL" if os.getenv("DB_PGBOUNCER") == "1" else "DATABASE_URL"
+        )
+        if database_url.startswith("postgresql"):
+            default = database_url
+        else:
+            default = "sqlite:///" + os.path.join(INSTANCE_DIR, "live.db")
+    return os.getenv("LIVE_BROKER_URL", default)
+
+
+def get_weather_cache_url():
+    """Cache das previsões do tempo (WEATHER_CACHE_URL).
+
+    Em produção o padrão é um arquivo SQLite compartilhado pelos workers,
+    para que cada previsão seja buscada uma vez por host e não uma vez por
+    worker; em desenvolvimento, memória do processo.
+    """
+    default = "memory://"
+    if os.getenv("FLASK_ENV") == "production":
+        default = "sqlite:///" + os.path.join(INSTANCE_DIR, "weather.db")
+    return os.getenv("WEATHER_CACHE_URL", default)
+
+
+def _default_pool_size():
+    # Cada worker do gunicorn tem seu próprio pool: no modo gthread cada
+    # thread pode segurar uma conexão ao mesmo tempo
+    if os.getenv("GUNICORN_WORKER_CLASS", "gthread") == "gthread":
+        return int(os.getenv("GUNICORN_THREADS", "4"))
+    if os.getenv("GUNICORN_WORKER_CLASS") == "gevent":
+        return 10
+    return 2
+
+
+def get_engine_options(database_url):
+    """Opções do engine SQLAlchemy (SQLALCHEMY_ENGINE_OPTIONS).
+
+    Conexões no PostgreSQL = réplicas × WEB_CONCURRENCY ×
+    (DB_POOL_SIZE + DB_MAX_OVERFLOW). Com DB_PGBOUNCER=1 (PgBouncer em
+    modo transaction) o pool local é desligado e o statement_timeout é
+    aplicado por transação, já que parâmetros de conexão não passam pelo
+    PgBouncer.
+    """
+    if not make_url(database_url).drivername.startswith("postgresql"):
+        return {}
+
+    from services.db_pool import InstrumentedQueuePool
+    from sqlalchemy.pool import NullPool
+
+    options = {"pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "1") == "1"}
+    statement_timeout = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))
+
+    if os.getenv("DB_PGBOUNCER") == "1":
+        options["poolclass"] = NullPool
+        return options
+
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=int(os.getenv("DB_POOL_SIZE", _default_pool_size())),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "2")),
+        pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        pool_use_lifo=True,
+    )
+    if statement_timeout:
+        options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout}"}
+    return options
+
+
+def apply_transaction_statement_timeout(engine):
+    """SET LOCAL statement_timeout no início de cada transação (modo PgBouncer)"""
+    statement_timeout = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))
+    if os.getenv("DB_PGBOUNCER") != "1" or not statement_timeout:
+        return
+    if engine.dialect.name != "postgresql":
+        return
+
+    @event.listens_for(engine, "begin")
+    def set_statement_timeout(connection):
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {statement_timeout}")
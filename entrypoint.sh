@@ -3,9 +3,42 @@
 # Railway injeta PORT, usa 5000 como fallback para desenvolvimento
 APP_PORT="${PORT:-5000}"
 
-# Inicializar banco de dados (criar tabelas se nao existirem)
-echo "Initializing database..."
-python -c "from app import app, db; app.app_context().push(); db.create_all(); print('Database initialized!')"
+# Aplicar migracoes pendentes (sem importar o app). Com varias replicas, o
+# advisory lock garante que so uma aplica; as demais so confirmam o schema.
+# No Railway as migracoes rodam uma vez por deploy no preDeployCommand
+# (railway.toml), entao o padrao la e nao migrar na subida de cada replica.
+# RUN_MIGRATIONS=1 ou 0 sobrescreve o padrao.
+if [ -n "$RAILWAY_DEPLOYMENT_ID" ]; then
+    DEFAULT_RUN_MIGRATIONS=0
+else
+    DEFAULT_RUN_MIGRATIONS=1
+fi
+if [ "${RUN_MIGRATIONS:-$DEFAULT_RUN_MIGRATIONS}" = "1" ]; then
+    echo "Applying database migrations..."
+    python -m migrations upgrade || exit 1
+fi
 
+# Worker de notificações no mesmo container. Com NOTIFICATION_DELIVERY=worker
+# (padrão) e sem ele as notificações ficariam na outbox sem nunca serem
+# enviadas, então sobe por padrão; use RUN_NOTIFICATION_WORKER=0 quando um
+# serviço separado roda "flask --app app notifications-worker".
+if [ "${NOTIFICATION_DELIVERY:-worker}" = "inline" ]; then
+    DEFAULT_RUN_NOTIFICATION_WORKER=0
+else
+    DEFAULT_RUN_NOTIFICATION_WORKER=1
+fi
+if [ "${RUN_NOTIFICATION_WORKER:-$DEFAULT_RUN_NOTIFICATION_WORKER}" = "1" ]; then
+    echo "Starting notifications worker..."
+    # Reinicia o worker se ele cair (o gunicorn segue como processo principal)
+    (
+        while true; do
+            flask --app app notifications-worker
+            echo "Notifications worker exited; restarting in 5s"
+            sleep 5
+        done
+    ) &
+fi
+
+# Workers, threads e timeouts em gunicorn.conf.py
 echo "Starting gunicorn on port $APP_PORT"
 exec gunicorn app:app --bind "0.0.0.0:$APP_PORT"
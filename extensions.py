@@ -1,12 +1,18 @@
+import os
+
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
+from config import get_ratelimit_storage_uri
+import services.rate_limit_storage  # noqa: F401 - registra o esquema sqlite://
+
 db = SQLAlchemy()
 bcrypt = Bcrypt()
 limiter = Limiter(
     key_func=get_remote_address,
     default_limits=["10000 per day", "500 per hour"],
-    storage_uri="memory://",
+    storage_uri=get_ratelimit_storage_uri(),
+    strategy=os.getenv("RATELIMIT_STRATEGY", "sliding-window-counter"),
 )
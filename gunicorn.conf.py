@@ -0,0 +1,79 @@
+# backend/gunicorn.conf.py
+"""
+Configuração do gunicorn (carregada automaticamente a partir do diretório atual).
+
+GUNICORN_WORKER_CLASS escolhe o modelo de concorrência:
+- sync:    um request por processo (padrão do gunicorn)
+- gthread: GUNICORN_THREADS threads por processo; um request lento (bcrypt,
+           envio de email) não bloqueia os demais do mesmo worker
+- gevent:  greenlets, para muitos requests concorrentes presos em I/O
+           (requer o pacote gevent; psycogreen é usado se instalado)
+
+WEB_CONCURRENCY fixa o número de workers; sem ela o número é derivado da
+quantidade de CPUs. Com preload_app o app é importado uma vez no master e
+compartilhado via fork; post_fork descarta as conexões herdadas do pool do
+SQLAlchemy para que nenhum worker reutilize o socket de outro processo.
+"""
+import multiprocessing
+import os
+
+cpu_count = multiprocessing.cpu_count()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+if worker_class == "gevent":
+    default_workers = cpu_count
+else:
+    default_workers = min(2 * cpu_count + 1, int(os.getenv("GUNICORN_MAX_WORKERS", "8")))
+workers = int(os.getenv("WEB_CONCURRENCY", default_workers))
+threads = int(os.getenv("GUNICORN_THREADS", "4")) if worker_class == "gthread" else 1
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "1000"))
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+# Recicla workers periodicamente (vazamentos de memória), com jitter para que
+# não reiniciem todos ao mesmo tempo
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "20"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# "-" = stdout; GUNICORN_ACCESS_LOG vazio desliga o log de acesso
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-") or None
+
+
+def post_fork(server, worker):
+    if worker_class == "gevent":
+        try:
+            from psycogreen.gevent import patch_psycopg
+
+            patch_psycopg()
+        except ImportError:
+            pass
+
+    from app import app
+    from extensions import db
+
+    # close=False: não fecha os sockets que continuam sendo do master
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    # Soma os totais do worker encerrado na linha "archived" das métricas
+    from services.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
+
+
+def on_starting(server):
+    server.log.info(
+        "Gunicorn: %s worker(s) %s, %s thread(s), preload=%s",
+        workers,
+        worker_class,
+        threads,
+        preload_app,
+    )
@@ -0,0 +1,199 @@
+# backend/migrations/__init__.py
+"""
+Migrações de schema versionadas.
+
+Cada arquivo em migrations/versions/ (NNNN_descricao.py) define
+upgrade(op). As versões aplicadas ficam na tabela schema_migrations.
+
+    python -m migrations check     # sai com código 1 se houver pendências
+    python -m migrations upgrade   # aplica as pendências (sem importar o app)
+
+O upgrade roda sob um advisory lock no PostgreSQL: se várias réplicas sobem
+ao mesmo tempo, apenas uma aplica as migrações e as outras só confirmam que o
+schema está atual. No modo online (padrão) cada comando é confirmado
+isoladamente com lock_timeout curto e os índices são criados com
+CREATE INDEX CONCURRENTLY, sem bloquear escritas. O lock_timeout curto vale
+só para os comandos das migrações: a espera pelo advisory lock não tem
+limite (MIGRATION_ADVISORY_LOCK_TIMEOUT), já que outra réplica pode estar
+criando um índice grande. Com PgBouncer em modo
+transaction, aponte MIGRATIONS_DATABASE_URL para a conexão direta (o advisory
+lock é de sessão). As operações de op são
+idempotentes, então uma migração interrompida pode ser executada de novo.
+"""
+import importlib
+import os
+import pkgutil
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import create_engine, inspect, text
+
+from config import get_database_url
+
+ADVISORY_LOCK_ID = 7_240_301
+LOCK_TIMEOUT = os.getenv("MIGRATION_LOCK_TIMEOUT", "5s")
+# 0 = sem limite
+ADVISORY_LOCK_TIMEOUT = os.getenv("MIGRATION_ADVISORY_LOCK_TIMEOUT", "0")
+
+
+class Operations:
+    """Idempotent schema operations available to migration files"""
+
+    def __init__(self, connection, online=True):
+        self.connection = connection
+        self.online = online
+        self.dialect = connection.dialect.name
+
+    @contextmanager
+    def _lock_timeout(self):
+        """Short lock_timeout around one schema statement (PostgreSQL)"""
+        if self.dialect != "postgresql":
+            yield
+            return
+        # DDL esperando um lock enfileira todas as consultas da tabela atrás
+        # dele; se o comando falhar a migração para de qualquer jeito
+        self.connection.execute(text(f"SET lock_timeout = '{LOCK_TIMEOUT}'"))
+        yield
+        self.connection.execute(text("SET lock_timeout = 0"))
+
+    def execute(self, sql, **params):
+        with self._lock_timeout():
+            return self.connection.execute(text(sql), params)
+
+    def has_table(self, table):
+        return inspect(self.connection).has_table(table)
+
+    def has_column(self, table, column):
+        return column in {c["name"] for c in inspect(self.connection).get_columns(table)}
+
+    def has_index(self, table, name):
+        return name in {i["name"] for i in inspect(self.connection).get_indexes(table)}
+
+    def create_tables(self, *names):
+        """Create tables from the current models if they do not exist"""
+        import models  # noqa: F401 - registra as tabelas no metadata
+        from extensions import db
+
+        for name in names:
+            with self._lock_timeout():
+                db.metadata.tables[name].create(self.connection, checkfirst=True)
+
+    def add_column(self, table, column, ddl):
+        """ALTER TABLE ... ADD COLUMN unless the column exists"""
+        if not self.has_column(table, column):
+            self.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+    def create_index(self, name, table, columns, unique=False):
+        """Create an index, CONCURRENTLY on PostgreSQL in online mode"""
+        unique_sql = "UNIQUE " if unique else ""
+        columns_sql = ", ".join(columns)
+        if self.dialect == "postgresql" and self.online:
+            # Um build concorrente interrompido deixa o índice INVALID: recria
+            valid = self.execute(
+                "SELECT i.indisvalid FROM pg_index i "
+                "JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name",
+                name=name,
+            ).scalar()
+            if valid:
+                return
+            if valid is False:
+                self.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+            self.execute(
+                f"CREATE {unique_sql}INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                f"ON {table} ({columns_sql})"
+            )
+            return
+        if not self.has_index(table, name):
+            self.execute(f"CREATE {unique_sql}INDEX {name} ON {table} ({columns_sql})")
+
+
+def available_migrations():
+    """Return [(version, name, module)] sorted by version"""
+    from migrations import versions
+
+    found = []
+    for info in pkgutil.iter_modules(versions.__path__):
+        version, _, name = info.name.partition("_")
+        if version.isdigit():
+            module = importlib.import_module(f"migrations.versions.{info.name}")
+            found.append((version, name, module))
+    return sorted(found, key=lambda item: item[0])
+
+
+def _available_versions():
+    from migrations import versions
+
+    return sorted(
+        info.name.partition("_")[0]
+        for info in pkgutil.iter_modules(versions.__path__)
+        if info.name.partition("_")[0].isdigit()
+    )
+
+
+def _ensure_version_table(connection):
+    connection.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version VARCHAR(32) PRIMARY KEY, name VARCHAR(200), applied_at TIMESTAMP)"
+        )
+    )
+
+
+def applied_versions(connection):
+    if not inspect(connection).has_table("schema_migrations"):
+        return set()
+    rows = connection.execute(text("SELECT version FROM schema_migrations"))
+    return {version for (version,) in rows}
+
+
+def pending_versions(engine=None):
+    """Fast check: versions on disk not yet recorded (one query, no app import)"""
+    engine = engine or create_engine(get_database_url("MIGRATIONS_DATABASE_URL"))
+    with engine.connect() as connection:
+        applied = applied_versions(connection)
+    return [version for version in _available_versions() if version not in applied]
+
+
+def upgrade(engine=None, online=True, log=print):
+    """Apply pending migrations. Returns the list of versions applied"""
+    engine = engine or create_engine(get_database_url("MIGRATIONS_DATABASE_URL"))
+    if engine.dialect.name == "postgresql" and online:
+        engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+
+    applied_now = []
+    with engine.connect() as connection:
+        is_postgres = connection.dialect.name == "postgresql"
+        if is_postgres:
+            connection.execute(text(f"SET lock_timeout = '{ADVISORY_LOCK_TIMEOUT}'"))
+            connection.execute(
+                text("SELECT pg_advisory_lock(:id)"), {"id": ADVISORY_LOCK_ID}
+            )
+        try:
+            _ensure_version_table(connection)
+            if connection.in_transaction():
+                connection.commit()
+            # Lido depois do lock: outra réplica pode ter acabado de migrar
+            applied = applied_versions(connection)
+            for version, name, module in available_migrations():
+                if version in applied:
+                    continue
+                log(f"Aplicando migração {version}_{name}...")
+                module.upgrade(Operations(connection, online=online))
+                connection.execute(
+                    text(
+                        "INSERT INTO schema_migrations (version, name, applied_at) "
+                        "VALUES (:version, :name, :applied_at)"
+                    ),
+                    {"version": version, "name": name, "applied_at": datetime.utcnow()},
+                )
+                if connection.in_transaction():
+                    connection.commit()
+                applied_now.append(version)
+        finally:
+            if is_postgres:
+                if connection.in_transaction():
+                    connection.rollback()
+                connection.execute(
+                    text("SELECT pg_advisory_unlock(:id)"), {"id": ADVISORY_LOCK_ID}
+                )
+    return applied_now
@@ -0,0 +1,32 @@
+# backend/migrations/__main__.py
+import sys
+
+from dotenv import load_dotenv
+
+from migrations import pending_versions, upgrade
+
+
+def main(argv):
+    load_dotenv()
+    command = argv[0] if argv else "upgrade"
+    if command == "check":
+        pending = pending_versions()
+        if pending:
+            print(f"Migrações pendentes: {', '.join(pending)}")
+            return 1
+        print("Schema atualizado")
+        return 0
+    if command == "upgrade":
+        online = "--offline" not in argv
+        if not pending_versions():
+            print("Schema atualizado")
+            return 0
+        applied = upgrade(online=online)
+        print(f"{len(applied)} migração(ões) aplicada(s)")
+        return 0
+    print("Uso: python -m migrations [check|upgrade [--offline]]")
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,5 @@
+"""Tabelas originais: hosts, events e attendees"""
+
+
+def upgrade(op):
+    op.create_tables("hosts", "events", "attendees")
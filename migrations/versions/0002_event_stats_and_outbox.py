@@ -0,0 +1,24 @@
+"""Contadores de RSVP por evento e outbox de notificações"""
+
+
+def upgrade(op):
+    op.create_tables("event_stats", "notification_outbox")
+    op.create_index(
+        "ix_notification_outbox_status_next",
+        "notification_outbox",
+        ["status", "next_attempt_at"],
+    )
+    # Preenche os contadores dos eventos que ainda não têm linha
+    op.execute(
+        "INSERT INTO event_stats "
+        "(event_id, confirmed_count, cancelled_count, total_adults, total_children, updated_at) "
+        "SELECT e.id, "
+        "COUNT(CASE WHEN a.status = 'confirmed' THEN 1 END), "
+        "COUNT(CASE WHEN a.status = 'cancelled' THEN 1 END), "
+        "COALESCE(SUM(CASE WHEN a.status = 'confirmed' THEN a.num_adults ELSE 0 END), 0), "
+        "COALESCE(SUM(CASE WHEN a.status = 'confirmed' THEN a.num_children ELSE 0 END), 0), "
+        "CURRENT_TIMESTAMP "
+        "FROM events e LEFT JOIN attendees a ON a.event_id = e.id "
+        "WHERE NOT EXISTS (SELECT 1 FROM event_stats s WHERE s.event_id = e.id) "
+        "GROUP BY e.id"
+    )
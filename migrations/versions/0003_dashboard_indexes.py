@@ -0,0 +1,6 @@
+"""Índices compostos do painel do anfitrião e da listagem de convidados"""
+
+
+def upgrade(op):
+    op.create_index("ix_events_host_id_event_date", "events", ["host_id", "event_date"])
+    op.create_index("ix_attendees_event_id_status", "attendees", ["event_id", "status"])
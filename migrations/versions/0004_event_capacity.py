@@ -0,0 +1,5 @@
+"""Capacidade opcional do evento (lista de espera)"""
+
+
+def upgrade(op):
+    op.add_column("events", "max_guests", "INTEGER")
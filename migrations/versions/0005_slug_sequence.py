@@ -0,0 +1,13 @@
+"""Contador e chave do gerador de slugs de eventos"""
+import secrets
+
+
+def upgrade(op):
+    op.create_tables("slug_sequence")
+    # A chave é gerada uma única vez por banco (veja services/slugs.py)
+    op.execute(
+        "INSERT INTO slug_sequence (id, value, secret) "
+        "SELECT 1, 0, :secret "
+        "WHERE NOT EXISTS (SELECT 1 FROM slug_sequence)",
+        secret=secrets.token_hex(16),
+    )
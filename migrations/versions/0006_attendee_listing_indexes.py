@@ -0,0 +1,8 @@
+"""Índices da listagem de convidados paginada por cursor"""
+
+
+def upgrade(op):
+    op.create_index(
+        "ix_attendees_event_id_rsvp_date", "attendees", ["event_id", "rsvp_date", "id"]
+    )
+    op.create_index("ix_attendees_event_id_name", "attendees", ["event_id", "name", "id"])
@@ -0,0 +1,15 @@
+"""Sincronização incremental de convidados (índice e tombstones)"""
+
+
+def upgrade(op):
+    op.create_index(
+        "ix_attendees_event_id_last_modified",
+        "attendees",
+        ["event_id", "last_modified", "id"],
+    )
+    op.create_tables("attendee_tombstones")
+    op.create_index(
+        "ix_attendee_tombstones_event_id_deleted_at",
+        "attendee_tombstones",
+        ["event_id", "deleted_at"],
+    )
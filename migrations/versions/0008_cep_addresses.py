@@ -0,0 +1,5 @@
+"""Cache persistente e base offline de CEPs"""
+
+
+def upgrade(op):
+    op.create_tables("cep_addresses")
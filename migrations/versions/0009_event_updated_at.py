@@ -0,0 +1,6 @@
+"""Data da última alteração do evento (Last-Modified do convite)"""
+
+
+def upgrade(op):
+    op.add_column("events", "updated_at", "TIMESTAMP")
+    op.execute("UPDATE events SET updated_at = created_at WHERE updated_at IS NULL")
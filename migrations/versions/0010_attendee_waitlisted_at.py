@@ -0,0 +1,9 @@
+"""Ordem da lista de espera (entrada na fila, não data do primeiro RSVP)"""
+
+
+def upgrade(op):
+    op.add_column("attendees", "waitlisted_at", "TIMESTAMP")
+    op.execute(
+        "UPDATE attendees SET waitlisted_at = rsvp_date "
+        "WHERE status = 'waitlisted' AND waitlisted_at IS NULL"
+    )
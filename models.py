@@ -1,7 +1,6 @@
 # backend/models.py
 from extensions import db
 from datetime import datetime
-import uuid
 
 
 class Host(db.Model):
@@ -19,6 +18,13 @@ class Host(db.Model):
     )
 
 
+def _default_slug(context):
+    # Slug do contador em slug_sequence, na mesma conexão do INSERT
+    from services.slugs import allocate_slug
+
+    return allocate_slug(context.connection)
+
+
 class Event(db.Model):
     __tablename__ = "events"
 
@@ -28,7 +34,7 @@ class Event(db.Model):
         db.String(50),
         unique=True,
         nullable=False,
-        default=lambda: str(uuid.uuid4())[:8],
+        default=_default_slug,
     )
 
     title = db.Column(db.String(200), nullable=False)
@@ -44,11 +50,32 @@ class Event(db.Model):
     allow_modifications = db.Column(db.Boolean, default=True)
     allow_cancellations = db.Column(db.Boolean, default=True)
 
+    # Limite de adultos + crianças confirmados (None = sem limite); quem
+    # passar do limite entra na lista de espera
+    max_guests = db.Column(db.Integer)
+
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Last-Modified da página pública do convite
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     attendees = db.relationship(
         "Attendee", backref="event", lazy=True, cascade="all, delete-orphan"
     )
+    stats = db.relationship(
+        "EventStats",
+        backref="event",
+        uselist=False,
+        lazy=True,
+        cascade="all, delete-orphan",
+    )
+
+    __table_args__ = (
+        # Painel do anfitrião: WHERE host_id = ? ORDER BY event_date
+        db.Index("ix_events_host_id_event_date", "host_id", "event_date"),
+    )
+
+
+ATTENDEE_STATUSES = ("confirmed", "cancelled", "waitlisted")
 
 
 class Attendee(db.Model):
@@ -64,14 +91,106 @@ class Attendee(db.Model):
     num_children = db.Column(db.Integer, default=0)
     comments = db.Column(db.Text)
 
-    status = db.Column(db.String(20), default="confirmed")
+    status = db.Column(db.String(20), default="confirmed")  # ATTENDEE_STATUSES
     rsvp_date = db.Column(db.DateTime, default=datetime.utcnow)
+    # Entrada (mais recente) na lista de espera: ordem de promoção
+    waitlisted_at = db.Column(db.DateTime)
     last_modified = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
 
     __table_args__ = (
+        # Também serve de índice para a busca por (event_id, whatsapp_number)
         db.UniqueConstraint(
             "event_id", "whatsapp_number", name="unique_attendee_per_event"
         ),
+        db.Index("ix_attendees_event_id_status", "event_id", "status"),
+        # Ordenações da listagem paginada por cursor
+        db.Index("ix_attendees_event_id_rsvp_date", "event_id", "rsvp_date", "id"),
+        db.Index("ix_attendees_event_id_name", "event_id", "name", "id"),
+        # Sincronização incremental: WHERE event_id = ? AND last_modified > ?
+        db.Index(
+            "ix_attendees_event_id_last_modified", "event_id", "last_modified", "id"
+        ),
     )
+
+
+class AttendeeTombstone(db.Model):
+    """Convidados removidos pelo anfitrião, para a sincronização incremental"""
+
+    __tablename__ = "attendee_tombstones"
+
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, nullable=False)
+    attendee_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index("ix_attendee_tombstones_event_id_deleted_at", "event_id", "deleted_at"),
+    )
+
+
+class EventStats(db.Model):
+    """Contadores de RSVP por evento, mantidos na mesma transação das escritas"""
+
+    __tablename__ = "event_stats"
+
+    event_id = db.Column(db.Integer, db.ForeignKey("events.id"), primary_key=True)
+    confirmed_count = db.Column(db.Integer, nullable=False, default=0)
+    cancelled_count = db.Column(db.Integer, nullable=False, default=0)
+    total_adults = db.Column(db.Integer, nullable=False, default=0)
+    total_children = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+
+class NotificationOutbox(db.Model):
+    """Notificações gravadas na transação da escrita e entregues por um worker"""
+
+    __tablename__ = "notification_outbox"
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)
+    recipient = db.Column(db.String(120), nullable=False)
+    event_id = db.Column(db.Integer)
+    payload = db.Column(db.JSON, nullable=False)
+
+    status = db.Column(db.String(20), nullable=False, default="pending")
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index("ix_notification_outbox_status_next", "status", "next_attempt_at"),
+    )
+
+
+class SlugSequence(db.Model):
+    """Contador e chave do gerador de slugs de eventos (services/slugs.py)"""
+
+    __tablename__ = "slug_sequence"
+
+    id = db.Column(db.Integer, primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+    secret = db.Column(db.String(64), nullable=False)
+
+
+class CepAddress(db.Model):
+    """Endereços por CEP: cache persistente do ViaCEP e base offline (services/cep.py)"""
+
+    __tablename__ = "cep_addresses"
+
+    cep = db.Column(db.String(8), primary_key=True)
+    # False: o CEP não existe (cache negativo)
+    found = db.Column(db.Boolean, nullable=False, default=True)
+    street = db.Column(db.String(200), nullable=False, default="")
+    neighborhood = db.Column(db.String(120), nullable=False, default="")
+    city = db.Column(db.String(120), nullable=False, default="")
+    state = db.Column(db.String(2), nullable=False, default="")
+    # "viacep" (consultado sob demanda) ou "dataset" (importado, não expira)
+    source = db.Column(db.String(20), nullable=False)
+    fetched_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
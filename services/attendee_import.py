@@ -0,0 +1,369 @@
+# backend/services/attendee_import.py
+"""
+Importação em massa de convidados.
+
+As linhas (CSV ou JSON) são validadas uma a uma, sem carregar o arquivo CSV
+inteiro em memória, e gravadas em lotes: cada lote custa uma consulta (os
+convidados que já existem, travados para escrita), um INSERT de várias
+linhas para os novos e um INSERT ... ON CONFLICT DO UPDATE para os
+existentes.
+
+Num convidado existente só mudam as colunas presentes na linha; contagem ou
+status vazios também mantêm o valor atual. Os padrões (1 adulto, 0 crianças,
+confirmed) valem só para convidados novos.
+
+A linha de contadores do evento fica travada durante toda a importação, e as
+confirmações seguem a regra dos RSVPs: sem vagas, ou com alguém na lista de
+espera, um convidado novo ou reativado entra na lista de espera, e o aumento
+de uma confirmação existente é recusado. No fim os contadores recebem um
+único UPDATE com a soma das alterações.
+"""
+import csv
+import io
+import os
+from datetime import datetime
+
+from sqlalchemy import exists, update
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models import ATTENDEE_STATUSES, Attendee
+from services.event_stats import apply_attendee_changes, lock_event_stats
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+IMPORT_MAX_ROWS = int(os.getenv("IMPORT_MAX_ROWS", "50000"))
+IMPORT_STATUSES = tuple(status for status in ATTENDEE_STATUSES if status != "waitlisted")
+UPSERT_COLUMNS = [
+    "name",
+    "num_adults",
+    "num_children",
+    "comments",
+    "status",
+    "waitlisted_at",
+    "last_modified",
+]
+# Colunas ausentes na linha de um convidado novo
+INSERT_DEFAULTS = {
+    "num_adults": 1,
+    "num_children": 0,
+    "comments": "",
+    "status": "confirmed",
+    "waitlisted_at": None,
+}
+
+# Aceita os cabeçalhos do export-csv além dos nomes dos campos
+FIELD_ALIASES = {
+    "name": "name",
+    "nome": "name",
+    "whatsapp": "whatsapp_number",
+    "whatsapp_number": "whatsapp_number",
+    "adults": "num_adults",
+    "adultos": "num_adults",
+    "num_adults": "num_adults",
+    "children": "num_children",
+    "criancas": "num_children",
+    "crianças": "num_children",
+    "num_children": "num_children",
+    "comments": "comments",
+    "comentarios": "comments",
+    "comentários": "comments",
+    "status": "status",
+}
+
+
+def iter_csv_rows(stream, encoding="utf-8-sig"):
+    """Yield dicts with normalized field names from a binary CSV stream"""
+    text = io.TextIOWrapper(stream, encoding=encoding, newline="")
+    reader = csv.reader(text)
+    header = next(reader, None)
+    if header is None:
+        return
+    fields = [FIELD_ALIASES.get(name.strip().lower()) for name in header]
+    for values in reader:
+        if not any(value.strip() for value in values):
+            continue
+        yield {
+            field: value
+            for field, value in zip(fields, values)
+            if field is not None
+        }
+
+
+def iter_json_rows(data):
+    """Yield dicts from a JSON list (or {"attendees": [...]})"""
+    if isinstance(data, dict):
+        data = data.get("attendees")
+    if not isinstance(data, list):
+        raise ValueError("Envie uma lista de convidados")
+    for item in data:
+        yield {
+            FIELD_ALIASES.get(str(key).lower(), key): value
+            for key, value in (item.items() if isinstance(item, dict) else [])
+        }
+
+
+def _as_count(value, field, errors):
+    """Integer count, or None when the row leaves the field empty"""
+    if value is None or value == "":
+        return None
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        errors.append(f"{field} deve ser um número inteiro")
+        return None
+    if number < 0:
+        errors.append(f"{field} não pode ser negativo")
+    return number
+
+
+def validate_row(row):
+    """Return (values, errors) for a raw row dict.
+
+    Optional fields only appear in ``values`` when the row has them, so an
+    update keeps the current value of the others.
+    """
+    errors = []
+    name = str(row.get("name") or "").strip()
+    whatsapp_number = str(row.get("whatsapp_number") or "").strip()
+    if not name:
+        errors.append("name é obrigatório")
+    elif len(name) > 100:
+        errors.append("name deve ter no máximo 100 caracteres")
+    if not whatsapp_number:
+        errors.append("whatsapp_number é obrigatório")
+    elif len(whatsapp_number) > 20:
+        errors.append("whatsapp_number deve ter no máximo 20 caracteres")
+
+    values = {"name": name, "whatsapp_number": whatsapp_number}
+    status = str(row.get("status") or "").strip().lower()
+    if status:
+        # waitlisted é recusado de propósito: quem vai para a lista de espera
+        # é decidido pelas vagas do evento (_Capacity), não pelo arquivo
+        if status not in IMPORT_STATUSES:
+            errors.append(f"status deve ser {' ou '.join(IMPORT_STATUSES)}")
+        values["status"] = status
+    for field in ("num_adults", "num_children"):
+        number = _as_count(row.get(field), field, errors)
+        if number is not None:
+            values[field] = number
+    if row.get("comments") is not None:
+        values["comments"] = str(row["comments"])
+    return values, errors
+
+
+class _Capacity:
+    """Seat decisions of one import, taken while it holds the counters row lock"""
+
+    def __init__(self, event, stats):
+        self.max_guests = event.max_guests
+        self.taken = (stats.total_adults or 0) + (stats.total_children or 0)
+        self.waitlist = db.session.query(
+            exists().where(Attendee.event_id == event.id, Attendee.status == "waitlisted")
+        ).scalar()
+        self.changes = []
+
+    def place(self, before, record, now):
+        """Settle the record's status against the free seats; returns an error or None"""
+        was_confirmed = before is not None and before[0] == "confirmed"
+        held = before[1] + before[2] if was_confirmed else 0
+        seats = (record["num_adults"] or 0) + (record["num_children"] or 0)
+        if record["status"] == "confirmed":
+            fits = self.max_guests is None or self.taken - held + seats <= self.max_guests
+            if was_confirmed:
+                if seats > held and not fits:
+                    return "Não há vagas suficientes para aumentar o número de convidados"
+            elif self.waitlist or not fits:
+                # Novo ou reativado: como no RSVP, ninguém fura a lista de espera
+                record["status"] = "waitlisted"
+        if record["status"] == "waitlisted":
+            self.waitlist = True
+            if before is None or before[0] != "waitlisted":
+                record["waitlisted_at"] = now
+        self.taken += (seats if record["status"] == "confirmed" else 0) - held
+        return None
+
+    def release(self, after):
+        """Undo place() for a new guest that was not inserted"""
+        if after[0] == "confirmed":
+            self.taken -= after[1] + after[2]
+
+
+def _load_existing(event_id, numbers):
+    """Current values of a batch's guests, locked until the import commits"""
+    query = (
+        db.session.query(
+            Attendee.whatsapp_number,
+            Attendee.name,
+            Attendee.num_adults,
+            Attendee.num_children,
+            Attendee.comments,
+            Attendee.status,
+            Attendee.waitlisted_at,
+        )
+        .filter(Attendee.event_id == event_id, Attendee.whatsapp_number.in_(numbers))
+        .with_for_update()
+    )
+    return {row.whatsapp_number: row._asdict() for row in query}
+
+
+def _dialect_insert():
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert
+
+
+def write_batch(event_id, created, updated):
+    """Insert new guests and update existing ones; returns the inserted numbers.
+
+    A number that a concurrent RSVP inserted after the batch was read is left
+    alone (ON CONFLICT DO NOTHING) and missing from the result. Updated rows
+    are locked by the caller and written with their full merged values. Falls
+    back to ORM writes on other databases.
+    """
+    insert = _dialect_insert()
+    conflict_target = ["event_id", "whatsapp_number"]
+    inserted = set()
+    if insert is not None:
+        if created:
+            stmt = (
+                insert(Attendee)
+                .values(created)
+                .on_conflict_do_nothing(index_elements=conflict_target)
+                .returning(Attendee.whatsapp_number)
+            )
+            inserted = set(db.session.execute(stmt).scalars())
+        if updated:
+            stmt = insert(Attendee).values(updated)
+            db.session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=conflict_target,
+                    set_={column: stmt.excluded[column] for column in UPSERT_COLUMNS},
+                )
+            )
+        return inserted
+
+    for record in created:
+        try:
+            with db.session.begin_nested():
+                db.session.add(Attendee(**record))
+        except IntegrityError:
+            continue
+        inserted.add(record["whatsapp_number"])
+    numbers = [record["whatsapp_number"] for record in updated]
+    current = {
+        attendee.whatsapp_number: attendee
+        for attendee in Attendee.query.filter(
+            Attendee.event_id == event_id, Attendee.whatsapp_number.in_(numbers)
+        )
+    }
+    for record in updated:
+        for column in UPSERT_COLUMNS:
+            setattr(current[record["whatsapp_number"]], column, record[column])
+    db.session.flush()
+    return inserted
+
+
+def import_attendees(event, rows, on_conflict="update", now=None):
+    """Validate and write rows in batches. Returns the per-row report.
+
+    Keeps event_stats in step and holds the counters row lock until the
+    caller commits. Cancellations and smaller parties in the file may free
+    seats, so the caller should promote the waitlist before committing.
+    Every written row gets last_modified = now; pass the same value to
+    stamp_commit_time right before the commit.
+    """
+    capacity = _Capacity(event, lock_event_stats(event.id))
+    now = now or datetime.utcnow()
+    results = []
+    seen = set()
+    batch = []
+    batch_rows = []
+
+    def flush():
+        current = _load_existing(event.id, [values["whatsapp_number"] for values in batch])
+        created, updated, placed = [], [], []
+        for index, values in zip(batch_rows, batch):
+            result = results[index]
+            existing = current.get(values["whatsapp_number"])
+            if existing is not None and on_conflict == "skip":
+                result["status"] = "skipped"
+                continue
+            if existing is None:
+                before = None
+                record = dict(INSERT_DEFAULTS, **values)
+            else:
+                before = (
+                    existing["status"],
+                    existing["num_adults"] or 0,
+                    existing["num_children"] or 0,
+                )
+                record = dict(existing, **values)
+            error = capacity.place(before, record, now)
+            if error:
+                result.update(status="error", errors=[error])
+                continue
+            record.update(event_id=event.id, last_modified=now)
+            if existing is None:
+                record["rsvp_date"] = now
+                created.append(record)
+            else:
+                updated.append(record)
+            placed.append((result, before, record))
+
+        inserted = write_batch(event.id, created, updated)
+        for result, before, record in placed:
+            after = (record["status"], record["num_adults"] or 0, record["num_children"] or 0)
+            if before is None and record["whatsapp_number"] not in inserted:
+                # Um RSVP gravou o mesmo número depois da leitura do lote
+                capacity.release(after)
+                result["status"] = "skipped"
+                continue
+            capacity.changes.append((before, after))
+            result["status"] = "created" if before is None else "updated"
+            if record["status"] == "waitlisted":
+                result["waitlisted"] = True
+        batch.clear()
+        batch_rows.clear()
+
+    for number, row in enumerate(rows, start=1):
+        if number > IMPORT_MAX_ROWS:
+            raise ValueError(f"Máximo de {IMPORT_MAX_ROWS} convidados por importação")
+        values, errors = validate_row(row)
+        result = {"row": number, "whatsapp_number": values["whatsapp_number"]}
+        if not errors and values["whatsapp_number"] in seen:
+            errors.append("whatsapp_number repetido no arquivo")
+        if errors:
+            result.update(status="error", errors=errors)
+            results.append(result)
+            continue
+
+        seen.add(values["whatsapp_number"])
+        results.append(result)
+        batch.append(values)
+        batch_rows.append(len(results) - 1)
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            flush()
+    if batch:
+        flush()
+    apply_attendee_changes(event.id, capacity.changes)
+    return results
+
+
+def stamp_commit_time(event_id, stamped):
+    """Move last_modified of the rows an import wrote (= stamped) to now.
+
+    The incremental sync only skips the last SYNC_SETTLE_SECONDS, so a
+    long import must not publish its start time as the change time. The
+    rows are already locked by this transaction.
+    """
+    db.session.execute(
+        update(Attendee)
+        .where(Attendee.event_id == event_id, Attendee.last_modified == stamped)
+        .values(last_modified=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
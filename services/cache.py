@@ -0,0 +1,216 @@
+# backend/services/cache.py
+"""
+Caches chave/valor com TTL.
+
+BACKENDS (escolhidos pela URL):
+- memory://            LRU em memória do processo (padrão)
+- sqlite:///caminho.db arquivo SQLite compartilhado entre os workers do mesmo host
+- redis://host:porta/0 Redis compartilhado entre réplicas (requer o pacote redis)
+
+Os valores precisam ser serializáveis em JSON para os backends compartilhados.
+No SQLite, uma fração das gravações (CLEANUP_PROBABILITY) apaga as linhas
+vencidas e corta o namespace em max_entries, então o arquivo não cresce sem
+limite; entre duas limpezas ele pode passar um pouco de max_entries.
+
+SingleFlight junta chamadas simultâneas para a mesma chave em uma só: em um
+cache miss, só a primeira thread consulta a origem e as outras esperam o
+resultado dela.
+"""
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Fração das gravações que também limpa o arquivo (backend SQLite)
+CLEANUP_PROBABILITY = 0.01
+
+
+class MemoryCache:
+    """In-process LRU cache with per-entry TTL"""
+
+    def __init__(self, max_entries=1024, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCache:
+    """Cache stored in a local SQLite file, shared by every worker on the host"""
+
+    def __init__(self, path, namespace="", ttl=60, max_entries=None):
+        self.path = path
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_expires_at ON cache (expires_at)")
+
+    def _connection(self):
+        # Uma conexão por thread e por processo (seguro com preload + fork)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM cache WHERE key = ?",
+            (self.namespace + key,),
+        ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (self.namespace + key, json.dumps(value), expires_at),
+        )
+        if random.random() < CLEANUP_PROBABILITY:
+            self.cleanup(conn)
+
+    def cleanup(self, conn=None):
+        """Delete expired rows and trim this namespace to max_entries (soonest to expire first)"""
+        conn = conn or self._connection()
+        conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        if self.max_entries is not None:
+            pattern = self.namespace + "%"
+            conn.execute(
+                "DELETE FROM cache WHERE key LIKE ? AND key NOT IN ("
+                "SELECT key FROM cache WHERE key LIKE ? ORDER BY expires_at DESC LIMIT ?)",
+                (pattern, pattern, self.max_entries),
+            )
+
+    def delete(self, key):
+        self._connection().execute(
+            "DELETE FROM cache WHERE key = ?", (self.namespace + key,)
+        )
+
+    def clear(self):
+        self._connection().execute(
+            "DELETE FROM cache WHERE key LIKE ?", (self.namespace + "%",)
+        )
+
+
+class RedisCache:
+    """Cache stored in Redis, shared by every replica"""
+
+    def __init__(self, url, namespace="", ttl=60):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError(
+                "O backend redis:// requer o pacote redis (pip install redis)"
+            ) from e
+        self.client = redis.Redis.from_url(url)
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def get(self, key):
+        value = self.client.get(self.namespace + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        self.client.set(self.namespace + key, json.dumps(value), ex=max(int(ttl), 1))
+
+    def delete(self, key):
+        self.client.delete(self.namespace + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.namespace + "*"):
+            self.client.delete(key)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one execution (per process)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, function):
+        """Run ``function`` unless a call for ``key`` is in flight; then share its outcome"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = function()
+            return call.result
+        except Exception as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+def create_cache(url="memory://", namespace="", ttl=60, max_entries=1024):
+    """Build a cache backend from a URL (memory://, sqlite:///path, redis://...)"""
+    if url.startswith("memory://"):
+        return MemoryCache(max_entries=max_entries, ttl=ttl)
+    if url.startswith("sqlite:///"):
+        return SQLiteCache(
+            url[len("sqlite:///"):], namespace=namespace, ttl=ttl, max_entries=max_entries
+        )
+    if url.startswith(("redis://", "rediss://")):
+        return RedisCache(url, namespace=namespace, ttl=ttl)
+    raise ValueError(f"Unsupported cache URL: {url}")
@@ -0,0 +1,296 @@
+# backend/services/cep.py
+"""
+Resolução de CEPs no servidor.
+
+Camadas, da mais rápida para a mais lenta:
+
+1. LRU em memória do processo (CEP_CACHE_MAX_ENTRIES entradas)
+2. tabela cep_addresses: respostas anteriores do ViaCEP e a base offline
+   importada com `flask load-cep-dataset arquivo.csv`
+3. o ViaCEP (CEP_UPSTREAM_URL), com timeout curto
+
+Consultas simultâneas do mesmo CEP que não estão no LRU viram uma só
+(SingleFlight). CEPs inexistentes também ficam em cache (cache negativo),
+por menos tempo.
+
+Se o ViaCEP estiver lento ou fora do ar, uma linha antiga da tabela continua
+valendo, e durante CEP_UPSTREAM_BACKOFF_SECONDS após uma falha nenhuma
+consulta espera pelo upstream. Sem linha na tabela a consulta falha com
+CepUnavailable, e quem chamou decide se segue sem o endereço.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+
+import requests
+
+from extensions import db
+from models import CepAddress
+from services.cache import MemoryCache, SingleFlight
+
+logger = logging.getLogger(__name__)
+
+UPSTREAM_URL = os.getenv("CEP_UPSTREAM_URL", "https://viacep.com.br/ws/{cep}/json/")
+UPSTREAM_TIMEOUT_SECONDS = float(os.getenv("CEP_UPSTREAM_TIMEOUT_SECONDS", "2"))
+UPSTREAM_BACKOFF_SECONDS = float(os.getenv("CEP_UPSTREAM_BACKOFF_SECONDS", "30"))
+# Endereços quase nunca mudam: a linha do ViaCEP é consultada de novo só depois disso
+REFRESH_DAYS = int(os.getenv("CEP_REFRESH_DAYS", "180"))
+NOT_FOUND_REFRESH_SECONDS = int(os.getenv("CEP_NOT_FOUND_REFRESH_SECONDS", "86400"))
+MEMORY_TTL_SECONDS = int(os.getenv("CEP_CACHE_TTL_SECONDS", "86400"))
+# Resultado servido com o upstream fora do ar: fica pouco tempo no LRU
+STALE_TTL_SECONDS = 60
+DATASET_BATCH_SIZE = 1000
+
+_CEP_DIGITS = re.compile(r"\d{8}")
+ADDRESS_COLUMNS = ["found", "street", "neighborhood", "city", "state", "source", "fetched_at"]
+
+# Aceita os cabeçalhos do ViaCEP além dos nomes das colunas
+DATASET_ALIASES = {
+    "cep": "cep",
+    "logradouro": "street",
+    "street": "street",
+    "bairro": "neighborhood",
+    "neighborhood": "neighborhood",
+    "localidade": "city",
+    "cidade": "city",
+    "city": "city",
+    "uf": "state",
+    "estado": "state",
+    "state": "state",
+}
+
+
+class InvalidCep(ValueError):
+    """The value is not an 8-digit CEP"""
+
+
+class CepUnavailable(Exception):
+    """The upstream failed and there is no stored answer for the CEP"""
+
+
+def normalize_cep(value):
+    """8-digit CEP from "22040-020", "22040020" etc.; raises InvalidCep"""
+    digits = re.sub(r"[\s.-]", "", str(value or ""))
+    if not _CEP_DIGITS.fullmatch(digits):
+        raise InvalidCep(value)
+    return digits
+
+
+def format_cep(cep):
+    """Display form of a normalized CEP (22040-020)"""
+    return f"{cep[:5]}-{cep[5:]}"
+
+
+def format_address(address):
+    """One-line address: "Rua, Bairro, Cidade - UF" (empty parts skipped)"""
+    parts = [address["street"], address["neighborhood"]]
+    if address["city"]:
+        parts.append(
+            f"{address['city']} - {address['state']}" if address["state"] else address["city"]
+        )
+    return ", ".join(part for part in parts if part)
+
+
+def _as_address(cep, values):
+    return {
+        "cep": format_cep(cep),
+        "street": values["street"],
+        "neighborhood": values["neighborhood"],
+        "city": values["city"],
+        "state": values["state"],
+    }
+
+
+class _Upstream:
+    """ViaCEP client that stops calling for a while after a failure"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+
+    def fetch(self, cep):
+        """Address fields, or None when the CEP does not exist; raises CepUnavailable"""
+        if time.monotonic() < self._down_until:
+            raise CepUnavailable(cep)
+        try:
+            response = requests.get(
+                UPSTREAM_URL.format(cep=cep), timeout=UPSTREAM_TIMEOUT_SECONDS
+            )
+            if response.status_code == 400:
+                # O ViaCEP responde 400 para formatos que ele não aceita
+                return None
+            response.raise_for_status()
+            data = response.json()
+        except (requests.RequestException, ValueError) as exc:
+            logger.warning("Falha ao consultar o CEP %s no upstream: %s", cep, exc)
+            with self._lock:
+                self._down_until = time.monotonic() + UPSTREAM_BACKOFF_SECONDS
+            raise CepUnavailable(cep) from exc
+        if not isinstance(data, dict) or data.get("erro"):
+            return None
+        return {
+            "street": data.get("logradouro") or "",
+            "neighborhood": data.get("bairro") or "",
+            "city": data.get("localidade") or "",
+            "state": (data.get("uf") or "")[:2],
+        }
+
+    def reset(self):
+        with self._lock:
+            self._down_until = 0.0
+
+
+upstream = _Upstream()
+memory = MemoryCache(
+    max_entries=int(os.getenv("CEP_CACHE_MAX_ENTRIES", "10000")), ttl=MEMORY_TTL_SECONDS
+)
+_flight = SingleFlight()
+
+
+def _insert_statement(records):
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    stmt = insert(CepAddress).values(records)
+    return stmt.on_conflict_do_update(
+        index_elements=["cep"],
+        set_={column: stmt.excluded[column] for column in ADDRESS_COLUMNS},
+    )
+
+
+def store_addresses(records):
+    """Upsert cep_addresses rows (dicts with every column) in the caller's transaction"""
+    stmt = _insert_statement(records)
+    if stmt is not None:
+        db.session.execute(stmt)
+        return
+    for record in records:
+        db.session.merge(CepAddress(**record))
+    db.session.flush()
+
+
+def _is_fresh(row):
+    if row.source == "dataset":
+        return True
+    if row.found:
+        max_age = timedelta(days=REFRESH_DAYS)
+    else:
+        max_age = timedelta(seconds=NOT_FOUND_REFRESH_SECONDS)
+    return row.fetched_at >= datetime.utcnow() - max_age
+
+
+def _row_address(row):
+    if not row.found:
+        return None
+    return _as_address(
+        row.cep,
+        {
+            "street": row.street,
+            "neighborhood": row.neighborhood,
+            "city": row.city,
+            "state": row.state,
+        },
+    )
+
+
+def _resolve(cep):
+    row = db.session.get(CepAddress, cep)
+    if row is not None and _is_fresh(row):
+        address = _row_address(row)
+        memory.set(cep, {"address": address})
+        return address
+    try:
+        fields = upstream.fetch(cep)
+    except CepUnavailable:
+        if row is None:
+            raise
+        # Upstream fora do ar: a resposta antiga vale mais do que nenhuma
+        address = _row_address(row)
+        memory.set(cep, {"address": address}, ttl=STALE_TTL_SECONDS)
+        return address
+
+    record = {
+        "cep": cep,
+        "found": fields is not None,
+        "street": "",
+        "neighborhood": "",
+        "city": "",
+        "state": "",
+        "source": "viacep",
+        "fetched_at": datetime.utcnow(),
+    }
+    record.update(fields or {})
+    store_addresses([record])
+    address = _as_address(cep, record) if fields is not None else None
+    memory.set(cep, {"address": address}, ttl=None if fields else NOT_FOUND_REFRESH_SECONDS)
+    return address
+
+
+def lookup(value):
+    """Address dict for a CEP, or None when it does not exist.
+
+    Raises InvalidCep for malformed input and CepUnavailable when the
+    upstream fails and nothing is stored. A cache miss may write to
+    cep_addresses inside the caller's transaction.
+    """
+    cep = normalize_cep(value)
+    cached = memory.get(cep)
+    if cached is not None:
+        return cached["address"]
+    return _flight.do(cep, lambda: _resolve(cep))
+
+
+def iter_dataset_rows(stream):
+    """Yield cep_addresses records from a CSV text stream (ViaCEP column names)"""
+    import csv
+
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        return
+    fields = [DATASET_ALIASES.get(name.strip().lower()) for name in header]
+    if "cep" not in fields:
+        raise ValueError("O arquivo precisa de uma coluna cep")
+    for values in reader:
+        row = {field: value.strip() for field, value in zip(fields, values) if field}
+        try:
+            cep = normalize_cep(row.get("cep"))
+        except InvalidCep:
+            continue
+        yield {
+            "cep": cep,
+            "found": True,
+            "street": row.get("street", "")[:200],
+            "neighborhood": row.get("neighborhood", "")[:120],
+            "city": row.get("city", "")[:120],
+            "state": row.get("state", "")[:2].upper(),
+            "source": "dataset",
+            "fetched_at": datetime.utcnow(),
+        }
+
+
+def load_dataset(records, batch_size=DATASET_BATCH_SIZE):
+    """Bulk upsert offline CEP records, committing per batch; returns the count"""
+    count = 0
+    batch = {}
+    for record in records:
+        # CEP repetido no mesmo lote quebraria o ON CONFLICT: vale o último
+        batch[record["cep"]] = record
+        if len(batch) >= batch_size:
+            store_addresses(list(batch.values()))
+            db.session.commit()
+            count += len(batch)
+            batch = {}
+    if batch:
+        store_addresses(list(batch.values()))
+        db.session.commit()
+        count += len(batch)
+    memory.clear()
+    return count
@@ -0,0 +1,113 @@
+# backend/services/db_pool.py
+"""
+Instrumentação do pool de conexões do SQLAlchemy.
+
+Coleta, por processo: conexões em uso, tempo de espera no checkout, conexões
+abertas além do pool_size (overflow), timeouts do pool e invalidações
+(conexões descartadas após erro ou pre-ping falho).
+"""
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+class PoolMetrics:
+    """Thread-safe counters for one engine's pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checked_out = 0
+        self.checkouts = 0
+        self.connects = 0
+        self.overflow_connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def add(self, **deltas):
+        with self._lock:
+            for name, value in deltas.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def snapshot(self, pool=None):
+        with self._lock:
+            data = {
+                "checked_out": self.checked_out,
+                "checkouts_total": self.checkouts,
+                "connects_total": self.connects,
+                "overflow_connects_total": self.overflow_connects,
+                "invalidations_total": self.invalidations,
+                "timeouts_total": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+        if isinstance(pool, QueuePool):
+            data.update(
+                pool_size=pool.size(),
+                pool_idle=pool.checkedin(),
+                pool_overflow=pool.overflow(),
+            )
+        return data
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that measures how long checkouts wait for a connection"""
+
+    metrics = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            if self.metrics is not None:
+                self.metrics.add(timeouts=1)
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.record_wait(time.perf_counter() - started)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def instrument_engine(engine):
+    """Attach pool event listeners; returns the engine's PoolMetrics"""
+    metrics = PoolMetrics()
+    if isinstance(engine.pool, InstrumentedQueuePool):
+        engine.pool.metrics = metrics
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        overflow = isinstance(engine.pool, QueuePool) and engine.pool.overflow() > 0
+        metrics.add(connects=1, overflow_connects=int(overflow))
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.add(checked_out=1, checkouts=1)
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        metrics.add(checked_out=-1)
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.add(invalidations=1)
+
+    @event.listens_for(engine, "soft_invalidate")
+    def on_soft_invalidate(dbapi_connection, connection_record, exception):
+        metrics.add(invalidations=1)
+
+    engine.pool_metrics = metrics
+    return metrics
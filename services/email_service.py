@@ -2,10 +2,20 @@
 """
 Serviço de envio de emails.
 
-MODO ATUAL: SIMULAÇÃO (Console logs)
+As notificações não são enviadas durante a requisição: as rotas gravam uma
+linha na tabela notification_outbox (veja services/notification_outbox.py) e
+um worker separado monta a mensagem com render_notification() e a entrega
+através de um transporte.
+
+TRANSPORTES:
+- console (padrão): SIMULAÇÃO, imprime o email no console
+- smtp: envia via SMTP (ex.: servidor local de testes em localhost:1025)
+
 Para produção com SendGrid real, veja instruções no final do arquivo.
 """
 import os
+import smtplib
+from email.message import EmailMessage
 
 # ============================================================================
 # SENDGRID IMPORTS - Comentado para avaliação (descomente para produção)
@@ -14,176 +24,220 @@ import os
 # from sendgrid.helpers.mail import Mail
 
 
-def send_rsvp_notification(event, attendee):
-    """Send email to host when someone RSVPs"""
-
-    # ========================================================================
-    # MODO SIMULAÇÃO - Para avaliadores (sem necessidade de conta SendGrid)
-    # ========================================================================
-    print("=" * 80)
-    print("📧 EMAIL SIMULADO - NOVO RSVP")
-    print("=" * 80)
-    print(f"De: {os.getenv('SENDER_EMAIL', 'noreply@venha.app')}")
-    print(f"Para: {event.host.email}")
-    print(f"Assunto: Novo RSVP para {event.title}")
-    print("-" * 80)
-    print("CONTEÚDO DO EMAIL:")
-    print("-" * 80)
-    print(f"Nova Confirmação de Presença!")
-    print(f"{attendee.name} confirmou presença no seu evento: {event.title}")
-    print()
-    print("Detalhes:")
-    print(f"  - Adultos: {attendee.num_adults}")
-    print(f"  - Crianças: {attendee.num_children}")
-    print(f"  - WhatsApp: {attendee.whatsapp_number}")
-    if attendee.comments:
-        print(f"  - Comentários: {attendee.comments}")
-    print()
-    print("Veja todos os convidados no seu painel.")
-    print("=" * 80)
-    return True
-
-    # ========================================================================
-    # CÓDIGO SENDGRID ORIGINAL - Comentado para avaliação
-    # Para produção: Descomente este bloco e comente o bloco de simulação acima
-    # ========================================================================
-    # sender_email = os.getenv("SENDER_EMAIL")
-    #
-    # message = Mail(
-    #     from_email=sender_email,
-    #     to_emails=event.host.email,
-    #     subject=f"Novo RSVP para {event.title}",
-    #     html_content=f"""
-    #         <h2>Nova Confirmação de Presença!</h2>
-    #         <p><strong>{attendee.name}</strong> confirmou presença no seu evento: <strong>{event.title}</strong></p>
-    #
-    #         <h3>Detalhes:</h3>
-    #         <ul>
-    #             <li>Adultos: {attendee.num_adults}</li>
-    #             <li>Crianças: {attendee.num_children}</li>
-    #             <li>WhatsApp: {attendee.whatsapp_number}</li>
-    #             {f'<li>Comentários: {attendee.comments}</li>' if attendee.comments else ''}
-    #         </ul>
-    #
-    #         <p>Veja todos os convidados no seu painel.</p>
-    #     """,
-    # )
-    #
-    # try:
-    #     sg = SendGridAPIClient(os.getenv("SENDGRID_API_KEY"))
-    #     response = sg.send(message)
-    #     print(f"✅ Email enviado! Status: {response.status_code}")
-    #     return True
-    # except Exception as e:
-    #     print(f"❌ Erro ao enviar email: {e}")
-    #     return False
-
-
-def send_modification_notification(event, attendee):
-    """Send email to host when someone modifies their RSVP"""
-
-    # ========================================================================
-    # MODO SIMULAÇÃO - Para avaliadores
-    # ========================================================================
-    print("=" * 80)
-    print("📧 EMAIL SIMULADO - RSVP MODIFICADO")
-    print("=" * 80)
-    print(f"De: {os.getenv('SENDER_EMAIL', 'noreply@venha.app')}")
-    print(f"Para: {event.host.email}")
-    print(f"Assunto: RSVP Modificado - {event.title}")
-    print("-" * 80)
-    print("CONTEÚDO DO EMAIL:")
-    print("-" * 80)
-    print(f"RSVP Modificado")
-    print(f"{attendee.name} modificou a confirmação para: {event.title}")
-    print()
-    print("Detalhes Atualizados:")
-    print(f"  - Adultos: {attendee.num_adults}")
-    print(f"  - Crianças: {attendee.num_children}")
-    print(f"  - Comentários: {attendee.comments or 'Nenhum'}")
-    print("=" * 80)
-    return True
-
-    # ========================================================================
-    # CÓDIGO SENDGRID ORIGINAL - Comentado para avaliação
-    # ========================================================================
-    # sender_email = os.getenv("SENDER_EMAIL")
-    #
-    # message = Mail(
-    #     from_email=sender_email,
-    #     to_emails=event.host.email,
-    #     subject=f"RSVP Modificado - {event.title}",
-    #     html_content=f"""
-    #         <h2>RSVP Modificado</h2>
-    #         <p><strong>{attendee.name}</strong> modificou a confirmação para: <strong>{event.title}</strong></p>
-    #
-    #         <h3>Detalhes Atualizados:</h3>
-    #         <ul>
-    #             <li>Adultos: {attendee.num_adults}</li>
-    #             <li>Crianças: {attendee.num_children}</li>
-    #             <li>Comentários: {attendee.comments}</li>
-    #         </ul>
-    #     """,
-    # )
-    #
-    # try:
-    #     sg = SendGridAPIClient(os.getenv("SENDGRID_API_KEY"))
-    #     sg.send(message)
-    #     print("✅ Email de modificação enviado!")
-    #     return True
-    # except Exception as e:
-    #     print(f"❌ Erro ao enviar email: {e}")
-    #     return False
-
-
-def send_cancellation_notification(event, attendee, reason=""):
-    """Send email to host when someone cancels"""
-
-    # ========================================================================
-    # MODO SIMULAÇÃO - Para avaliadores
-    # ========================================================================
-    print("=" * 80)
-    print("📧 EMAIL SIMULADO - RSVP CANCELADO")
-    print("=" * 80)
-    print(f"De: {os.getenv('SENDER_EMAIL', 'noreply@venha.app')}")
-    print(f"Para: {event.host.email}")
-    print(f"Assunto: RSVP Cancelado - {event.title}")
-    print("-" * 80)
-    print("CONTEÚDO DO EMAIL:")
-    print("-" * 80)
-    print(f"RSVP Cancelado")
-    print(f"{attendee.name} cancelou a presença em: {event.title}")
-    if reason:
-        print()
-        print(f"Motivo: {reason}")
-    print("=" * 80)
-    return True
-
-    # ========================================================================
-    # CÓDIGO SENDGRID ORIGINAL - Comentado para avaliação
-    # ========================================================================
-    # sender_email = os.getenv("SENDER_EMAIL")
-    #
-    # message = Mail(
-    #     from_email=sender_email,
-    #     to_emails=event.host.email,
-    #     subject=f"RSVP Cancelado - {event.title}",
-    #     html_content=f"""
-    #         <h2>RSVP Cancelado</h2>
-    #         <p><strong>{attendee.name}</strong> cancelou a presença em: <strong>{event.title}</strong></p>
-    #
-    #         {f'<p><strong>Motivo:</strong> {reason}</p>' if reason else ''}
-    #     """,
-    # )
-    #
-    # try:
-    #     sg = SendGridAPIClient(os.getenv("SENDGRID_API_KEY"))
-    #     sg.send(message)
-    #     print("✅ Email de cancelamento enviado!")
-    #     return True
-    # except Exception as e:
-    #     print(f"❌ Erro ao enviar email: {e}")
-    #     return False
+def notification_payload(event, attendee, reason=""):
+    """Snapshot the event/attendee fields used by the email templates"""
+    return {
+        "event_title": event.title,
+        "attendee_name": attendee.name,
+        "whatsapp_number": attendee.whatsapp_number,
+        "num_adults": attendee.num_adults,
+        "num_children": attendee.num_children,
+        "comments": attendee.comments,
+        "reason": reason,
+    }
+
+
+def _render_rsvp(payload):
+    lines = [
+        "Nova Confirmação de Presença!",
+        f"{payload['attendee_name']} confirmou presença no seu evento: {payload['event_title']}",
+        "",
+        "Detalhes:",
+        f"  - Adultos: {payload['num_adults']}",
+        f"  - Crianças: {payload['num_children']}",
+        f"  - WhatsApp: {payload['whatsapp_number']}",
+    ]
+    if payload.get("comments"):
+        lines.append(f"  - Comentários: {payload['comments']}")
+    lines += ["", "Veja todos os convidados no seu painel."]
+    return "NOVO RSVP", f"Novo RSVP para {payload['event_title']}", lines
+
+
+def _render_modification(payload):
+    lines = [
+        "RSVP Modificado",
+        f"{payload['attendee_name']} modificou a confirmação para: {payload['event_title']}",
+        "",
+        "Detalhes Atualizados:",
+        f"  - Adultos: {payload['num_adults']}",
+        f"  - Crianças: {payload['num_children']}",
+        f"  - Comentários: {payload.get('comments') or 'Nenhum'}",
+    ]
+    return "RSVP MODIFICADO", f"RSVP Modificado - {payload['event_title']}", lines
+
+
+def _render_cancellation(payload):
+    lines = [
+        "RSVP Cancelado",
+        f"{payload['attendee_name']} cancelou a presença em: {payload['event_title']}",
+    ]
+    if payload.get("reason"):
+        lines += ["", f"Motivo: {payload['reason']}"]
+    return "RSVP CANCELADO", f"RSVP Cancelado - {payload['event_title']}", lines
+
+
+def _render_waitlist(payload):
+    lines = [
+        "Lista de Espera",
+        f"{payload['attendee_name']} entrou na lista de espera de: {payload['event_title']}",
+        "",
+        "O evento atingiu o limite de convidados. A confirmação será feita",
+        "automaticamente quando houver vagas.",
+        "",
+        "Detalhes:",
+        f"  - Adultos: {payload['num_adults']}",
+        f"  - Crianças: {payload['num_children']}",
+        f"  - WhatsApp: {payload['whatsapp_number']}",
+    ]
+    return "LISTA DE ESPERA", f"Lista de espera - {payload['event_title']}", lines
+
+
+def _render_promotion(payload):
+    lines = [
+        "Convidado Confirmado da Lista de Espera",
+        f"Uma vaga foi liberada e {payload['attendee_name']} agora está confirmado(a) em: {payload['event_title']}",
+        "",
+        "Detalhes:",
+        f"  - Adultos: {payload['num_adults']}",
+        f"  - Crianças: {payload['num_children']}",
+        f"  - WhatsApp: {payload['whatsapp_number']}",
+    ]
+    return "SAIU DA LISTA DE ESPERA", f"Vaga liberada - {payload['event_title']}", lines
+
+
+RENDERERS = {
+    "rsvp": _render_rsvp,
+    "modification": _render_modification,
+    "cancellation": _render_cancellation,
+    "waitlist": _render_waitlist,
+    "promotion": _render_promotion,
+}
+
+
+def render_notification(kind, recipient, payload):
+    """Build the email message dict for a notification kind"""
+    label, subject, lines = RENDERERS[kind](payload)
+    return {
+        "label": label,
+        "sender": os.getenv("SENDER_EMAIL", "noreply@venha.app"),
+        "recipient": recipient,
+        "subject": subject,
+        "body": "\n".join(lines),
+    }
+
+
+DIGEST_SECTIONS = [
+    ("rsvp", "Novas confirmações"),
+    ("modification", "Modificações"),
+    ("cancellation", "Cancelamentos"),
+    ("waitlist", "Lista de espera"),
+    ("promotion", "Confirmados da lista de espera"),
+]
+
+
+def _digest_line(kind, payload):
+    if kind == "cancellation":
+        reason = f" (Motivo: {payload['reason']})" if payload.get("reason") else ""
+        return f"  - {payload['attendee_name']}{reason}"
+    line = (
+        f"  - {payload['attendee_name']}: {payload['num_adults']} adulto(s), "
+        f"{payload['num_children']} criança(s)"
+    )
+    if payload.get("comments"):
+        line += f" - {payload['comments']}"
+    return line
+
+
+def render_digest(recipient, items):
+    """Build a single summary email from coalesced (kind, payload) items"""
+    event_title = items[-1][1]["event_title"]
+    lines = [
+        "Resumo de RSVPs",
+        f"{len(items)} convidado(s) atualizaram a presença em: {event_title}",
+    ]
+    for kind, heading in DIGEST_SECTIONS:
+        section = [payload for item_kind, payload in items if item_kind == kind]
+        if section:
+            lines += ["", f"{heading} ({len(section)}):"]
+            lines += [_digest_line(kind, payload) for payload in section]
+    lines += ["", "Veja todos os convidados no seu painel."]
+    return {
+        "label": "RESUMO DE RSVPs",
+        "sender": os.getenv("SENDER_EMAIL", "noreply@venha.app"),
+        "recipient": recipient,
+        "subject": f"Resumo de RSVPs - {event_title}",
+        "body": "\n".join(lines),
+    }
+
+
+class ConsoleTransport:
+    """MODO SIMULAÇÃO - Para avaliadores (sem necessidade de conta SendGrid)"""
+
+    def send(self, message):
+        print("=" * 80)
+        print(f"📧 EMAIL SIMULADO - {message['label']}")
+        print("=" * 80)
+        print(f"De: {message['sender']}")
+        print(f"Para: {message['recipient']}")
+        print(f"Assunto: {message['subject']}")
+        print("-" * 80)
+        print("CONTEÚDO DO EMAIL:")
+        print("-" * 80)
+        print(message["body"])
+        print("=" * 80)
+        return True
+
+
+class SMTPTransport:
+    """Send plain-text emails through an SMTP server (SMTP_HOST/SMTP_PORT)"""
+
+    def __init__(self, host=None, port=None, timeout=10):
+        self.host = host or os.getenv("SMTP_HOST", "localhost")
+        self.port = int(port or os.getenv("SMTP_PORT", "1025"))
+        self.timeout = timeout
+
+    def send(self, message):
+        email = EmailMessage()
+        email["From"] = message["sender"]
+        email["To"] = message["recipient"]
+        email["Subject"] = message["subject"]
+        email.set_content(message["body"])
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            smtp.send_message(email)
+        return True
+
+
+# ============================================================================
+# TRANSPORTE SENDGRID ORIGINAL - Comentado para avaliação
+# Para produção: Descomente esta classe e registre-a em TRANSPORTS
+# ============================================================================
+# class SendGridTransport:
+#     def send(self, message):
+#         mail = Mail(
+#             from_email=os.getenv("SENDER_EMAIL"),
+#             to_emails=message["recipient"],
+#             subject=message["subject"],
+#             plain_text_content=message["body"],
+#         )
+#         sg = SendGridAPIClient(os.getenv("SENDGRID_API_KEY"))
+#         response = sg.send(mail)
+#         print(f"✅ Email enviado! Status: {response.status_code}")
+#         return True
+
+
+TRANSPORTS = {
+    "console": ConsoleTransport,
+    "smtp": SMTPTransport,
+    # "sendgrid": SendGridTransport,
+}
+
+
+def get_transport(name=None):
+    """Instantiate the transport configured in EMAIL_TRANSPORT"""
+    name = name or os.getenv("EMAIL_TRANSPORT", "console")
+    if name not in TRANSPORTS:
+        raise ValueError(f"Unknown email transport: {name}")
+    return TRANSPORTS[name]()
 
 
 # ============================================================================
@@ -196,12 +250,10 @@ Para habilitar envio de emails real via SendGrid em produção:
    - from sendgrid import SendGridAPIClient
    - from sendgrid.helpers.mail import Mail
 
-2. Em cada função (send_rsvp_notification, send_modification_notification,
-   send_cancellation_notification):
-   - COMENTE o bloco "MODO SIMULAÇÃO"
-   - DESCOMENTE o bloco "CÓDIGO SENDGRID ORIGINAL"
+2. Descomente a classe SendGridTransport e a entrada "sendgrid" em TRANSPORTS.
 
 3. Configure as variáveis de ambiente no arquivo .env:
+   - EMAIL_TRANSPORT=sendgrid
    - SENDGRID_API_KEY=sua-chave-sendgrid-aqui
    - SENDER_EMAIL=seu-email@verificado.com
 
@@ -210,5 +262,5 @@ Para habilitar envio de emails real via SendGrid em produção:
    - Settings → Sender Authentication → Verify a Single Sender
    - Use o mesmo email configurado em SENDER_EMAIL
 
-5. Reinicie a aplicação para aplicar as mudanças.
+5. Reinicie a aplicação e o worker de notificações para aplicar as mudanças.
 """
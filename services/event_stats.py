@@ -0,0 +1,289 @@
+# backend/services/event_stats.py
+"""
+Contadores de RSVP por evento (tabela event_stats).
+
+Cada escrita em attendees chama apply_attendee_change() antes do commit, de
+forma que os contadores são atualizados na mesma transação com incrementos
+atômicos (UPDATE ... SET x = x + delta). rebuild_event_stats() recalcula tudo a
+partir da tabela attendees e corrige qualquer divergência.
+
+Em eventos com max_guests o mesmo UPDATE reserva as vagas: a condição
+"total_adults + total_children + vagas <= max_guests" fica no WHERE, então
+só um de dois RSVPs simultâneos pela última vaga consegue atualizar a linha
+(o banco serializa as escritas na mesma linha). Quem não couber entra na
+lista de espera, promovida por promote_waitlist() quando vagas são liberadas.
+Enquanto houver alguém na lista de espera, RSVPs novos também entram nela
+(behind_waitlist), mesmo que caibam: ninguém fura a fila.
+"""
+from datetime import datetime
+
+from sqlalchemy import case, exists, func
+
+from extensions import db
+from models import Attendee, Event, EventStats
+from utils.query_budget import outside_budget
+
+
+def attendee_snapshot(attendee):
+    """Capture the fields that contribute to the counters of an attendee"""
+    if attendee is None:
+        return None
+    return (attendee.status, attendee.num_adults or 0, attendee.num_children or 0)
+
+
+def _contribution(snapshot):
+    """Return (confirmed, cancelled, adults, children) for a snapshot"""
+    if snapshot is None:
+        return (0, 0, 0, 0)
+    status, num_adults, num_children = snapshot
+    if status == "confirmed":
+        return (1, 0, num_adults, num_children)
+    if status == "cancelled":
+        return (0, 1, 0, 0)
+    return (0, 0, 0, 0)
+
+
+def create_event_stats(event):
+    """Attach an empty counters row to a newly created event"""
+    event.stats = EventStats(
+        confirmed_count=0, cancelled_count=0, total_adults=0, total_children=0
+    )
+    return event.stats
+
+
+def apply_attendee_change(event_id, before, after, max_guests=None, behind_waitlist=False):
+    """Apply the counter delta between two attendee snapshots.
+
+    ``before`` is None for inserts and ``after`` is None for deletes. Must be
+    called inside the same transaction as the attendee write, before that
+    write is flushed; the caller commits.
+
+    With ``max_guests`` a change that adds seats is only applied if the
+    confirmed headcount stays within the limit. Returns False (nothing
+    written) when the event is full.
+
+    With ``behind_waitlist`` (new or reactivated RSVPs) seats are also
+    refused while anyone is waitlisted for the event, in the same statement.
+    """
+    old = _contribution(before)
+    new = _contribution(after)
+    return _apply_delta(
+        event_id, [n - o for n, o in zip(new, old)], max_guests, behind_waitlist
+    )
+
+
+def _apply_delta(event_id, delta, max_guests=None, behind_waitlist=False):
+    if not any(delta):
+        return True
+
+    seats = delta[2] + delta[3]
+    conditional = seats > 0 and (max_guests is not None or behind_waitlist)
+    stmt = db.update(EventStats).where(EventStats.event_id == event_id)
+    if max_guests is not None and seats > 0:
+        stmt = stmt.where(
+            EventStats.total_adults + EventStats.total_children + seats <= max_guests
+        )
+    if behind_waitlist and seats > 0:
+        stmt = stmt.where(
+            ~exists().where(Attendee.event_id == event_id, Attendee.status == "waitlisted")
+        )
+    stmt = stmt.values(
+        confirmed_count=EventStats.confirmed_count + delta[0],
+        cancelled_count=EventStats.cancelled_count + delta[1],
+        total_adults=EventStats.total_adults + delta[2],
+        total_children=EventStats.total_children + delta[3],
+        updated_at=datetime.utcnow(),
+    ).execution_options(synchronize_session=False)
+    # Sem autoflush: a alteração do convidado ainda não pode estar gravada
+    # quando a linha de contadores precisa ser criada a partir da tabela
+    with db.session.no_autoflush:
+        result = db.session.execute(stmt)
+        if result.rowcount == 0:
+            # Só eventos antigos, uma vez: fora do orçamento de consultas da rota
+            with outside_budget():
+                if db.session.get(EventStats, event_id) is None:
+                    # Evento sem linha de contadores: cria a partir dos
+                    # convidados gravados e aplica o mesmo UPDATE condicional,
+                    # que continua valendo para as vagas
+                    insert_missing_event_stats([event_id])
+                    result = db.session.execute(stmt)
+    return result.rowcount > 0 or not conditional
+
+
+def apply_attendee_changes(event_id, changes):
+    """Apply the summed delta of many (before, after) snapshot pairs in one UPDATE.
+
+    No seat check: meant for callers holding lock_event_stats() that already
+    placed every guest. The caller commits.
+    """
+    delta = [0, 0, 0, 0]
+    for before, after in changes:
+        for index, (new, old) in enumerate(zip(_contribution(after), _contribution(before))):
+            delta[index] += new - old
+    return _apply_delta(event_id, delta)
+
+
+def lock_event_stats(event_id):
+    """Lock an event's counters row until the transaction ends and return it.
+
+    RSVPs reserving seats wait for the lock, so the caller can place many
+    guests against the returned totals. Creates the row for events that
+    predate event_stats.
+    """
+    if db.session.get_bind().dialect.name == "sqlite":
+        # SQLite não tem lock de linha: um UPDATE sem efeito pega o lock de
+        # escrita do banco
+        db.session.execute(
+            db.update(EventStats)
+            .where(EventStats.event_id == event_id)
+            .values(event_id=EventStats.event_id)
+            .execution_options(synchronize_session=False)
+        )
+    query = (
+        db.session.query(EventStats)
+        .filter(EventStats.event_id == event_id)
+        .with_for_update()
+        .populate_existing()
+    )
+    stats = query.one_or_none()
+    if stats is None:
+        insert_missing_event_stats([event_id])
+        stats = query.one()
+    return stats
+
+
+def promote_waitlist(event):
+    """Confirm waitlisted guests, first come first served, while their party fits.
+
+    Stops at the first party that does not fit, so nobody jumps the queue.
+    All promotions go into a single conditional counter update. Returns the
+    promoted attendees; the caller commits.
+    """
+    waitlist = (
+        Attendee.query.filter_by(event_id=event.id, status="waitlisted")
+        # Quem reativa um RSVP antigo entra no fim da fila (waitlisted_at);
+        # rsvp_date cobre linhas gravadas antes da coluna existir
+        .order_by(func.coalesce(Attendee.waitlisted_at, Attendee.rsvp_date), Attendee.id)
+        .with_for_update()
+        .all()
+    )
+    if not waitlist:
+        return []
+
+    free = None
+    if event.max_guests is not None:
+        # Trava a linha de contadores: ninguém reserva lugar entre a leitura
+        # e o UPDATE abaixo
+        taken = (
+            db.session.query(EventStats.total_adults + EventStats.total_children)
+            .filter(EventStats.event_id == event.id)
+            .with_for_update()
+            .scalar()
+        )
+        free = event.max_guests - (taken or 0)
+
+    promoted = []
+    adults = children = 0
+    for attendee in waitlist:
+        party_adults = attendee.num_adults or 0
+        party_children = attendee.num_children or 0
+        if free is not None and adults + children + party_adults + party_children > free:
+            break
+        adults += party_adults
+        children += party_children
+        promoted.append(attendee)
+    if not promoted:
+        return []
+
+    if not _apply_delta(event.id, [len(promoted), 0, adults, children], event.max_guests):
+        return []
+    for attendee in promoted:
+        attendee.status = "confirmed"
+    return promoted
+
+
+def _aggregate_query():
+    confirmed = Attendee.status == "confirmed"
+    return db.session.query(
+        Attendee.event_id,
+        func.count(case((confirmed, 1))),
+        func.count(case((Attendee.status == "cancelled", 1))),
+        func.coalesce(func.sum(case((confirmed, Attendee.num_adults), else_=0)), 0),
+        func.coalesce(func.sum(case((confirmed, Attendee.num_children), else_=0)), 0),
+    ).group_by(Attendee.event_id)
+
+
+def rebuild_event_stats(event_ids=None):
+    """Recompute counters from the attendees table.
+
+    Rebuilds every event when ``event_ids`` is None. Returns the number of
+    rows written. The caller commits.
+    """
+    events_query = db.session.query(Event.id)
+    aggregate = _aggregate_query()
+    if event_ids is not None:
+        events_query = events_query.filter(Event.id.in_(event_ids))
+        aggregate = aggregate.filter(Attendee.event_id.in_(event_ids))
+
+    ids = [event_id for (event_id,) in events_query.all()]
+    totals = {row[0]: row[1:] for row in aggregate.all()}
+
+    delete = db.delete(EventStats).execution_options(synchronize_session=False)
+    if event_ids is not None:
+        delete = delete.where(EventStats.event_id.in_(ids))
+    db.session.execute(delete)
+    for obj in list(db.session.identity_map.values()):
+        if isinstance(obj, EventStats):
+            db.session.expire(obj)
+
+    rows = _stats_rows(ids, totals)
+    if rows:
+        db.session.execute(db.insert(EventStats), rows)
+    return len(rows)
+
+
+def insert_missing_event_stats(event_ids):
+    """Create counters rows for events that have none; existing rows are kept.
+
+    Unlike rebuild_event_stats() it never deletes, and the insert skips rows
+    another request created meanwhile (ON CONFLICT DO NOTHING), so concurrent
+    callers can backfill the same events safely. The caller commits.
+    """
+    aggregate = _aggregate_query().filter(Attendee.event_id.in_(event_ids))
+    totals = {row[0]: row[1:] for row in aggregate.all()}
+    rows = _stats_rows(event_ids, totals)
+    if not rows:
+        return
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        for row in rows:
+            if db.session.get(EventStats, row["event_id"]) is None:
+                db.session.add(EventStats(**row))
+        db.session.flush()
+        return
+    db.session.execute(
+        insert(EventStats).values(rows).on_conflict_do_nothing(index_elements=["event_id"])
+    )
+
+
+def _stats_rows(event_ids, totals):
+    now = datetime.utcnow()
+    rows = []
+    for event_id in event_ids:
+        confirmed, cancelled, adults, children = totals.get(event_id, (0, 0, 0, 0))
+        rows.append(
+            {
+                "event_id": event_id,
+                "confirmed_count": confirmed,
+                "cancelled_count": cancelled,
+                "total_adults": int(adults),
+                "total_children": int(children),
+                "updated_at": now,
+            }
+        )
+    return rows
@@ -0,0 +1,73 @@
+# backend/services/idempotency.py
+"""
+Chaves de idempotência (header Idempotency-Key) para requisições de escrita.
+
+A primeira resposta bem-sucedida para uma chave fica guardada por
+IDEMPOTENCY_TTL_SECONDS em um dos caches de services/cache.py. Uma nova
+tentativa com a mesma chave e o mesmo corpo recebe a resposta guardada sem
+tocar no banco; a mesma chave com outro corpo é rejeitada.
+
+Entre gravar e guardar a resposta existe uma janela: logo depois do INSERT
+(antes do commit) o envio anota o id criado na chave (mark_pending). Um envio
+simultâneo com a mesma chave que esbarra no registro já existente só é
+tratado como repetição se a chave dele aponta para esse registro; uma chave
+nova com os mesmos dados é um envio novo.
+
+Em produção o padrão é um arquivo SQLite compartilhado pelos workers, para
+que a repetição seja reconhecida por qualquer um deles; com várias réplicas
+use IDEMPOTENCY_CACHE_URL=redis://...
+"""
+import hashlib
+import json
+
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyKeyReused(Exception):
+    """The key was already used with a different request body"""
+
+
+def request_fingerprint(payload):
+    """Stable hash of a JSON request body"""
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    """Stored responses keyed by (scope, Idempotency-Key)"""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def get(self, scope, key, payload):
+        """Return the stored (body, status) for this key, or None if there is none yet"""
+        stored = self.cache.get(f"{scope}:{key}")
+        if stored is None:
+            return None
+        if stored["fingerprint"] != request_fingerprint(payload):
+            raise IdempotencyKeyReused(key)
+        if stored.get("pending"):
+            return None
+        return stored["body"], stored["status"]
+
+    def mark_pending(self, scope, key, payload, resource_id):
+        """Record the id a request with this key just wrote, before its response is saved"""
+        self.cache.set(
+            f"{scope}:{key}",
+            {"fingerprint": request_fingerprint(payload), "pending": True, "id": resource_id},
+        )
+
+    def pending_id(self, scope, key, payload):
+        """Id written by an unfinished request with this key and body, or None"""
+        stored = self.cache.get(f"{scope}:{key}")
+        if stored is None or not stored.get("pending"):
+            return None
+        if stored["fingerprint"] != request_fingerprint(payload):
+            return None
+        return stored["id"]
+
+    def save(self, scope, key, payload, body, status):
+        self.cache.set(
+            f"{scope}:{key}",
+            {"fingerprint": request_fingerprint(payload), "body": body, "status": status},
+        )
@@ -0,0 +1,353 @@
+# backend/services/live_feed.py
+"""
+Feed ao vivo de RSVPs para o painel do anfitrião (Server-Sent Events).
+
+As rotas publicam uma mensagem por convidado alterado depois do commit;
+cada worker entrega as mensagens aos painéis conectados nele (Hub). O broker
+leva as mensagens de um worker para os outros:
+
+    LIVE_BROKER_URL=memory://                      um processo só (desenvolvimento)
+    LIVE_BROKER_URL=sqlite:////caminho/live.db     workers do mesmo host
+    LIVE_BROKER_URL=postgresql://...               LISTEN/NOTIFY, várias réplicas
+
+Em cada processo uma única thread escuta o broker (um LISTEN ou uma
+consulta a cada LIVE_POLL_INTERVAL_SECONDS) e distribui as mensagens para
+as filas dos assinantes, então o custo no banco não cresce com o número de
+painéis abertos.
+
+Cada conexão SSE ocupa uma thread (gthread) ou um greenlet (gevent)
+enquanto está aberta. Para não prender os workers, cada processo aceita no
+máximo LIVE_MAX_SUBSCRIBERS conexões (padrão: metade das threads no
+gthread, nenhuma no sync, 500 no gevent) e cada stream é encerrado após
+LIVE_STREAM_MAX_SECONDS; o EventSource do navegador reconecta sozinho. O
+feed não guarda histórico: ao reconectar, o painel busca o que perdeu em
+/api/events/<id>/attendees/changes.
+"""
+import json
+import logging
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+
+from config import get_live_broker_url
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_SECONDS = float(os.getenv("LIVE_HEARTBEAT_SECONDS", "15"))
+STREAM_MAX_SECONDS = float(os.getenv("LIVE_STREAM_MAX_SECONDS", "300"))
+POLL_INTERVAL_SECONDS = float(os.getenv("LIVE_POLL_INTERVAL_SECONDS", "0.5"))
+RECONNECT_DELAY_MS = 3000
+QUEUE_SIZE = 100
+CHANNEL = "venha_live"
+
+# Fração das publicações que também apaga mensagens antigas (broker SQLite)
+CLEANUP_PROBABILITY = 0.01
+SQLITE_RETENTION_SECONDS = 60
+
+
+def _default_max_subscribers():
+    worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+    if worker_class == "gevent":
+        return 500
+    if worker_class == "gthread":
+        # Metade das threads continua livre para os requests normais
+        return int(os.getenv("GUNICORN_THREADS", "4")) // 2
+    # sync: cada conexão prenderia o worker inteiro
+    return 0
+
+
+MAX_SUBSCRIBERS = int(os.getenv("LIVE_MAX_SUBSCRIBERS", _default_max_subscribers()))
+
+
+class SubscriberLimitReached(Exception):
+    """This process already serves LIVE_MAX_SUBSCRIBERS streams"""
+
+
+class Subscription:
+    """Queue of messages for one open stream"""
+
+    def __init__(self, hub, host_id):
+        self.hub = hub
+        self.host_id = host_id
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+        # Mensagens descartadas com a fila cheia: o cliente precisa ressincronizar
+        self.overflowed = False
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class Hub:
+    """Open streams of this process, by host"""
+
+    def __init__(self, max_subscribers=MAX_SUBSCRIBERS):
+        self.max_subscribers = max_subscribers
+        self._subscribers = {}
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, host_id):
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                raise SubscriberLimitReached()
+            subscription = Subscription(self, host_id)
+            self._subscribers.setdefault(host_id, set()).add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.host_id)
+            if subscribers and subscription in subscribers:
+                subscribers.discard(subscription)
+                self._count -= 1
+                if not subscribers:
+                    del self._subscribers[subscription.host_id]
+
+    def has_subscribers(self):
+        return self._count > 0
+
+    def dispatch(self, host_id, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(host_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(message)
+            except queue.Full:
+                subscription.overflowed = True
+
+
+class LocalBroker:
+    """Delivers straight to this process' streams (memory://)"""
+
+    def __init__(self, hub):
+        self.hub = hub
+
+    def publish(self, host_id, message):
+        self.hub.dispatch(host_id, message)
+
+    def listen(self):
+        pass
+
+
+class _ListenerThread:
+    """One background listener per process, alive while there are subscribers.
+
+    Subclasses define ``_run``, looping while ``_keep_running()`` is true.
+    """
+
+    def __init__(self, hub):
+        self.hub = hub
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def listen(self):
+        with self._lock:
+            alive = (
+                self._thread is not None
+                and self._pid == os.getpid()
+                and self._thread.is_alive()
+            )
+            if not alive:
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run, name="live-feed-listener", daemon=True
+                )
+                self._thread.start()
+
+    def _keep_running(self):
+        # Sob o lock: um subscribe() que chegue agora ou encontra a thread
+        # ainda viva (e ela vê o assinante aqui) ou já sem thread, e inicia outra
+        with self._lock:
+            if self.hub.has_subscribers():
+                return True
+            if self._thread is threading.current_thread():
+                self._thread = None
+            return False
+
+
+class SQLiteBroker(_ListenerThread):
+    """Messages in a SQLite file shared by the workers of one host"""
+
+    def __init__(self, path, hub):
+        super().__init__(hub)
+        self.path = path
+        self._local = threading.local()
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS live_messages ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, host_id INTEGER NOT NULL, "
+            "payload TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+
+    def _connection(self):
+        # Uma conexão por thread e por processo (seguro com preload + fork)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def publish(self, host_id, message):
+        conn = self._connection()
+        now = time.time()
+        conn.execute(
+            "INSERT INTO live_messages (host_id, payload, created_at) VALUES (?, ?, ?)",
+            (host_id, json.dumps(message), now),
+        )
+        if random.random() < CLEANUP_PROBABILITY:
+            conn.execute(
+                "DELETE FROM live_messages WHERE created_at < ?",
+                (now - SQLITE_RETENTION_SECONDS,),
+            )
+
+    def _run(self):
+        conn = self._connection()
+        last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM live_messages").fetchone()[0]
+        while self._keep_running():
+            try:
+                rows = conn.execute(
+                    "SELECT id, host_id, payload FROM live_messages WHERE id > ? ORDER BY id",
+                    (last_id,),
+                ).fetchall()
+            except sqlite3.Error:
+                logger.exception("Falha ao ler o broker do feed ao vivo")
+                rows = []
+            for message_id, host_id, payload in rows:
+                last_id = message_id
+                self.hub.dispatch(host_id, json.loads(payload))
+            time.sleep(POLL_INTERVAL_SECONDS)
+
+
+class PostgresBroker(_ListenerThread):
+    """PostgreSQL LISTEN/NOTIFY, shared by every replica using the database"""
+
+    def __init__(self, dsn, hub):
+        super().__init__(hub)
+        self.dsn = dsn
+        self._publish_lock = threading.Lock()
+        self._publish_conn = None
+        self._publish_pid = None
+
+    def _connect(self):
+        import psycopg2
+
+        conn = psycopg2.connect(self.dsn)
+        conn.autocommit = True
+        return conn
+
+    def publish(self, host_id, message):
+        payload = json.dumps({"host_id": host_id, "message": message})
+        with self._publish_lock:
+            if self._publish_conn is None or self._publish_pid != os.getpid():
+                self._publish_conn = self._connect()
+                self._publish_pid = os.getpid()
+            try:
+                with self._publish_conn.cursor() as cursor:
+                    cursor.execute("SELECT pg_notify(%s, %s)", (CHANNEL, payload))
+            except Exception:
+                # Conexão caiu: a próxima publicação abre outra
+                self._publish_conn = None
+                raise
+
+    def _run(self):
+        import select
+
+        conn = None
+        while self._keep_running():
+            try:
+                if conn is None:
+                    conn = self._connect()
+                    with conn.cursor() as cursor:
+                        cursor.execute(f"LISTEN {CHANNEL}")
+                if select.select([conn], [], [], HEARTBEAT_SECONDS) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    data = json.loads(notify.payload)
+                    self.hub.dispatch(data["host_id"], data["message"])
+            except Exception:
+                logger.exception("Falha no LISTEN do feed ao vivo; reconectando")
+                if conn is not None:
+                    conn.close()
+                conn = None
+                time.sleep(1)
+        if conn is not None:
+            conn.close()
+
+
+def create_broker(url, hub):
+    """Broker from a URL (memory://, sqlite:///path or postgresql://...)"""
+    if url.startswith("memory://"):
+        return LocalBroker(hub)
+    if url.startswith("sqlite:///"):
+        return SQLiteBroker(url[len("sqlite:///"):], hub)
+    if url.startswith(("postgresql", "postgres://")):
+        # postgresql+psycopg2://... -> postgresql://... (DSN do libpq)
+        scheme, rest = url.split("://", 1)
+        return PostgresBroker("postgresql://" + rest, hub)
+    raise ValueError(f"Unsupported live broker URL: {url}")
+
+
+hub = Hub()
+broker = create_broker(get_live_broker_url(), hub)
+
+
+def publish(host_id, message):
+    """Send a message to the host's open dashboards; never raises"""
+    try:
+        broker.publish(host_id, message)
+    except Exception:
+        # O feed é um extra: uma falha aqui não desfaz o RSVP já gravado
+        logger.exception("Falha ao publicar no feed ao vivo")
+
+
+def subscribe(host_id):
+    """Open a subscription for a host; raises SubscriberLimitReached"""
+    subscription = hub.subscribe(host_id)
+    broker.listen()
+    return subscription
+
+
+def format_event(event, data):
+    """One SSE frame"""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def event_stream(subscription):
+    """SSE frames for a subscription until STREAM_MAX_SECONDS or disconnect"""
+    try:
+        yield f"retry: {RECONNECT_DELAY_MS}\n\n"
+        deadline = time.monotonic() + STREAM_MAX_SECONDS
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            message = subscription.get(timeout=min(HEARTBEAT_SECONDS, remaining))
+            if subscription.overflowed:
+                # Painel lento demais: pede para buscar as alterações de novo
+                subscription.overflowed = False
+                yield format_event("resync", {})
+            if message is None:
+                # Comentário SSE: mantém proxies abertos e detecta desconexão
+                yield ": keepalive\n\n"
+                continue
+            yield format_event(message["type"], message)
+    finally:
+        subscription.close()
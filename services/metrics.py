@@ -0,0 +1,366 @@
+# backend/services/metrics.py
+"""
+Métricas no formato texto do Prometheus (GET /metrics).
+
+O que é coletado:
+- http_requests_total e http_request_duration_seconds por rota do flask-restx
+  (o template da URL, ex.: /api/events/<string:slug>) e método
+- http_request_db_queries e http_request_db_seconds: quantas consultas SQL
+  cada request fez e quanto tempo passou no banco (eventos
+  before/after_cursor_execute do SQLAlchemy)
+- notification_send_duration_seconds: tempo de cada envio de email
+
+Cada processo acumula os valores em memória. Com METRICS_STORAGE_URI
+apontando para um arquivo SQLite (padrão em produção) os processos gravam
+seus totais no arquivo a cada METRICS_FLUSH_INTERVAL_SECONDS e o /metrics
+soma todos eles: o resultado é o mesmo qualquer que seja o worker do
+gunicorn que atender o scrape, e inclui o worker de notificações. Linhas de
+workers encerrados são somadas em uma linha "archived" (child_exit no
+gunicorn.conf.py), então os contadores nunca diminuem.
+
+    METRICS_STORAGE_URI=memory://                 (por processo)
+    METRICS_STORAGE_URI=sqlite:////caminho/metrics.db
+"""
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from config import get_metrics_storage_uri
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+FLUSH_INTERVAL_SECONDS = float(os.getenv("METRICS_FLUSH_INTERVAL_SECONDS", "1"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+ARCHIVED = "archived"
+
+
+class SQLiteMetricsStorage:
+    """Per-process metric totals in a SQLite file shared by every process on the host"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS metric_samples ("
+            "process TEXT NOT NULL, family TEXT NOT NULL, sample TEXT NOT NULL, "
+            "labels TEXT NOT NULL, value REAL NOT NULL, "
+            "PRIMARY KEY (process, family, sample, labels))"
+        )
+
+    def _connection(self):
+        # Uma conexão por thread e por processo (seguro com preload + fork)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def write(self, process, samples):
+        """Replace this process' totals for the given (family, sample, labels, value) rows"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO metric_samples "
+                "(process, family, sample, labels, value) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (process, family, sample, json.dumps(labels), value)
+                    for family, sample, labels, value in samples
+                ],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def archive(self, process):
+        """Fold a finished process' totals into the archived row"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO metric_samples (process, family, sample, labels, value) "
+                "SELECT ?, family, sample, labels, value FROM metric_samples "
+                "WHERE process = ? "
+                "ON CONFLICT (process, family, sample, labels) "
+                "DO UPDATE SET value = value + excluded.value",
+                (ARCHIVED, process),
+            )
+            conn.execute("DELETE FROM metric_samples WHERE process = ?", (process,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def read(self):
+        rows = self._connection().execute(
+            "SELECT family, sample, labels, SUM(value) FROM metric_samples "
+            "GROUP BY family, sample, labels"
+        )
+        return [
+            (family, sample, tuple(tuple(pair) for pair in json.loads(labels)), value)
+            for family, sample, labels, value in rows
+        ]
+
+
+class Registry:
+    """Metric definitions and this process' values"""
+
+    def __init__(self, storage=None):
+        self.storage = storage
+        self.families = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._values = {}
+        self._dirty = set()
+        self._pid = os.getpid()
+        self._claimed = False
+        self._last_flush = time.monotonic()
+
+    def register(self, metric):
+        self.families[metric.name] = metric
+        return metric
+
+    def add(self, family, sample, labels, amount):
+        key = (family, sample, labels)
+        with self._lock:
+            if self._pid != os.getpid():
+                # Processo filho após fork: começa do zero
+                self._reset()
+            self._values[key] = self._values.get(key, 0) + amount
+            self._dirty.add(key)
+        if (
+            self.storage is not None
+            and time.monotonic() - self._last_flush >= FLUSH_INTERVAL_SECONDS
+        ):
+            self.flush(blocking=False)
+
+    def flush(self, blocking=True):
+        """Write this process' changed totals to the shared storage"""
+        if self.storage is None:
+            return
+        # Um flush por vez: um snapshot antigo nunca sobrescreve um mais novo
+        if not self._flush_lock.acquire(blocking=blocking):
+            return
+        try:
+            self._flush()
+        finally:
+            self._flush_lock.release()
+
+    def _flush(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            samples = [key + (self._values[key],) for key in self._dirty]
+            self._dirty = set()
+            self._last_flush = time.monotonic()
+            claimed = self._claimed
+            self._claimed = True
+        process = str(os.getpid())
+        try:
+            if not claimed:
+                # Linhas antigas com o mesmo pid são de um processo que já
+                # terminou (ex.: container reiniciado)
+                self.storage.archive(process)
+            if samples:
+                self.storage.write(process, samples)
+        except sqlite3.Error:
+            # Métricas nunca derrubam um request: tenta de novo no próximo flush
+            with self._lock:
+                self._claimed = claimed
+                self._dirty.update(key[:3] for key in samples)
+
+    def collect(self):
+        if self.storage is not None:
+            self.flush()
+            return self.storage.read()
+        with self._lock:
+            return [key + (value,) for key, value in self._values.items()]
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        by_family = {}
+        for family, sample, labels, value in self.collect():
+            by_family.setdefault(family, []).append((sample, labels, value))
+        lines = []
+        for name, metric in self.families.items():
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for sample, labels, value in sorted(by_family.get(name, []), key=_sample_order):
+                lines.append(f"{sample}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _sample_order(item):
+    sample, labels, _ = item
+    other = tuple(pair for pair in labels if pair[0] != "le")
+    le = dict(labels).get("le")
+    return (other, sample, float(le) if le is not None else 0.0)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _format_bound(bound):
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, registry, name, help):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        registry.register(self)
+
+    def inc(self, amount=1, **labels):
+        self.registry.add(self.name, self.name, tuple(sorted(labels.items())), amount)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, registry, name, help, buckets=LATENCY_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets) + (float("inf"),)
+        registry.register(self)
+
+    def observe(self, value, **labels):
+        base = tuple(sorted(labels.items()))
+        for bound in self.buckets:
+            if value <= bound:
+                bucket_labels = tuple(sorted(base + (("le", _format_bound(bound)),)))
+                self.registry.add(self.name, self.name + "_bucket", bucket_labels, 1)
+        self.registry.add(self.name, self.name + "_sum", base, value)
+        self.registry.add(self.name, self.name + "_count", base, 1)
+
+
+def create_storage(url):
+    """Storage backend from a URL (memory:// or sqlite:///path)"""
+    if url.startswith("memory://"):
+        return None
+    if url.startswith("sqlite:///"):
+        return SQLiteMetricsStorage(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported metrics storage URL: {url}")
+
+
+registry = Registry(create_storage(get_metrics_storage_uri()))
+atexit.register(registry.flush)
+
+REQUESTS_TOTAL = Counter(
+    registry, "http_requests_total", "Requests HTTP por rota, método e status"
+)
+REQUEST_DURATION = Histogram(
+    registry, "http_request_duration_seconds", "Latência dos requests por rota"
+)
+REQUEST_DB_QUERIES = Histogram(
+    registry,
+    "http_request_db_queries",
+    "Consultas SQL executadas por request",
+    buckets=QUERY_COUNT_BUCKETS,
+)
+REQUEST_DB_SECONDS = Histogram(
+    registry, "http_request_db_seconds", "Tempo gasto no banco por request"
+)
+NOTIFICATION_SEND_SECONDS = Histogram(
+    registry,
+    "notification_send_duration_seconds",
+    "Duração de cada envio de notificação por tipo e resultado",
+)
+
+
+def mark_process_dead(pid):
+    """Archive the totals of a process that exited (gunicorn child_exit hook)"""
+    if registry.storage is not None:
+        registry.storage.archive(str(pid))
+
+
+def render_metrics():
+    return registry.render()
+
+
+class RequestMetrics:
+    """Query count and DB time accumulated by the current request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+def current_request_metrics():
+    if not has_request_context():
+        return None
+    return g.get("request_metrics")
+
+
+def _finish_request(stats, route, method, status):
+    elapsed = time.perf_counter() - stats.started
+    REQUESTS_TOTAL.inc(route=route, method=method, status=str(status))
+    REQUEST_DURATION.observe(elapsed, route=route, method=method)
+    REQUEST_DB_QUERIES.observe(stats.queries, route=route, method=method)
+    REQUEST_DB_SECONDS.observe(stats.db_seconds, route=route, method=method)
+
+
+def instrument_app(app):
+    """Measure every request (streamed responses are timed until the last chunk)"""
+
+    @app.before_request
+    def _start_request_metrics():
+        g.request_metrics = RequestMetrics()
+
+    @app.after_request
+    def _record_request_metrics(response):
+        stats = g.get("request_metrics")
+        if stats is not None:
+            route = request.url_rule.rule if request.url_rule else "<unmatched>"
+            method, status = request.method, response.status_code
+            response.call_on_close(lambda: _finish_request(stats, route, method, status))
+        return response
+
+
+def instrument_queries(engine):
+    """Count SQL statements and DB time of the request that issued them"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = current_request_metrics()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += time.perf_counter() - context._metrics_started
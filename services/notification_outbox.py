@@ -0,0 +1,215 @@
+# backend/services/notification_outbox.py
+"""
+Outbox transacional de notificações.
+
+As rotas chamam enqueue_notification() antes do commit: a linha da outbox é
+gravada na mesma transação do RSVP, e a resposta não espera pelo provedor de
+email. O worker (flask notifications-worker) chama drain_outbox() em lotes,
+com novas tentativas usando backoff exponencial; após OUTBOX_MAX_ATTEMPTS
+falhas a notificação vai para o estado "dead".
+
+Com NOTIFICATION_DIGEST_WINDOW_SECONDS > 0 o worker agrupa as notificações por
+anfitrião e evento: o grupo é enviado como um único resumo quando a notificação
+mais antiga completa a janela, e várias ações do mesmo convidado (WhatsApp)
+viram uma única entrada com o estado final.
+
+Com NOTIFICATION_DELIVERY=inline (útil em desenvolvimento) a rota entrega a
+notificação logo após o commit, pelo mesmo caminho do worker.
+"""
+import os
+import time
+from datetime import datetime, timedelta
+
+from extensions import db
+from models import NotificationOutbox
+from services.email_service import (
+    get_transport,
+    notification_payload,
+    render_digest,
+    render_notification,
+)
+from services.metrics import NOTIFICATION_SEND_SECONDS
+from utils.query_budget import outside_budget
+
+MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+BACKOFF_BASE_SECONDS = int(os.getenv("OUTBOX_BACKOFF_BASE_SECONDS", "30"))
+BACKOFF_MAX_SECONDS = int(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "3600"))
+DIGEST_WINDOW_SECONDS = int(os.getenv("NOTIFICATION_DIGEST_WINDOW_SECONDS", "0"))
+
+
+def enqueue_notification(kind, event, attendee, reason=""):
+    """Add an outbox row to the current session; the caller commits"""
+    entry = NotificationOutbox(
+        kind=kind,
+        recipient=event.host.email,
+        event_id=event.id,
+        payload=notification_payload(event, attendee, reason),
+        status="pending",
+        attempts=0,
+        next_attempt_at=datetime.utcnow(),
+    )
+    db.session.add(entry)
+    return entry
+
+
+def deliver_after_commit(entry, transport=None):
+    """Deliver a committed entry immediately when NOTIFICATION_DELIVERY=inline"""
+    if os.getenv("NOTIFICATION_DELIVERY", "worker") != "inline":
+        return
+    if DIGEST_WINDOW_SECONDS > 0:
+        # Em modo resumo quem envia é o worker, ao fim da janela
+        return
+    # O custo da entrega não entra no orçamento de consultas da rota, e o
+    # commit (que só altera a outbox) não expira os objetos que a rota ainda usa
+    session = db.session()
+    expire_on_commit = session.expire_on_commit
+    session.expire_on_commit = False
+    try:
+        with outside_budget():
+            _deliver([[entry]], transport or get_transport())
+            session.commit()
+    finally:
+        session.expire_on_commit = expire_on_commit
+
+
+def backoff_delay(attempts):
+    """Seconds to wait before the next attempt after ``attempts`` failures"""
+    return min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS)
+
+
+def coalesce_entries(entries):
+    """Collapse entries per guest into (kind, payload) items with the final state.
+
+    A new RSVP followed by modifications stays a new RSVP with the latest
+    details; any action followed by a cancellation becomes a cancellation.
+    """
+    items = {}
+    for entry in sorted(entries, key=lambda e: e.id):
+        guest = entry.payload.get("whatsapp_number")
+        kind = entry.kind
+        previous = items.get(guest)
+        if previous and previous[0] == "rsvp" and kind == "modification":
+            kind = "rsvp"
+        items[guest] = (kind, entry.payload)
+    return list(items.values())
+
+
+def _build_message(group):
+    if len(group) == 1:
+        entry = group[0]
+        return render_notification(entry.kind, entry.recipient, entry.payload)
+    return render_digest(group[0].recipient, coalesce_entries(group))
+
+
+def _deliver(groups, transport):
+    """Send one message per group of entries. Returns the number of entries sent"""
+    now = datetime.utcnow()
+    sent = 0
+    for group in groups:
+        kind = group[0].kind if len(group) == 1 else "digest"
+        started = time.perf_counter()
+        try:
+            transport.send(_build_message(group))
+        except Exception as e:  # noqa: BLE001 - qualquer falha do provedor
+            NOTIFICATION_SEND_SECONDS.observe(
+                time.perf_counter() - started, kind=kind, result="failed"
+            )
+            for entry in group:
+                entry.attempts += 1
+                entry.last_error = f"{type(e).__name__}: {e}"
+                if entry.attempts >= MAX_ATTEMPTS:
+                    entry.status = "dead"
+                else:
+                    entry.next_attempt_at = now + timedelta(
+                        seconds=backoff_delay(entry.attempts)
+                    )
+            continue
+        NOTIFICATION_SEND_SECONDS.observe(
+            time.perf_counter() - started, kind=kind, result="sent"
+        )
+        for entry in group:
+            entry.status = "sent"
+            entry.sent_at = now
+            entry.last_error = None
+        sent += len(group)
+    return sent
+
+
+def _due_query():
+    return NotificationOutbox.query.filter(
+        NotificationOutbox.status == "pending",
+        NotificationOutbox.next_attempt_at <= datetime.utcnow(),
+    )
+
+
+def claim_batch(batch_size):
+    """Lock a batch of due entries (SKIP LOCKED lets workers run in parallel)"""
+    return (
+        _due_query()
+        .order_by(NotificationOutbox.next_attempt_at, NotificationOutbox.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+
+def claim_digest_groups(batch_size, window_seconds):
+    """Lock entries whose (recipient, event) group has completed the window.
+
+    Returns a list of groups; each group becomes a single message.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=window_seconds)
+    expired = (
+        _due_query()
+        .filter(NotificationOutbox.created_at <= cutoff)
+        .order_by(NotificationOutbox.created_at, NotificationOutbox.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    groups = {}
+    for entry in expired:
+        groups.setdefault((entry.recipient, entry.event_id), {})[entry.id] = entry
+
+    for (recipient, event_id), group in groups.items():
+        # Inclui as notificações mais recentes do mesmo grupo no resumo
+        newer = (
+            _due_query()
+            .filter(
+                NotificationOutbox.recipient == recipient,
+                NotificationOutbox.event_id == event_id,
+                NotificationOutbox.id.notin_(list(group)),
+            )
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        for entry in newer:
+            group[entry.id] = entry
+    return [list(group.values()) for group in groups.values()]
+
+
+def drain_outbox(batch_size=50, transport=None, digest_window=None):
+    """Deliver one batch of due notifications. Returns (claimed, sent)"""
+    transport = transport or get_transport()
+    if digest_window is None:
+        digest_window = DIGEST_WINDOW_SECONDS
+    if digest_window > 0:
+        groups = claim_digest_groups(batch_size, digest_window)
+    else:
+        groups = [[entry] for entry in claim_batch(batch_size)]
+    sent = _deliver(groups, transport)
+    db.session.commit()
+    return sum(len(group) for group in groups), sent
+
+
+def run_worker(batch_size=50, poll_interval=2.0, once=False):
+    """Drain the outbox until interrupted (or until empty when ``once``)"""
+    transport = get_transport()
+    while True:
+        claimed, sent = drain_outbox(batch_size, transport)
+        if claimed:
+            print(f"[outbox] {sent}/{claimed} notificação(ões) entregue(s)")
+        if once and claimed < batch_size:
+            return
+        if claimed < batch_size:
+            time.sleep(poll_interval)
@@ -0,0 +1,90 @@
+# backend/services/password_hashing.py
+"""
+Hash de senhas com bcrypt fora da thread do request.
+
+O bcrypt custa dezenas de milissegundos de CPU por chamada. As operações
+rodam em um pool limitado de threads (o bcrypt libera o GIL) e um semáforo
+limita quantas podem estar em execução ou na fila: além disso a chamada
+falha na hora com HashingBusy, em vez de enfileirar sem limite durante uma
+rajada de logins.
+
+    BCRYPT_LOG_ROUNDS      custo (work factor) dos novos hashes (padrão 12)
+    HASH_MAX_WORKERS       hashes simultâneos por processo (padrão 2)
+    HASH_MAX_QUEUE         pedidos aguardando além dos que estão rodando (padrão 8)
+    HASH_TIMEOUT_SECONDS   espera máxima por um resultado (padrão 5)
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from flask import current_app
+
+from extensions import bcrypt
+
+MAX_WORKERS = int(os.getenv("HASH_MAX_WORKERS", "2"))
+MAX_QUEUE = int(os.getenv("HASH_MAX_QUEUE", "8"))
+TIMEOUT_SECONDS = float(os.getenv("HASH_TIMEOUT_SECONDS", "5"))
+
+
+class HashingBusy(Exception):
+    """Raised when too many hash operations are already in flight"""
+
+
+class _BoundedHasher:
+    def __init__(self, max_workers, max_queue):
+        self._max_workers = max_workers
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Criado sob demanda em cada processo (seguro com preload + fork)
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers, thread_name_prefix="bcrypt"
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            future = self._get_executor().submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=TIMEOUT_SECONDS)
+        except FutureTimeoutError as e:
+            raise HashingBusy() from e
+
+
+_hasher = _BoundedHasher(MAX_WORKERS, MAX_QUEUE)
+
+
+def hash_password(password):
+    """Hash a password with the configured cost; returns a str"""
+    return _hasher.run(bcrypt.generate_password_hash, password).decode("utf-8")
+
+
+def check_password(password_hash, password):
+    """Check a password against a stored hash"""
+    return _hasher.run(bcrypt.check_password_hash, password_hash, password)
+
+
+def hash_cost(password_hash):
+    """Work factor encoded in a bcrypt hash ($2b$<cost>$...)"""
+    try:
+        return int(password_hash.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def needs_rehash(password_hash):
+    """True when the hash was created with a different work factor"""
+    return hash_cost(password_hash) != current_app.config.get("BCRYPT_LOG_ROUNDS", 12)
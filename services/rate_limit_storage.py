@@ -0,0 +1,158 @@
+# backend/services/rate_limit_storage.py
+"""
+Backend sqlite:// para o Flask-Limiter (biblioteca limits).
+
+Guarda os contadores em um arquivo SQLite compartilhado por todos os workers
+do gunicorn no mesmo host, então os limites valem para o processo inteiro e
+não por worker. Cada verificação da janela deslizante (sliding-window-counter)
+roda em uma única transação BEGIN IMMEDIATE: ler as duas janelas e
+incrementar a atual é atômico entre processos.
+
+    RATELIMIT_STORAGE_URI=sqlite:////caminho/ratelimit.db
+
+Para várias réplicas use um backend de rede suportado pelo limits, por
+exemplo redis://host:6379 (requer o pacote redis).
+"""
+import os
+import random
+import sqlite3
+import threading
+import time
+from math import floor
+
+from limits.storage import SlidingWindowCounterSupport, Storage
+from limits.storage.base import TimestampedSlidingWindow
+
+# Fração das escritas que também remove contadores expirados
+CLEANUP_PROBABILITY = 0.01
+
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """Rate limit counters in a SQLite file shared across worker processes"""
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri=None, wrap_exceptions=False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.path = uri[len("sqlite:///"):] if uri else ":memory:"
+        self._local = threading.local()
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits ("
+                "key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connection(self):
+        # Uma conexão por thread e por processo (seguro com preload + fork)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _transaction(self):
+        storage = self
+
+        class _Transaction:
+            def __enter__(self):
+                self.conn = storage._connection()
+                self.conn.execute("BEGIN IMMEDIATE")
+                return self.conn
+
+            def __exit__(self, exc_type, exc, tb):
+                self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+                return False
+
+        return _Transaction()
+
+    def _get(self, conn, key, now):
+        row = conn.execute(
+            "SELECT count, expires_at FROM rate_limits WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] <= now:
+            return 0, None
+        return row
+
+    def _incr(self, conn, key, expiry, amount, now):
+        count, expires_at = self._get(conn, key, now)
+        if expires_at is None:
+            count, expires_at = 0, now + expiry
+        count += amount
+        conn.execute(
+            "INSERT OR REPLACE INTO rate_limits (key, count, expires_at) VALUES (?, ?, ?)",
+            (key, count, expires_at),
+        )
+        if random.random() < CLEANUP_PROBABILITY:
+            conn.execute("DELETE FROM rate_limits WHERE expires_at <= ?", (now,))
+        return count
+
+    def incr(self, key, expiry, amount=1):
+        with self._transaction() as conn:
+            return self._incr(conn, key, expiry, amount, time.time())
+
+    def get(self, key):
+        return self._get(self._connection(), key, time.time())[0]
+
+    def get_expiry(self, key):
+        expires_at = self._get(self._connection(), key, time.time())[1]
+        return expires_at if expires_at is not None else time.time()
+
+    def check(self):
+        try:
+            self._connection().execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        with self._transaction() as conn:
+            return conn.execute("DELETE FROM rate_limits").rowcount
+
+    def clear(self, key):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM rate_limits WHERE key = ?", (key,))
+
+    def _window(self, conn, key, expiry, now):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count = self._get(conn, previous_key, now)[0]
+        current_count = self._get(conn, current_key, now)[0]
+        if previous_count == 0:
+            previous_ttl = 0.0
+        else:
+            previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return current_key, (previous_count, previous_ttl, current_count, current_ttl)
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        now = time.time()
+        with self._transaction() as conn:
+            current_key, window = self._window(conn, key, expiry, now)
+            previous_count, previous_ttl, current_count, _ = window
+            weighted_count = previous_count * previous_ttl / expiry + current_count
+            if floor(weighted_count) + amount > limit:
+                return False
+            # O contador da janela atual vive por duas janelas (vira a anterior)
+            self._incr(conn, current_key, 2 * expiry, amount, now)
+            return True
+
+    def get_sliding_window(self, key, expiry):
+        return self._window(self._connection(), key, expiry, time.time())[1]
+
+    def clear_sliding_window(self, key, expiry):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        with self._transaction() as conn:
+            conn.execute(
+                "DELETE FROM rate_limits WHERE key IN (?, ?)", (previous_key, current_key)
+            )
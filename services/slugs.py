@@ -0,0 +1,118 @@
+# backend/services/slugs.py
+"""
+Slugs curtos e sem colisão para os links de convite.
+
+Cada evento recebe um número de um contador no banco (tabela
+slug_sequence, incrementado com um único UPDATE ... RETURNING na transação
+da criação). O número passa por uma permutação de Feistel com a chave
+guardada na mesma tabela e é escrito com 7 caracteres em base32 (alfabeto
+de Crockford, minúsculo). Como a permutação é uma bijeção, números
+diferentes sempre geram slugs diferentes: o INSERT do evento nunca precisa
+ser repetido, e os slugs não são sequenciais (não dá para descobrir os
+convites de outros eventos a partir de um link).
+
+Com um prefixo derivado do título o slug fica legível, ex.:
+"aniversario-da-ana-k3m9x2p". O sufixo tem tamanho fixo e não contém "-",
+então continua único com qualquer prefixo. Slugs antigos (8 caracteres
+hexadecimais de um uuid4) não colidem com nenhum dos dois formatos.
+
+A chave é gerada pela migração 0005 e nunca deve ser trocada depois que
+houver eventos: com outra chave o contador voltaria a gerar slugs já usados.
+"""
+import hashlib
+import hmac
+import re
+import unicodedata
+
+from sqlalchemy import select, update
+
+ALPHABET = "0123456789abcdefghjkmnpqrstvwxyz"
+CODE_LENGTH = 7
+CODE_BITS = 5 * CODE_LENGTH  # 35 bits: ~34 bilhões de slugs
+HALF_BITS = (CODE_BITS + 1) // 2
+HALF_MASK = (1 << HALF_BITS) - 1
+FEISTEL_ROUNDS = 4
+PREFIX_MAX_LENGTH = 30
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def _round_function(value, secret, round_index):
+    digest = hmac.new(
+        secret.encode("utf-8"), f"{round_index}:{value}".encode("ascii"), hashlib.sha256
+    ).digest()
+    return int.from_bytes(digest[:8], "big") & HALF_MASK
+
+
+def permute(number, secret):
+    """Keyed bijection on [0, 2**CODE_BITS)"""
+    if not 0 <= number < 1 << CODE_BITS:
+        raise ValueError(f"Slug sequence exhausted: {number}")
+    # A rede de Feistel embaralha 2 * HALF_BITS bits; valores fora do
+    # domínio são permutados de novo até cair nele (cycle walking)
+    while True:
+        left, right = number >> HALF_BITS, number & HALF_MASK
+        for round_index in range(FEISTEL_ROUNDS):
+            left, right = right, left ^ _round_function(right, secret, round_index)
+        number = (left << HALF_BITS) | right
+        if number < 1 << CODE_BITS:
+            return number
+
+
+def encode(number):
+    """Fixed-length base32 representation of a permuted number"""
+    chars = []
+    for _ in range(CODE_LENGTH):
+        number, digit = divmod(number, 32)
+        chars.append(ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+def title_prefix(title):
+    """URL-safe, accent-free prefix from an event title ("" when nothing is left)"""
+    ascii_title = (
+        unicodedata.normalize("NFKD", title or "").encode("ascii", "ignore").decode("ascii")
+    )
+    words = _NON_ALNUM.sub("-", ascii_title.lower()).strip("-")
+    if len(words) <= PREFIX_MAX_LENGTH:
+        return words
+    # Corta na última palavra inteira que couber
+    cut = words[: PREFIX_MAX_LENGTH + 1].rsplit("-", 1)[0]
+    return cut if cut else words[:PREFIX_MAX_LENGTH]
+
+
+def next_sequence_value(connection):
+    """Increment the slug counter; returns (value, secret)"""
+    from models import SlugSequence
+
+    table = SlugSequence.__table__
+    stmt = update(table).where(table.c.id == 1).values(value=table.c.value + 1)
+    if connection.dialect.update_returning:
+        row = connection.execute(stmt.returning(table.c.value, table.c.secret)).first()
+    else:
+        row = None
+        if connection.execute(stmt).rowcount:
+            row = connection.execute(
+                select(table.c.value, table.c.secret).where(table.c.id == 1)
+            ).first()
+    if row is None:
+        raise RuntimeError(
+            "Tabela slug_sequence vazia: rode python -m migrations upgrade"
+        )
+    return row
+
+
+def allocate_slug(connection, title=None):
+    """Reserve a new event slug inside the caller's transaction.
+
+    With ``title`` the slug gets a readable prefix derived from it.
+    """
+    value, secret = next_sequence_value(connection)
+    code = encode(permute(value, secret))
+    prefix = title_prefix(title) if title else ""
+    return f"{prefix}-{code}" if prefix else code
+
+
+def has_title_prefix(slug):
+    """Whether a slug was allocated with a title prefix"""
+    return "-" in slug
@@ -0,0 +1,168 @@
+# backend/services/weather.py
+"""
+Previsão do tempo dos eventos (proxy da WeatherAPI).
+
+A previsão é guardada por (local, data do evento), então todos os convidados
+de um evento, e eventos no mesmo lugar e dia, compartilham uma única
+consulta à WeatherAPI por WEATHER_CACHE_TTL_SECONDS:
+
+- dentro do TTL a resposta sai do cache (WEATHER_CACHE_URL; em produção um
+  arquivo SQLite compartilhado pelos workers)
+- num cache miss, consultas simultâneas da mesma chave viram uma só
+  (SingleFlight)
+- se a WeatherAPI falhar, a previsão vencida continua sendo servida
+  (marcada com stale) por até WEATHER_STALE_TTL_SECONDS, e durante
+  WEATHER_UPSTREAM_BACKOFF_SECONDS nenhuma consulta espera pelo upstream
+"""
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import requests
+
+from config import get_weather_cache_url
+from services.cache import SingleFlight, create_cache
+
+logger = logging.getLogger(__name__)
+
+API_URL = os.getenv("WEATHER_API_URL", "https://api.weatherapi.com/v1/forecast.json")
+API_KEY = os.getenv("WEATHER_API_KEY", "")
+UPSTREAM_TIMEOUT_SECONDS = float(os.getenv("WEATHER_UPSTREAM_TIMEOUT_SECONDS", "3"))
+UPSTREAM_BACKOFF_SECONDS = float(os.getenv("WEATHER_UPSTREAM_BACKOFF_SECONDS", "30"))
+CACHE_TTL_SECONDS = int(os.getenv("WEATHER_CACHE_TTL_SECONDS", "3600"))
+# Quanto tempo uma previsão vencida ainda serve de reserva se a WeatherAPI cair
+STALE_TTL_SECONDS = int(os.getenv("WEATHER_STALE_TTL_SECONDS", "86400"))
+# A WeatherAPI só tem previsão para os próximos 14 dias
+FORECAST_DAYS = 14
+
+
+class WeatherUnavailable(Exception):
+    """The upstream failed and there is no cached forecast to fall back on"""
+
+
+def forecast_window(today=None):
+    """First and last dates with a forecast available"""
+    today = today or date.today()
+    return today, today + timedelta(days=FORECAST_DAYS - 1)
+
+
+def cache_key(location, day):
+    return f"{' '.join(location.lower().split())}|{day.isoformat()}"
+
+
+def _parse(data, day):
+    """Forecast for ``day`` from a WeatherAPI response (None if it is missing)"""
+    days = (data.get("forecast") or {}).get("forecastday") or []
+    for item in days:
+        if item.get("date") == day.isoformat():
+            summary = item.get("day") or {}
+            condition = summary.get("condition") or {}
+            return {
+                "max_temp_c": summary.get("maxtemp_c"),
+                "min_temp_c": summary.get("mintemp_c"),
+                "chance_of_rain": summary.get("daily_chance_of_rain"),
+                "condition": condition.get("text"),
+                "icon": condition.get("icon"),
+            }
+    return None
+
+
+class _Upstream:
+    """WeatherAPI client that stops calling for a while after a failure"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+
+    def fetch(self, location, day):
+        """Forecast dict, or None when WeatherAPI has none; raises WeatherUnavailable"""
+        if not API_KEY:
+            raise WeatherUnavailable("WEATHER_API_KEY não configurada")
+        if time.monotonic() < self._down_until:
+            raise WeatherUnavailable("upstream em backoff")
+        try:
+            response = requests.get(
+                API_URL,
+                params={
+                    "key": API_KEY,
+                    "q": location,
+                    "dt": day.isoformat(),
+                    "days": 1,
+                    "aqi": "no",
+                    "alerts": "no",
+                },
+                timeout=UPSTREAM_TIMEOUT_SECONDS,
+            )
+            if response.status_code == 400:
+                # Local não encontrado (ou data fora do alcance): não é queda
+                return None
+            response.raise_for_status()
+            data = response.json()
+        except (requests.RequestException, ValueError) as exc:
+            logger.warning("Falha ao consultar a previsão do tempo: %s", exc)
+            with self._lock:
+                self._down_until = time.monotonic() + UPSTREAM_BACKOFF_SECONDS
+            raise WeatherUnavailable(str(exc)) from exc
+        if not isinstance(data, dict):
+            return None
+        return _parse(data, day)
+
+    def reset(self):
+        with self._lock:
+            self._down_until = 0.0
+
+
+upstream = _Upstream()
+cache = create_cache(
+    get_weather_cache_url(),
+    namespace="weather",
+    ttl=STALE_TTL_SECONDS,
+    max_entries=int(os.getenv("WEATHER_CACHE_MAX_ENTRIES", "2048")),
+)
+_flight = SingleFlight()
+
+
+def _is_fresh(entry):
+    return entry is not None and time.time() - entry["fetched_at"] < CACHE_TTL_SECONDS
+
+
+def _refresh(key, location, day):
+    # Outro worker pode ter acabado de buscar (cache compartilhado)
+    entry = cache.get(key)
+    if _is_fresh(entry):
+        return entry
+    entry = {"forecast": upstream.fetch(location, day), "fetched_at": time.time()}
+    cache.set(key, entry)
+    return entry
+
+
+def _result(entry, stale):
+    age = time.time() - entry["fetched_at"]
+    return {
+        "forecast": entry["forecast"],
+        "fetched_at": datetime.fromtimestamp(entry["fetched_at"], timezone.utc).isoformat(),
+        "stale": stale,
+        # Segundos até a próxima busca: base para o Cache-Control da rota
+        "max_age": 0 if stale else max(0, int(CACHE_TTL_SECONDS - age)),
+    }
+
+
+def get_forecast(location, day):
+    """Cached forecast for a place and date.
+
+    Returns {"forecast", "fetched_at", "stale", "max_age"}; ``forecast`` is
+    None when WeatherAPI has nothing for that place and date. Raises
+    WeatherUnavailable when the upstream fails and nothing is cached.
+    """
+    key = cache_key(location, day)
+    entry = cache.get(key)
+    if _is_fresh(entry):
+        return _result(entry, stale=False)
+    try:
+        return _result(_flight.do(key, lambda: _refresh(key, location, day)), stale=False)
+    except WeatherUnavailable:
+        if entry is None:
+            raise
+        return _result(entry, stale=True)
@@ -0,0 +1,77 @@
+# backend/utils/pagination.py
+"""
+Paginação por cursor (keyset).
+
+Em vez de OFFSET, cada página continua a partir da chave de ordenação do
+último item da página anterior: WHERE (coluna, id) > (valor, último_id)
+ORDER BY coluna, id LIMIT n. Com um índice em (filtro, coluna, id) o custo de
+cada página depende só do tamanho da página, não da posição na lista, e
+inserções entre duas páginas não duplicam nem pulam itens.
+
+O cursor é opaco para o cliente: JSON em base64 com a ordenação usada e a
+chave do último item.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+
+class InvalidCursor(ValueError):
+    """The cursor is malformed or was issued for another sort order"""
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(sort, values):
+    """Opaque token pointing after the row whose sort key is ``values``"""
+    payload = json.dumps(
+        {"s": sort, "k": [_encode_value(value) for value in values]},
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, sort):
+    """Sort key stored in ``token``; raises InvalidCursor"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if payload["s"] != sort:
+            raise InvalidCursor(token)
+        return [_decode_value(value) for value in payload["k"]]
+    except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursor(token) from exc
+
+
+def keyset_order(columns, descending):
+    """ORDER BY clauses for a keyset (every column in the same direction)"""
+    return [column.desc() if descending else column.asc() for column in columns]
+
+
+def keyset_page(query, columns, descending, limit, after=None):
+    """Apply keyset ordering to ``query``; returns (rows, last_key or None).
+
+    ``columns`` ends with a unique column (the id) so the order is total.
+    ``last_key`` is the key of the last row when there may be more rows.
+    """
+    if after is not None:
+        key, bound = tuple_(*columns), tuple(after)
+        query = query.filter(key < bound if descending else key > bound)
+    rows = query.order_by(*keyset_order(columns, descending)).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, [getattr(rows[-1], column.key) for column in columns]
@@ -0,0 +1,164 @@
+# backend/utils/queries.py
+"""
+Consultas compartilhadas pelas rotas e auditoria dos planos de execução.
+"""
+from datetime import datetime
+
+from sqlalchemy import and_, tuple_, update
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models import Attendee, Event, EventStats
+
+
+def find_event_attendee(slug, whatsapp_number):
+    """Resolve (event, attendee) for a slug + WhatsApp in a single query.
+
+    Returns ``(None, None)`` when the event does not exist and
+    ``(event, None)`` when the guest has not RSVP'd yet.
+    """
+    row = (
+        db.session.query(Event, Attendee)
+        .outerjoin(
+            Attendee,
+            and_(
+                Attendee.event_id == Event.id,
+                Attendee.whatsapp_number == whatsapp_number,
+            ),
+        )
+        .filter(Event.slug == slug)
+        .first()
+    )
+    if row is None:
+        return None, None
+    return row
+
+
+def insert_attendee(values):
+    """Insert an RSVP unless the guest already has one for the event.
+
+    A single INSERT ... ON CONFLICT DO NOTHING RETURNING on PostgreSQL and
+    SQLite, so concurrent submissions cannot both pass an existence check.
+    Returns the new attendee id, or ``None`` when the row already existed.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = (
+            insert(Attendee)
+            .values(**values)
+            .on_conflict_do_nothing(index_elements=["event_id", "whatsapp_number"])
+            .returning(Attendee.id)
+        )
+        return db.session.execute(stmt).scalar()
+
+    attendee = Attendee(**values)
+    try:
+        with db.session.begin_nested():
+            db.session.add(attendee)
+    except IntegrityError:
+        return None
+    return attendee.id
+
+
+def lock_attendee(attendee):
+    """Re-read an attendee under a write lock before changing seat counters.
+
+    Another request may have promoted or edited the row since it was loaded;
+    the snapshot taken after this call is the one that will be committed.
+    """
+    if db.session.get_bind().dialect.name == "sqlite":
+        # SQLite não tem lock de linha: um UPDATE sem efeito pega o lock de
+        # escrita do banco, e o refresh abaixo lê a versão mais recente
+        # (last_modified explícito: não conta como alteração na sincronização)
+        db.session.execute(
+            update(Attendee)
+            .where(Attendee.id == attendee.id)
+            .values(id=Attendee.id, last_modified=Attendee.last_modified)
+            .execution_options(synchronize_session=False)
+        )
+    db.session.refresh(attendee, with_for_update=True)
+    return attendee
+
+
+def hot_queries():
+    """The statements behind the busiest routes, with representative params"""
+    return {
+        "event_by_slug": db.select(Event).where(Event.slug == "abc12345"),
+        "rsvp_lookup": db.select(Event, Attendee)
+        .outerjoin(
+            Attendee,
+            and_(
+                Attendee.event_id == Event.id,
+                Attendee.whatsapp_number == "5521999999999",
+            ),
+        )
+        .where(Event.slug == "abc12345"),
+        "my_events": db.select(Event, EventStats)
+        .outerjoin(EventStats, EventStats.event_id == Event.id)
+        .where(Event.host_id == 1)
+        .order_by(Event.event_date.desc(), Event.id.desc()),
+        "attendees_by_event": db.select(Attendee).where(Attendee.event_id == 1),
+        "attendees_by_status": db.select(Attendee).where(
+            Attendee.event_id == 1, Attendee.status == "confirmed"
+        ),
+        "attendees_page": db.select(Attendee)
+        .where(
+            Attendee.event_id == 1,
+            tuple_(Attendee.rsvp_date, Attendee.id) > (datetime(2025, 1, 1), 10),
+        )
+        .order_by(Attendee.rsvp_date, Attendee.id)
+        .limit(51),
+        "attendees_page_by_name": db.select(Attendee)
+        .where(Attendee.event_id == 1, tuple_(Attendee.name, Attendee.id) > ("Ana", 10))
+        .order_by(Attendee.name, Attendee.id)
+        .limit(51),
+    }
+
+
+def _plan_sqlite(connection, sql):
+    rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + sql).fetchall()
+    details = [row[-1] for row in rows]
+    # "SCAN tabela" sem índice = varredura sequencial
+    full_scans = [
+        detail
+        for detail in details
+        if detail.startswith("SCAN ") and " USING " not in detail
+    ]
+    return details, full_scans
+
+
+def _plan_postgresql(connection, sql):
+    # Desliga seq scan para verificar se existe um caminho por índice:
+    # em tabelas pequenas o planner prefere seq scan mesmo com índice
+    connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    rows = connection.exec_driver_sql("EXPLAIN " + sql).fetchall()
+    details = [row[0] for row in rows]
+    full_scans = [detail for detail in details if "Seq Scan" in detail]
+    return details, full_scans
+
+
+def audit_query_plans():
+    """EXPLAIN every hot query; returns {name: (plan lines, full scan lines)}"""
+    engine = db.engine
+    explain = {
+        "sqlite": _plan_sqlite,
+        "postgresql": _plan_postgresql,
+    }.get(engine.dialect.name)
+    if explain is None:
+        raise RuntimeError(f"Auditoria não suportada para {engine.dialect.name}")
+
+    report = {}
+    with engine.connect() as connection:
+        for name, statement in hot_queries().items():
+            sql = str(
+                statement.compile(
+                    dialect=engine.dialect, compile_kwargs={"literal_binds": True}
+                )
+            )
+            with connection.begin():
+                report[name] = explain(connection, sql)
+    return report
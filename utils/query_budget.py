@@ -0,0 +1,143 @@
+# backend/utils/query_budget.py
+"""
+Orçamento de consultas SQL por request e detector de N+1.
+
+Cada método de Resource declara quantas consultas espera fazer com
+@query_budget(n). Quando o detector está ativo, as consultas do request são
+contadas e agrupadas pelo formato (o SQL sem valores literais): passar do
+orçamento, ou repetir o mesmo formato QUERY_REPEAT_THRESHOLD vezes (o
+sintoma de um relacionamento lazy acessado dentro de um loop), gera um aviso
+no log ou uma exceção.
+
+QUERY_BUDGET_MODE:
+- raise: levanta QueryBudgetExceeded (padrão com app.testing)
+- log:   apenas registra um aviso (padrão com app.debug)
+- off:   desligado (padrão em produção)
+
+Em respostas em streaming só as consultas feitas antes do primeiro byte
+entram na conta. Trechos cujo custo depende da configuração e não da rota
+(ex.: a entrega inline de notificações) rodam dentro de outside_budget().
+"""
+import os
+import re
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "5"))
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|:\w+)"
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised in ``raise`` mode when a request breaks its query budget"""
+
+
+def statement_shape(statement):
+    """Normalize a SQL statement so N+1 repetitions compare equal"""
+    shape = _STRING.sub("?", statement)
+    shape = _NUMBER.sub("?", shape)
+    shape = _PLACEHOLDER_LIST.sub("(?)", shape)
+    return _SPACES.sub(" ", shape).strip()
+
+
+def budget_mode():
+    mode = current_app.config.get("QUERY_BUDGET_MODE")
+    if mode:
+        return mode
+    if current_app.testing:
+        return "raise"
+    if current_app.debug:
+        return "log"
+    return "off"
+
+
+def repeated_shapes(statements, threshold=REPEAT_THRESHOLD):
+    """Statement shapes executed at least ``threshold`` times, most frequent first"""
+    shapes = Counter()
+    for statement, count in statements.items():
+        shapes[statement_shape(statement)] += count
+    return [(shape, count) for shape, count in shapes.most_common() if count >= threshold]
+
+
+def _report(problems):
+    if budget_mode() == "raise":
+        raise QueryBudgetExceeded("; ".join(problems))
+    for problem in problems:
+        current_app.logger.warning("[query-budget] %s", problem)
+
+
+def check_query_log(label, budget=None, max_repeats=None):
+    """Compare the queries issued so far in this request against a budget"""
+    statements = g.get("query_log")
+    if statements is None:
+        return
+    problems = []
+    total = sum(statements.values())
+    if budget is not None and total > budget:
+        problems.append(f"{label}: {total} consultas (orçamento: {budget})")
+    for shape, count in repeated_shapes(statements, max_repeats or REPEAT_THRESHOLD):
+        problems.append(f"{label}: {count}x a mesma consulta (possível N+1): {shape}")
+    if problems:
+        _report(problems)
+
+
+@contextmanager
+def outside_budget():
+    """Do not count the statements issued inside this block"""
+    if not has_request_context() or g.get("query_log") is None:
+        yield
+        return
+    statements = g.query_log
+    g.query_log = None
+    try:
+        yield
+    finally:
+        g.query_log = statements
+
+
+def query_budget(max_queries, max_repeats=None):
+    """Declare how many SQL statements a Resource method is expected to issue"""
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            result = method(*args, **kwargs)
+            g.query_budget_checked = True
+            check_query_log(method.__qualname__, max_queries, max_repeats)
+            return result
+
+        wrapper.query_budget = max_queries
+        return wrapper
+
+    return decorator
+
+
+def init_query_budget(app, engine):
+    """Record the statements of each request while the detector is active"""
+
+    @app.before_request
+    def _start_query_log():
+        if budget_mode() != "off":
+            g.query_log = Counter()
+
+    @app.after_request
+    def _check_undeclared_routes(response):
+        # Rotas sem @query_budget: só o detector de N+1
+        if g.get("query_log") is not None and not g.get("query_budget_checked"):
+            check_query_log(request.endpoint or request.path)
+        return response
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _log_statement(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context():
+            statements = g.get("query_log")
+            if statements is not None:
+                statements[statement] += 1